@@ -3,9 +3,37 @@ Flask后端API服务
 提供测试用例生成工具所需的mock数据接口
 """
 
-from flask import Flask, request, jsonify
+import base64
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
 
+from case_export import CaseExporter, iter_export_zip
+from case_import import import_ndjson
+from case_store import CaseStore, VersionConflictError
+from case_validator import CaseValidator
+from disk_cache import DiskLRUCache, content_key
+from duplicate_index import DuplicateIndex
+from expression_engine import EvaluationContext, ExpressionEngine, parse_time
+from generation_backend import (
+    DEFAULT_BATCH_WINDOW, DEFAULT_MAX_BATCH, DEFAULT_POOL_SIZE, GenerationError, HttpGenerationBackend,
+    MockGenerationBackend
+)
+from generation_jobs import (
+    DEFAULT_HEARTBEAT_INTERVAL, DEFAULT_MAX_QUEUED, DEFAULT_TIMEOUT, DEFAULT_WORKERS, GenerationJobQueue, QueueFullError
+)
+from json_patch import InvalidPatchError, apply_patch, parse_patch
+from result_cache import LRUCache
+from static_payload import StaticPayload, VersionedPayload, content_digest
+from suggest_index import SUGGEST_CASE, SUGGEST_STEP, SUGGEST_TEMPLATE, SuggestIndex
+from template_registry import TemplateRegistry, normalize_template_path
+from variable_analyzer import GlobalNames, VariableAnalyzer
+
 app = Flask(__name__)
 CORS(app)  # 允许跨域请求
 
@@ -17,314 +45,9 @@ CASE_LIBRARY_OPTIONS = [
     {"value": "archived", "label": "已归档精品案例库"}
 ]
 
-# 模板特定参数配置 - 不同模板有不同的请求/响应结构
-TEMPLATE_SPECIFIC_PARAMS = {
-    'api': {
-        '@\\soap\\CreateSubscriber.xml': {
-            'rReq': {
-                'header': {
-                    'version': {'type': 'string', 'value': '1.0', 'isDefault': True},
-                    'bizCode': {'type': 'string', 'value': 'CREATE_SUBSCRIBER', 'isDefault': True},
-                    'transId': {'type': 'string', 'value': '${G.uuid()}', 'isDefault': True},
-                    'timestamp': {'type': 'string', 'value': '${G.now()}', 'isDefault': True}
-                },
-                'body': {
-                    'subscriberInfo': {
-                        'msisdn': {'type': 'string', 'value': '${My_SubIdentity}'},
-                        'imsi': {'type': 'string', 'value': '${My_IMSI}'},
-                        'status': {'type': 'number', 'value': 1, 'isDefault': True},
-                        'createDate': {'type': 'date', 'value': '${G.today()}', 'isDefault': True}
-                    },
-                    'offeringInfo': {
-                        'primaryOfferingId': {'type': 'string', 'value': '${My_PrimaryOfferingID}'},
-                        'effectiveDate': {'type': 'date', 'value': '${G.today()}', 'isDefault': True}
-                    }
-                }
-            },
-            'rRsp': {
-                'resultCode': {'type': 'string', 'value': '0', 'validation': 'equals', 'isDefault': True},
-                'resultMsg': {'type': 'string', 'value': 'Success', 'validation': 'noCare', 'isDefault': True},
-                'data': {
-                    'subscriberId': {'type': 'string', 'value': '', 'validation': 'notEmpty', 'saveAs': ''},
-                    'accountId': {'type': 'string', 'value': '', 'validation': 'notEmpty', 'saveAs': ''}
-                }
-            }
-        },
-        '@\\soap\\QuerySubscriber.xml': {
-            'rReq': {
-                'header': {
-                    'version': {'type': 'string', 'value': '1.0', 'isDefault': True},
-                    'bizCode': {'type': 'string', 'value': 'QUERY_SUBSCRIBER', 'isDefault': True},
-                    'transId': {'type': 'string', 'value': '${G.uuid()}', 'isDefault': True},
-                    'timestamp': {'type': 'string', 'value': '${G.now()}', 'isDefault': True}
-                },
-                'body': {
-                    'queryCondition': {
-                        'msisdn': {'type': 'string', 'value': '${My_SubIdentity}'},
-                        'queryType': {'type': 'string', 'value': 'FULL', 'isDefault': True}
-                    }
-                }
-            },
-            'rRsp': {
-                'resultCode': {'type': 'string', 'value': '0', 'validation': 'equals', 'isDefault': True},
-                'data': {
-                    'subscriberInfo': {
-                        'msisdn': {'type': 'string', 'value': '', 'validation': 'notEmpty'},
-                        'status': {'type': 'number', 'value': '', 'validation': 'noCare'},
-                        'balance': {'type': 'number', 'value': '', 'validation': 'noCare', 'saveAs': 'My_Balance'}
-                    }
-                }
-            }
-        },
-        '@\\soap\\ModifySubscriber.xml': {
-            'rReq': {
-                'header': {
-                    'version': {'type': 'string', 'value': '1.0', 'isDefault': True},
-                    'bizCode': {'type': 'string', 'value': 'MODIFY_SUBSCRIBER', 'isDefault': True},
-                    'transId': {'type': 'string', 'value': '${G.uuid()}', 'isDefault': True},
-                    'timestamp': {'type': 'string', 'value': '${G.now()}', 'isDefault': True}
-                },
-                'body': {
-                    'subscriberId': {'type': 'string', 'value': '${My_SubscriberId}'},
-                    'modifyInfo': {
-                        'newStatus': {'type': 'number', 'value': ''},
-                        'reason': {'type': 'string', 'value': '', 'isDefault': True}
-                    }
-                }
-            },
-            'rRsp': {
-                'resultCode': {'type': 'string', 'value': '0', 'validation': 'equals', 'isDefault': True},
-                'resultMsg': {'type': 'string', 'value': 'Success', 'validation': 'noCare', 'isDefault': True}
-            }
-        },
-        '@\\soap\\DeleteSubscriber.xml': {
-            'rReq': {
-                'header': {
-                    'version': {'type': 'string', 'value': '1.0', 'isDefault': True},
-                    'bizCode': {'type': 'string', 'value': 'DELETE_SUBSCRIBER', 'isDefault': True},
-                    'transId': {'type': 'string', 'value': '${G.uuid()}', 'isDefault': True},
-                    'timestamp': {'type': 'string', 'value': '${G.now()}', 'isDefault': True}
-                },
-                'body': {
-                    'subscriberId': {'type': 'string', 'value': '${My_SubscriberId}'},
-                    'deleteReason': {'type': 'string', 'value': ''}
-                }
-            },
-            'rRsp': {
-                'resultCode': {'type': 'string', 'value': '0', 'validation': 'equals', 'isDefault': True}
-            }
-        },
-        '@\\soap\\CreateAccount.xml': {
-            'rReq': {
-                'header': {
-                    'version': {'type': 'string', 'value': '1.0', 'isDefault': True},
-                    'bizCode': {'type': 'string', 'value': 'CREATE_ACCOUNT', 'isDefault': True},
-                    'transId': {'type': 'string', 'value': '${G.uuid()}', 'isDefault': True},
-                    'timestamp': {'type': 'string', 'value': '${G.now()}', 'isDefault': True}
-                },
-                'body': {
-                    'accountInfo': {
-                        'accountName': {'type': 'string', 'value': ''},
-                        'accountType': {'type': 'string', 'value': 'PERSONAL', 'isDefault': True},
-                        'currencyCode': {'type': 'string', 'value': 'CNY', 'isDefault': True}
-                    }
-                }
-            },
-            'rRsp': {
-                'resultCode': {'type': 'string', 'value': '0', 'validation': 'equals', 'isDefault': True},
-                'data': {
-                    'accountId': {'type': 'string', 'value': '', 'validation': 'notEmpty', 'saveAs': 'My_AccountId'}
-                }
-            }
-        },
-        '@\\soap\\Payment.xml': {
-            'rReq': {
-                'header': {
-                    'version': {'type': 'string', 'value': '1.0', 'isDefault': True},
-                    'bizCode': {'type': 'string', 'value': 'PAYMENT', 'isDefault': True},
-                    'transId': {'type': 'string', 'value': '${G.uuid()}', 'isDefault': True},
-                    'timestamp': {'type': 'string', 'value': '${G.now()}', 'isDefault': True}
-                },
-                'body': {
-                    'paymentInfo': {
-                        'accountId': {'type': 'string', 'value': '${My_AccountId}'},
-                        'amount': {'type': 'number', 'value': ''},
-                        'paymentMethod': {'type': 'string', 'value': 'CASH', 'isDefault': True},
-                        'currencyCode': {'type': 'string', 'value': 'CNY', 'isDefault': True}
-                    }
-                }
-            },
-            'rRsp': {
-                'resultCode': {'type': 'string', 'value': '0', 'validation': 'equals', 'isDefault': True},
-                'data': {
-                    'paymentId': {'type': 'string', 'value': '', 'validation': 'notEmpty', 'saveAs': ''},
-                    'newBalance': {'type': 'number', 'value': '', 'validation': 'noCare', 'saveAs': 'My_Balance'}
-                }
-            }
-        },
-        '@\\soap\\Adjustment.xml': {
-            'rReq': {
-                'header': {
-                    'version': {'type': 'string', 'value': '1.0', 'isDefault': True},
-                    'bizCode': {'type': 'string', 'value': 'ADJUSTMENT', 'isDefault': True},
-                    'transId': {'type': 'string', 'value': '${G.uuid()}', 'isDefault': True},
-                    'timestamp': {'type': 'string', 'value': '${G.now()}', 'isDefault': True}
-                },
-                'body': {
-                    'adjustmentInfo': {
-                        'accountId': {'type': 'string', 'value': '${My_AccountId}'},
-                        'amount': {'type': 'number', 'value': ''},
-                        'adjustType': {'type': 'string', 'value': 'CREDIT', 'isDefault': True},
-                        'reason': {'type': 'string', 'value': ''}
-                    }
-                }
-            },
-            'rRsp': {
-                'resultCode': {'type': 'string', 'value': '0', 'validation': 'equals', 'isDefault': True},
-                'data': {
-                    'adjustmentId': {'type': 'string', 'value': '', 'validation': 'notEmpty', 'saveAs': ''}
-                }
-            }
-        },
-        '@\\soap\\ChangeOffering.xml': {
-            'rReq': {
-                'header': {
-                    'version': {'type': 'string', 'value': '1.0', 'isDefault': True},
-                    'bizCode': {'type': 'string', 'value': 'CHANGE_OFFERING', 'isDefault': True},
-                    'transId': {'type': 'string', 'value': '${G.uuid()}', 'isDefault': True},
-                    'timestamp': {'type': 'string', 'value': '${G.now()}', 'isDefault': True}
-                },
-                'body': {
-                    'subscriberId': {'type': 'string', 'value': '${My_SubscriberId}'},
-                    'offeringChange': {
-                        'oldOfferingId': {'type': 'string', 'value': '${My_OldOfferingID}'},
-                        'newOfferingId': {'type': 'string', 'value': '${My_NewOfferingID}'},
-                        'effectiveDate': {'type': 'date', 'value': '${G.today()}', 'isDefault': True}
-                    }
-                }
-            },
-            'rRsp': {
-                'resultCode': {'type': 'string', 'value': '0', 'validation': 'equals', 'isDefault': True},
-                'resultMsg': {'type': 'string', 'value': 'Success', 'validation': 'noCare', 'isDefault': True}
-            }
-        }
-    },
-    'restful': {
-        '@\\rest\\GetUser.json': {
-            'rReq': {
-                'headers': {
-                    'Content-Type': {'type': 'string', 'value': 'application/json', 'isDefault': True},
-                    'Authorization': {'type': 'string', 'value': 'Bearer ${My_Token}'}
-                },
-                'queryParams': {
-                    'userId': {'type': 'string', 'value': '${My_UserId}'}
-                }
-            },
-            'rRsp': {
-                'code': {'type': 'number', 'value': 200, 'validation': 'equals', 'isDefault': True},
-                'data': {
-                    'id': {'type': 'string', 'value': '', 'validation': 'notEmpty', 'saveAs': ''},
-                    'name': {'type': 'string', 'value': '', 'validation': 'noCare'},
-                    'email': {'type': 'string', 'value': '', 'validation': 'noCare'}
-                }
-            }
-        },
-        '@\\rest\\CreateUser.json': {
-            'rReq': {
-                'headers': {
-                    'Content-Type': {'type': 'string', 'value': 'application/json', 'isDefault': True},
-                    'Authorization': {'type': 'string', 'value': 'Bearer ${My_Token}'}
-                },
-                'body': {
-                    'name': {'type': 'string', 'value': ''},
-                    'email': {'type': 'string', 'value': ''},
-                    'phone': {'type': 'string', 'value': ''},
-                    'role': {'type': 'string', 'value': 'user', 'isDefault': True}
-                }
-            },
-            'rRsp': {
-                'code': {'type': 'number', 'value': 201, 'validation': 'equals', 'isDefault': True},
-                'data': {
-                    'id': {'type': 'string', 'value': '', 'validation': 'notEmpty', 'saveAs': 'My_NewUserId'},
-                    'createdAt': {'type': 'date', 'value': '', 'validation': 'noCare'}
-                }
-            }
-        },
-        '@\\rest\\UpdateUser.json': {
-            'rReq': {
-                'headers': {
-                    'Content-Type': {'type': 'string', 'value': 'application/json', 'isDefault': True},
-                    'Authorization': {'type': 'string', 'value': 'Bearer ${My_Token}'}
-                },
-                'body': {
-                    'userId': {'type': 'string', 'value': '${My_UserId}'},
-                    'name': {'type': 'string', 'value': ''},
-                    'email': {'type': 'string', 'value': ''},
-                    'status': {'type': 'number', 'value': 1, 'isDefault': True}
-                }
-            },
-            'rRsp': {
-                'code': {'type': 'number', 'value': 200, 'validation': 'equals', 'isDefault': True},
-                'data': {
-                    'updatedAt': {'type': 'date', 'value': '', 'validation': 'noCare'}
-                }
-            }
-        },
-        '@\\rest\\DeleteUser.json': {
-            'rReq': {
-                'headers': {
-                    'Content-Type': {'type': 'string', 'value': 'application/json', 'isDefault': True},
-                    'Authorization': {'type': 'string', 'value': 'Bearer ${My_Token}'}
-                },
-                'queryParams': {
-                    'userId': {'type': 'string', 'value': '${My_UserId}'}
-                }
-            },
-            'rRsp': {
-                'code': {'type': 'number', 'value': 204, 'validation': 'equals', 'isDefault': True}
-            }
-        },
-        '@\\rest\\QueryList.json': {
-            'rReq': {
-                'headers': {
-                    'Content-Type': {'type': 'string', 'value': 'application/json', 'isDefault': True},
-                    'Authorization': {'type': 'string', 'value': 'Bearer ${My_Token}'}
-                },
-                'queryParams': {
-                    'page': {'type': 'number', 'value': 1, 'isDefault': True},
-                    'pageSize': {'type': 'number', 'value': 20, 'isDefault': True},
-                    'keyword': {'type': 'string', 'value': ''}
-                }
-            },
-            'rRsp': {
-                'code': {'type': 'number', 'value': 200, 'validation': 'equals', 'isDefault': True},
-                'data': {
-                    'total': {'type': 'number', 'value': '', 'validation': 'noCare', 'saveAs': 'My_TotalCount'},
-                    'list': {'type': 'string', 'value': '', 'validation': 'notEmpty'}
-                }
-            }
-        },
-        '@\\rest\\BatchCreate.json': {
-            'rReq': {
-                'headers': {
-                    'Content-Type': {'type': 'string', 'value': 'application/json', 'isDefault': True},
-                    'Authorization': {'type': 'string', 'value': 'Bearer ${My_Token}'}
-                },
-                'body': {
-                    'items': {'type': 'string', 'value': ''},
-                    'batchSize': {'type': 'number', 'value': 100, 'isDefault': True}
-                }
-            },
-            'rRsp': {
-                'code': {'type': 'number', 'value': 201, 'validation': 'equals', 'isDefault': True},
-                'data': {
-                    'successCount': {'type': 'number', 'value': '', 'validation': 'noCare', 'saveAs': 'My_SuccessCount'},
-                    'failedCount': {'type': 'number', 'value': '', 'validation': 'noCare'}
-                }
-            }
-        }
-    }
-}
+# 模板特定参数 - 不同模板有不同的请求/响应结构，从模板目录按需解析，修改模板文件后无需重启
+TEMPLATE_DIR = os.environ.get('TEMPLATE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates'))
+TEMPLATE_REGISTRY = TemplateRegistry(TEMPLATE_DIR, rescan_interval=float(os.environ.get('TEMPLATE_RESCAN_INTERVAL', 2)))
 
 # 组件默认参数配置
 COMPONENT_DEFAULT_PARAMS = {
@@ -450,11 +173,12 @@ COMPONENT_DEFAULT_PARAMS = {
     }
 }
 
-# 2. 搜索历史用例的结果数据
+# 2. 历史用例案例库的初始数据（案例库为空时写入）
 MOCK_SEARCH_RESULTS = [
     {
         "id": "HTC001",
         "name": "月度账单生成及计费验证",
+        "library": "archived",
         "preconditions": [
             {
                 "id": "hp1",
@@ -544,6 +268,7 @@ MOCK_SEARCH_RESULTS = [
     {
         "id": "HTC003",
         "name": "欠费停机及复机流程测试",
+        "library": "archived",
         "preconditions": [
             {
                 "id": "hp3",
@@ -600,6 +325,25 @@ MOCK_SEARCH_RESULTS = [
     }
 ]
 
+# 语义搜索返回的最大用例数（分页在其范围内进行）
+SEMANTIC_TOP_K = 100
+
+# 历史用例搜索分页大小
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# 历史用例搜索结果缓存：容量和TTL(秒)可通过环境变量调整
+SEARCH_CACHE = LRUCache(
+    max_entries=int(os.environ.get('SEARCH_CACHE_SIZE', 1024)),
+    ttl=float(os.environ.get('SEARCH_CACHE_TTL', 300))
+)
+
+# 历史用例案例库：持久化在SQLite数据库中，首次启动时写入上面的示例用例；
+# CASE_CACHE_SIZE大于0时最近读取的用例以紧凑表示缓存在进程内（默认不缓存，每次从SQLite读取）
+CASE_DB_PATH = os.environ.get('CASE_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'cases.db'))
+CASE_STORE = CaseStore(CASE_DB_PATH, cache_size=int(os.environ.get('CASE_CACHE_SIZE', 0)))
+CASE_STORE.seed(MOCK_SEARCH_RESULTS)
+
 # 3. 预置步骤和预置组件数据
 PRESET_STEPS = [
     {
@@ -644,18 +388,290 @@ PRESET_COMPONENTS = [
     {"id": "comp_task", "type": "task", "name": "任务触发", "alias": "TaskTrigger", "icon": "play-circle", "description": "触发定时任务执行"}
 ]
 
+# 4. 组件参数配置架构（template-select字段的options由模板目录生成，见 _param_schemas）
+PARAM_SCHEMAS = {
+    'phone': [
+        {'name': 'callingId', 'label': '主叫号码', 'type': 'combo', 'required': True, 'options': ['Native_HD_C1A1_Onnet', 'Native_HD_C1A2_Onnet', 'Roaming_HD_V1_Onnet']},
+        {'name': 'calledId', 'label': '被叫号码', 'type': 'combo', 'required': True, 'options': ['Native_HD_C1A1_Onnet', 'Native_HD_C1A2_Onnet', 'Roaming_HD_V1_Onnet']},
+        {'name': 'callingVisit', 'label': '主叫区域', 'type': 'input', 'required': False},
+        {'name': 'calledVisit', 'label': '被叫区域', 'type': 'input', 'required': False},
+        {'name': 'forwardId', 'label': '转移号码', 'type': 'input', 'required': False},
+        {'name': 'forwardVisit', 'label': '转移区域', 'type': 'input', 'required': False}
+    ],
+    'variable': [
+        {'name': 'vars', 'label': '变量列表', 'type': 'variable-list', 'required': True}
+    ],
+    'database': [
+        {'name': 'dbUrl', 'label': '数据库URL', 'type': 'input', 'required': True, 'placeholder': '${Env.AdminDB}'},
+        {'name': 'operation', 'label': '操作类型', 'type': 'combo', 'required': True, 'options': ['Select', 'Insert', 'Update', 'Delete']},
+        {'name': 'tableName', 'label': '表名', 'type': 'input', 'required': False},
+        {'name': 'sql', 'label': 'SQL语句', 'type': 'textarea', 'required': False},
+        {'name': 'conditions', 'label': '查询条件', 'type': 'input', 'required': False, 'placeholder': 'FIELD|VALUE'},
+        {'name': 'vars', 'label': '变量', 'type': 'input', 'required': False},
+        {'name': 'timeout', 'label': '超时时间(秒)', 'type': 'input', 'required': False, 'placeholder': '30'}
+    ],
+    'api': [
+        {'name': 'rTpl', 'label': '请求模板', 'type': 'template-select', 'required': True},
+        {'name': 'url', 'label': '接口URL', 'type': 'input', 'required': True, 'placeholder': '${Env.BMPAPP101.SoapUrl}'},
+        {'name': 'tenantId', 'label': '租户ID', 'type': 'input', 'required': False, 'placeholder': '${My_tenantId}'},
+        {'name': 'rReq', 'label': '请求参数', 'type': 'json-tree', 'required': False, 'isRequest': True, 'defaultValue': {
+            'header': {
+                'version': {'type': 'string', 'value': '1.0', 'isDefault': True},
+                'bizCode': {'type': 'string', 'value': 'CREATE_SUBSCRIBER', 'isDefault': True},
+                'transId': {'type': 'string', 'value': '${G.uuid()}', 'isDefault': True},
+                'timestamp': {'type': 'string', 'value': '${G.now()}', 'isDefault': True}
+            },
+            'body': {
+                'subscriberInfo': {
+                    'msisdn': {'type': 'string', 'value': '${My_SubIdentity}'},
+                    'imsi': {'type': 'string', 'value': '${My_IMSI}'},
+                    'status': {'type': 'number', 'value': 1, 'isDefault': True},
+                    'createDate': {'type': 'date', 'value': '${G.today()}', 'isDefault': True}
+                },
+                'offeringInfo': {
+                    'primaryOfferingId': {'type': 'string', 'value': '${My_PrimaryOfferingID}'},
+                    'effectiveDate': {'type': 'date', 'value': '${G.today()}', 'isDefault': True}
+                }
+            }
+        }},
+        {'name': 'rRsp', 'label': '响应验证', 'type': 'json-tree', 'required': False, 'isResponse': True, 'defaultValue': {
+            'resultCode': {'type': 'string', 'value': '0', 'validation': 'equals', 'isDefault': True},
+            'resultMsg': {'type': 'string', 'value': 'Success', 'validation': 'noCare', 'isDefault': True},
+            'data': {
+                'subscriberId': {'type': 'string', 'value': '', 'validation': 'notEmpty', 'saveAs': ''},
+                'accountId': {'type': 'string', 'value': '', 'validation': 'notEmpty', 'saveAs': ''}
+            }
+        }}
+    ],
+    'task': [
+        {'name': 'planType', 'label': '计划类型', 'type': 'combo', 'required': True, 'options': ['triggeringTaskPlan', 'scheduledTaskPlan']},
+        {'name': 'planName', 'label': '任务名称', 'type': 'input', 'required': True},
+        {'name': 'status', 'label': '状态', 'type': 'combo', 'required': True, 'options': ['f', 's']},
+        {'name': 'tenantID', 'label': '租户ID', 'type': 'input', 'required': False, 'placeholder': '${My_tenantId}'},
+        {'name': 'timeout', 'label': '超时时间(秒)', 'type': 'input', 'required': False, 'placeholder': '120'}
+    ],
+    'delayTime': [
+        {'name': 'delaytimes', 'label': '延迟时间(秒)', 'type': 'input', 'required': True, 'placeholder': '60'},
+        {'name': 'comments', 'label': '备注', 'type': 'input', 'required': False}
+    ],
+    'moveForwardEfftime': [
+        {'name': 'number', 'label': '号码', 'type': 'input', 'required': True, 'placeholder': '${My_SubIdentity}'},
+        {'name': 'forwardhours', 'label': '前移小时数', 'type': 'input', 'required': True, 'placeholder': '24'},
+        {'name': 'env', 'label': '环境', 'type': 'input', 'required': False, 'placeholder': '${Env}'},
+        {'name': 'groupkey', 'label': '组键', 'type': 'input', 'required': False}
+    ],
+    'shell': [
+        {'name': 'url', 'label': 'SSH地址', 'type': 'input', 'required': True, 'placeholder': '${Env.BMPAPP101.sshurl}'},
+        {'name': 'cmd', 'label': 'Shell命令', 'type': 'textarea', 'required': True},
+        {'name': 'timeout', 'label': '超时时间(秒)', 'type': 'input', 'required': False, 'placeholder': '30'},
+        {'name': 'shellChecks', 'label': '校验值', 'type': 'input', 'required': False}
+    ],
+    'restful': [
+        {'name': 'rTpl', 'label': '请求模板', 'type': 'template-select', 'required': True},
+        {'name': 'url', 'label': '接口URL', 'type': 'input', 'required': True, 'placeholder': '${Env.RestApiUrl}/api/v1'},
+        {'name': 'method', 'label': '请求方法', 'type': 'combo', 'required': True, 'options': ['GET', 'POST', 'PUT', 'DELETE', 'PATCH']},
+        {'name': 'rReq', 'label': '请求参数', 'type': 'json-tree', 'required': False, 'isRequest': True, 'defaultValue': {
+            'headers': {
+                'Content-Type': {'type': 'string', 'value': 'application/json', 'isDefault': True},
+                'Authorization': {'type': 'string', 'value': 'Bearer ${My_Token}'}
+            },
+            'body': {
+                'userId': {'type': 'string', 'value': '${My_UserId}'},
+                'name': {'type': 'string', 'value': ''},
+                'email': {'type': 'string', 'value': ''},
+                'status': {'type': 'number', 'value': 1, 'isDefault': True}
+            }
+        }},
+        {'name': 'rRsp', 'label': '响应验证', 'type': 'json-tree', 'required': False, 'isResponse': True, 'defaultValue': {
+            'code': {'type': 'number', 'value': 200, 'validation': 'equals', 'isDefault': True},
+            'message': {'type': 'string', 'value': 'success', 'validation': 'noCare', 'isDefault': True},
+            'data': {
+                'id': {'type': 'string', 'value': '', 'validation': 'notEmpty', 'saveAs': ''},
+                'createdAt': {'type': 'date', 'value': '', 'validation': 'noCare'}
+            }
+        }}
+    ],
+    'comment': [
+        {'name': 'content', 'label': '注释内容', 'type': 'textarea', 'required': True}
+    ],
+    'saveUserInfo': [
+        {'name': 'rTpl', 'label': '模板路径', 'type': 'input', 'required': False, 'placeholder': '@\\saveuserinfo\\SaveUserInfo.xml'},
+        {'name': 'rReq', 'label': '保存配置', 'type': 'textarea', 'required': False},
+        {'name': 'comments', 'label': '备注', 'type': 'input', 'required': False}
+    ]
+}
+
+# 组件默认参数和参数配置架构中的默认值与模板参数有大量相同的子树，放入模板注册表的子树池中共享
+COMPONENT_DEFAULT_PARAMS = TEMPLATE_REGISTRY.pin(COMPONENT_DEFAULT_PARAMS)
+PARAM_SCHEMAS = TEMPLATE_REGISTRY.pin(PARAM_SCHEMAS)
+
+
+def _param_schemas():
+    """组件参数配置架构：为模板选择字段填入模板目录中该组件类型的全部模板"""
+    schemas = dict(PARAM_SCHEMAS)
+    for component_type in TEMPLATE_REGISTRY.dir_types.values():
+        if component_type in schemas:
+            schemas[component_type] = [
+                dict(field, options=TEMPLATE_REGISTRY.options(component_type)) if field['type'] == 'template-select' else field
+                for field in schemas[component_type]
+            ]
+    return schemas
+
+
+# 编译好的用例校验器及其对应的模板目录版本；模板增删改后重新编译（模板路径是api/restful组件rTpl的可选值）
+_validator_state = {"validator": None, "generation": None}
+_validator_lock = threading.Lock()
+
+
+def _case_validator():
+    generation = TEMPLATE_REGISTRY.generation
+    with _validator_lock:
+        if _validator_state['generation'] != generation:
+            templates = {
+                component_type: TEMPLATE_REGISTRY.templates(component_type)
+                for component_type in TEMPLATE_REGISTRY.dir_types.values()
+            }
+            _validator_state.update(validator=CaseValidator(PARAM_SCHEMAS, templates), generation=generation)
+        return _validator_state['validator']
+
+
+# 用例校验：请求体中单次最多的用例数，以及校验整个案例库时每批读取的用例数
+MAX_VALIDATE_CASES = 10000
+VALIDATE_BATCH_SIZE = 1000
+
+# 批量获取模板参数时单次请求的最大模板数
+MAX_TEMPLATE_BATCH = 500
+
+# 搜索联想：默认/最大返回条数
+DEFAULT_SUGGEST_LIMIT = 10
+MAX_SUGGEST_LIMIT = 20
+
+# 搜索联想结果缓存（联想索引重建时整体失效）
+SUGGEST_CACHE = LRUCache(max_entries=4096)
+
+# 当前的联想索引及其对应的案例库版本；案例库变化后在后台线程重建，重建期间继续使用旧索引
+_suggest_state = {"index": None, "version": None, "rebuilding": False}
+_suggest_lock = threading.Lock()
+
+
+def _build_suggest_index():
+    """从案例库和模板配置构建联想索引，候选项的使用频次为其在案例库中出现的次数"""
+    version = _suggest_version()
+    template_paths = TEMPLATE_REGISTRY.templates()
+    case_names, step_names, templates = CASE_STORE.name_usage(template_paths)
+    for step in PRESET_STEPS:
+        step_names[step['name']] += 0
+    for path in template_paths:
+        templates[path] += 0
+    index = SuggestIndex(
+        [(name, SUGGEST_CASE, count) for name, count in case_names.items()] +
+        [(name, SUGGEST_STEP, count) for name, count in step_names.items()] +
+        [(path, SUGGEST_TEMPLATE, count) for path, count in templates.items()]
+    )
+    with _suggest_lock:
+        _suggest_state.update(index=index, version=version, rebuilding=False)
+
+
+def _suggest_version():
+    """联想索引的数据版本：案例库版本和模板目录版本"""
+    return CASE_STORE.version, TEMPLATE_REGISTRY.generation
+
+
+def _suggest_index():
+    """返回可用的联想索引：首次调用时同步构建，之后案例库版本变化时触发后台重建"""
+    if _suggest_state['index'] is None:
+        _build_suggest_index()
+    elif _suggest_state['version'] != _suggest_version():
+        with _suggest_lock:
+            start = not _suggest_state['rebuilding']
+            _suggest_state['rebuilding'] = True
+        if start:
+            threading.Thread(target=_build_suggest_index, daemon=True).start()
+    return _suggest_state['index']
+
+
+# 近似重复用例检测索引：只对上次同步之后新增或修改的用例重新计算MinHash签名
+DUPLICATE_BATCH_SIZE = 1000
+DUPLICATE_INDEX = DuplicateIndex(threshold=float(os.environ.get('DUPLICATE_THRESHOLD', 0.8)))
+_duplicate_lock = threading.Lock()
+
+# 重复簇查询：默认/最大返回簇数
+DEFAULT_DUPLICATE_LIMIT = 50
+MAX_DUPLICATE_LIMIT = 1000
+
+
+def _duplicate_index():
+    """返回与案例库同步的重复检测索引（首次调用时为全部用例计算签名）"""
+    version = CASE_STORE.version
+    if DUPLICATE_INDEX.version != version:
+        with _duplicate_lock:
+            if DUPLICATE_INDEX.version != version:
+                batch = []
+                for item in CASE_STORE.iter_changed_cases(DUPLICATE_INDEX.version):
+                    batch.append((item[0], item[2], item[1]))
+                    if len(batch) >= DUPLICATE_BATCH_SIZE:
+                        DUPLICATE_INDEX.update_many(batch)
+                        batch = []
+                DUPLICATE_INDEX.update_many(batch)
+                DUPLICATE_INDEX.version = version
+    return DUPLICATE_INDEX
+
+
 # ============ API接口定义 ============
 
+# 部署期间不变的配置数据：启动时序列化并压缩一次，请求时直接返回（支持ETag条件请求）
+STATIC_CACHE_MAX_AGE = int(os.environ.get('STATIC_CACHE_MAX_AGE', 86400))
+CASE_LIBRARY_OPTIONS_PAYLOAD = StaticPayload({
+    "success": True,
+    "data": CASE_LIBRARY_OPTIONS
+}, max_age=STATIC_CACHE_MAX_AGE)
+PRESET_DATA_PAYLOAD = StaticPayload({
+    "success": True,
+    "data": {
+        "steps": PRESET_STEPS,
+        "components": PRESET_COMPONENTS,
+        "componentDefaultParams": COMPONENT_DEFAULT_PARAMS
+    }
+}, max_age=STATIC_CACHE_MAX_AGE)
+# 参数配置架构包含模板目录生成的选项，模板增删改后重新生成；与启动配置相同不设缓存时间，
+# 客户端每次带ETag重新验证，模板热更新后立即拿到新的选项
+PARAM_SCHEMAS_PAYLOAD = VersionedPayload(lambda generation: {
+    "success": True,
+    "data": _param_schemas()
+}, max_age=0)
+
+
 @app.route('/api/case-library-options', methods=['GET'])
 def get_case_library_options():
     """
     接口1: 获取历史用例案例库的下拉选择项
     返回格式: { "success": true, "data": [...] }
     """
-    return jsonify({
-        "success": True,
-        "data": CASE_LIBRARY_OPTIONS
-    })
+    return CASE_LIBRARY_OPTIONS_PAYLOAD.response()
+
+
+def _encode_cursor(position):
+    """将分页位置编码为不透明的游标字符串"""
+    raw = json.dumps(position, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _decode_cursor(cursor):
+    """解析分页游标，游标无效时返回None"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        position = json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+    return position if isinstance(position, dict) else None
+
+
+def _parse_page_size(value):
+    try:
+        page_size = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(page_size, MAX_PAGE_SIZE))
 
 
 @app.route('/api/search-history-cases', methods=['POST'])
@@ -665,32 +681,407 @@ def search_history_cases():
     请求参数: {
         "caseLibrary": "all" | "archived",  // 案例库类型
         "searchMethod": "keyword" | "semantic",  // 搜索方式
-        "searchText": "用户输入的搜索文本"
+        "searchText": "用户输入的搜索文本",
+        "view": "summary" | "full",  // 可选，默认summary只返回摘要，full返回完整用例
+        "pageSize": 20,  // 可选，每页条数，最大100
+        "cursor": "...",  // 可选，上一页返回的nextCursor
+        "collapseDuplicates": false  // 可选，为true时同一重复簇只返回排在最前的一个用例
     }
-    返回格式: { "success": true, "data": [...] }
+    返回格式: { "success": true, "data": [...], "pagination": { "pageSize": 20, "nextCursor": "...", "hasMore": true } }
+    caseLibrary为archived时只在已归档精品案例库中搜索
+    keyword方式匹配用例名称、步骤名称、组件名称和组件参数，按字段加权BM25得分降序返回并附带score；
+    semantic方式按相似度降序返回并附带score；未输入搜索文本时按入库顺序列出
+    完整用例通过 GET /api/history-cases/<id> 按需获取；折叠重复用例时每条结果附带duplicateCount（被折叠的重复用例数）
     """
-    data = request.get_json()
+    data = request.get_json() or {}
+    if not isinstance(data, dict):
+        return jsonify({"success": False, "message": "请求体必须是JSON对象"}), 400
     case_library = data.get('caseLibrary', 'all')
     search_method = data.get('searchMethod', 'keyword')
     search_text = data.get('searchText', '')
-    
-    # Mock逻辑：根据搜索文本简单过滤
-    results = MOCK_SEARCH_RESULTS
-    if search_text:
-        results = [
-            case for case in MOCK_SEARCH_RESULTS 
-            if search_text.lower() in case['name'].lower()
-        ]
-    
+    if not all(isinstance(value, str) for value in (case_library, search_method, search_text)):
+        return jsonify({"success": False, "message": "caseLibrary、searchMethod和searchText必须是字符串"}), 400
+    view = 'full' if data.get('view') == 'full' else 'summary'
+    page_size = _parse_page_size(data.get('pageSize', DEFAULT_PAGE_SIZE))
+    cursor = data.get('cursor') or None
+    collapse = data.get('collapseDuplicates') is True
+    semantic = bool(search_text) and search_method == 'semantic'
+
+    position = {}
+    if cursor:
+        position = _decode_cursor(cursor)
+        if position is None or not _valid_position(position, bool(search_text)):
+            return jsonify({"success": False, "message": "无效的分页游标"}), 400
+
+    # 重复搜索直接命中结果缓存；案例库版本变化（用例新增或修改）时缓存整体失效
+    SEARCH_CACHE.sync_version(CASE_STORE.version)
+    cache_key = (case_library, 'semantic' if semantic else 'keyword', search_text.lower(), view, page_size, cursor, collapse)
+    page = SEARCH_CACHE.get(cache_key)
+    if page is None:
+        page = _search_history_page(case_library, semantic, search_text, view, page_size, position, collapse)
+        SEARCH_CACHE.put(cache_key, page)
+    results, pagination = page
+
     return jsonify({
         "success": True,
         "data": results,
         "filters": {
             "caseLibrary": case_library,
             "searchMethod": search_method,
-            "searchText": search_text
+            "searchText": search_text,
+            "collapseDuplicates": collapse
+        },
+        "pagination": pagination
+    })
+
+
+def _valid_position(position, ranked):
+    collapsed = position.get('collapsed', [])
+    if not isinstance(collapsed, list) or not all(isinstance(seq, int) for seq in collapsed):
+        return False
+    if ranked:
+        return isinstance(position.get('score'), (int, float)) and isinstance(position.get('seq'), int)
+    return isinstance(position.get('seq', 0), int)
+
+
+def _search_hits(case_library, semantic, search_text, position, limit):
+    """按 (得分降序, seq升序) 或入库顺序取position之后的limit条命中，返回 [(seq, score), ...]"""
+    if semantic:
+        # 语义搜索：查询向量与全部用例向量做一次矩阵-向量乘法，取相似度top-k；
+        # 按(得分降序, seq升序)分页，游标记录上一页最后一条的得分和seq
+        hits = CASE_STORE.semantic_search(search_text, case_library, SEMANTIC_TOP_K)
+        if position:
+            last_score, last_seq = position['score'], position['seq']
+            hits = [
+                (seq, score) for seq, score in hits
+                if score < last_score or (score == last_score and seq > last_seq)
+            ]
+        return hits[:limit]
+    if search_text:
+        # 关键字搜索：在用例名称、步骤名称、组件名称和组件参数中做子串匹配（大小写不敏感），
+        # 通过倒排索引一次算出全部候选用例的字段加权BM25得分，只校验排在前面的候选
+        after = (position['score'], position['seq']) if position else None
+        return CASE_STORE.keyword_search(search_text, case_library, after=after, limit=limit)
+    # 未输入搜索文本时按入库顺序列出案例库
+    seqs = CASE_STORE.list_seqs(case_library, after_seq=position.get('seq', 0), limit=limit)
+    return [(seq, None) for seq in seqs]
+
+
+def _hit_position(hit):
+    seq, score = hit
+    return {"seq": seq} if score is None else {"score": score, "seq": seq}
+
+
+def _collapsed_hits(case_library, semantic, search_text, position, page_size):
+    """
+    折叠重复用例后取page_size+1条命中，返回 (命中列表, 已折叠的重复簇代表seq列表, {seq: 簇大小})
+    同一重复簇只保留排在最前的一个用例；已在之前页出现过的簇记录在游标中，后续页也不再出现
+    """
+    representatives = _duplicate_index().representatives()
+    collapsed = list(position.get('collapsed', []))
+    seen = set(collapsed)
+    hits, cluster_sizes = [], {}
+    while len(hits) <= page_size:
+        batch = _search_hits(case_library, semantic, search_text, position, page_size + 1)
+        for hit in batch:
+            cluster = representatives.get(hit[0])
+            if cluster is not None:
+                if cluster[0] in seen:
+                    continue
+                seen.add(cluster[0])
+                cluster_sizes[hit[0]] = cluster[1]
+            hits.append(hit)
+            if len(hits) > page_size:
+                break
+        if len(batch) <= page_size:
+            break
+        position = _hit_position(batch[-1])
+    collapsed.extend(representatives[seq][0] for seq, _ in hits[:page_size] if seq in cluster_sizes)
+    return hits, collapsed, cluster_sizes
+
+
+def _search_history_page(case_library, semantic, search_text, view, page_size, position, collapse=False):
+    """执行一次历史用例搜索，返回 (当前页结果, 分页信息)"""
+    # 多取一条用于判断是否还有下一页，游标记录当前页最后一条的位置
+    if collapse:
+        hits, collapsed, cluster_sizes = _collapsed_hits(case_library, semantic, search_text, position, page_size)
+    else:
+        hits = _search_hits(case_library, semantic, search_text, position, page_size + 1)
+    has_more = len(hits) > page_size
+    hits = hits[:page_size]
+    next_position = None
+    if has_more:
+        next_position = _hit_position(hits[-1])
+        if collapse:
+            next_position['collapsed'] = collapsed
+
+    seqs = [seq for seq, _ in hits]
+    if view == 'full':
+        records = CASE_STORE.get_cases(seqs)
+    else:
+        records = CASE_STORE.get_summaries(seqs)
+    results = []
+    for seq, score in hits:
+        if seq in records:
+            result = dict(records[seq], score=round(score, 4) if score is not None else None)
+            if collapse:
+                result['duplicateCount'] = cluster_sizes.get(seq, 1) - 1
+            results.append(result)
+
+    pagination = {
+        "pageSize": page_size,
+        "nextCursor": _encode_cursor(next_position) if next_position else None,
+        "hasMore": has_more
+    }
+    return results, pagination
+
+
+@app.route('/api/history-cases/<case_id>', methods=['GET'])
+def get_history_case(case_id):
+    """
+    接口2.1: 获取单个历史用例的完整内容
+    用户在搜索结果中选中或查看用例时调用
+    返回格式: { "success": true, "data": {...}, "version": 3 }，ETag响应头同为用例版本，修改用例时作为If-Match
+    """
+    found = CASE_STORE.get_versioned_case(case_id)
+    if found is None:
+        return jsonify({"success": False, "message": "用例不存在"}), 404
+    case, version = found
+    response = jsonify({
+        "success": True,
+        "data": case,
+        "version": version
+    })
+    response.set_etag(str(version))
+    return response
+
+
+# 单次PATCH请求最多的操作数
+MAX_PATCH_OPERATIONS = 1000
+
+
+def _if_match_versions():
+    """If-Match请求头中的用例版本集合；为 * 时返回None（不检查版本），缺少或无法解析时返回空集合"""
+    if_match = request.if_match
+    if if_match.star_tag:
+        return None
+    return {int(tag) for tag in if_match.as_set() if tag.isdigit()}
+
+
+@app.route('/api/history-cases/<case_id>', methods=['PATCH'])
+def patch_history_case(case_id):
+    """
+    接口2.7: 按JSON Patch（RFC 6902）增量修改历史用例
+    请求头: If-Match: "3"（GET /api/history-cases/<id> 返回的ETag/version），为 * 时不检查版本
+    请求体: [{ "op": "replace", "path": "/steps/0/components/1/params/timeout", "value": "60" }, ...]
+    返回格式: { "success": true, "data": { "id", "version": 4, "validation": { "components": 1, "errors": [...], "warnings": [...] } } }
+    补丁在事务内对用例原地应用，用例在读取后被其他请求修改过时返回412（带当前version）；
+    只有检索字段/语义字段变化时才更新该用例的排序索引/向量，validation只校验补丁修改的组件
+    """
+    versions = _if_match_versions()
+    if versions is not None and not versions:
+        return jsonify({"success": False, "message": "缺少If-Match请求头（用例版本）"}), 428
+    operations = request.get_json(force=True, silent=True)
+    try:
+        parse_patch(operations)
+    except InvalidPatchError as error:
+        return jsonify({"success": False, "message": str(error)}), 400
+    if len(operations) > MAX_PATCH_OPERATIONS:
+        return jsonify({"success": False, "message": "单次最多%d个操作" % MAX_PATCH_OPERATIONS}), 400
+
+    touched = []
+
+    def patch(case):
+        case, paths = apply_patch(case, operations)
+        touched.extend(paths)
+        return case
+
+    try:
+        result = CASE_STORE.patch_case(case_id, patch, versions)
+    except VersionConflictError as error:
+        response = jsonify({"success": False, "message": str(error), "version": error.current_version})
+        response.set_etag(str(error.current_version))
+        return response, 412
+    except ValueError as error:
+        return jsonify({"success": False, "message": str(error)}), 422
+    if result is None:
+        return jsonify({"success": False, "message": "用例不存在"}), 404
+    case, version = result
+    response = jsonify({
+        "success": True,
+        "data": {
+            "id": case_id,
+            "version": version,
+            "validation": _case_validator().validate_paths(case, touched)
         }
     })
+    response.set_etag(str(version))
+    return response
+
+
+@app.route('/api/history-cases/import', methods=['POST'])
+def import_history_cases():
+    """
+    接口2.2: 批量导入历史用例
+    请求体: NDJSON流，每行一个完整用例JSON（Content-Type: application/x-ndjson）
+    查询参数: onConflict=update（默认，覆盖同ID用例）| skip（跳过同ID用例）
+    返回格式: {
+        "success": true,
+        "data": { "imported": 0, "inserted": 0, "updated": 0, "skipped": 0, "failed": 0, "errors": [...] }
+    }
+    请求体逐行读取并分批写入，不会整体缓存在内存中
+    """
+    skip_existing = request.args.get('onConflict', 'update') == 'skip'
+    summary = import_ndjson(CASE_STORE, request.stream, skip_existing=skip_existing)
+    return jsonify({
+        "success": True,
+        "data": summary
+    })
+
+
+# 用例导出：模板的渲染计划编译一次后缓存，模板目录变化后重新编译；REST组件的请求参数以JSON输出
+CASE_EXPORTER = CaseExporter(
+    TEMPLATE_REGISTRY.params,
+    aliases={component['type']: component['alias'] for component in PRESET_COMPONENTS},
+    request_formats={'restful': 'json'}
+)
+
+# 导出时每批从案例库读取的用例数
+EXPORT_BATCH_SIZE = 500
+
+
+def _iter_cases_by_seqs(seqs):
+    """按seq分批读取用例（生成器），每次只持有一批"""
+    for start in range(0, len(seqs), EXPORT_BATCH_SIZE):
+        chunk = seqs[start:start + EXPORT_BATCH_SIZE]
+        cases = CASE_STORE.get_cases(chunk, cache=False)
+        for seq in chunk:
+            if seq in cases:
+                yield cases[seq]
+
+
+def _zip_response(chunks, filename):
+    return Response(
+        stream_with_context(chunks),
+        mimetype='application/zip',
+        headers={'Content-Disposition': 'attachment; filename="%s"' % filename, 'X-Accel-Buffering': 'no'}
+    )
+
+
+@app.route('/api/history-cases/<case_id>/export', methods=['GET'])
+def export_history_case(case_id):
+    """
+    接口2.4: 导出单个历史用例为可执行的XML文件（zip压缩包）
+    返回: application/zip，包含 cases/<用例ID>.xml 和 manifest.json
+    """
+    case = CASE_STORE.get_case(case_id)
+    if case is None:
+        return jsonify({"success": False, "message": "用例不存在"}), 404
+    CASE_EXPORTER.sync_version(TEMPLATE_REGISTRY.generation)
+    return _zip_response(iter_export_zip(CASE_EXPORTER, [case]), '%s.zip' % case_id)
+
+
+@app.route('/api/history-cases/export', methods=['POST'])
+def export_history_cases():
+    """
+    接口2.5: 批量导出历史用例为可执行的XML文件（流式zip）
+    请求体: {
+        "caseLibrary": "all" | "archived",   // 默认all
+        "searchText": "套餐",                 // 可选，只导出关键字匹配的用例
+        "ids": ["HTC001", ...]               // 可选，只导出指定的用例（此时忽略上面两项）
+    }
+    返回: application/zip，每个用例一个 cases/<用例ID>.xml，末尾为 manifest.json；
+    用例分批读取、逐个渲染并立即输出压缩后的数据，导出整个案例库也不会在内存中保存整个压缩包
+    """
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"success": False, "message": "请求体必须是JSON对象"}), 400
+    case_library = data.get('caseLibrary') or 'all'
+    search_text = data.get('searchText') or ''
+    ids = data.get('ids')
+    if not isinstance(case_library, str) or not isinstance(search_text, str):
+        return jsonify({"success": False, "message": "caseLibrary和searchText必须是字符串"}), 400
+    search_text = search_text.strip()
+    if ids is not None and (not isinstance(ids, list) or not all(isinstance(case_id, str) for case_id in ids)):
+        return jsonify({"success": False, "message": "ids必须是字符串数组"}), 400
+
+    if ids is not None:
+        cases = (case for case in map(CASE_STORE.get_case, ids) if case is not None)
+    elif search_text:
+        cases = _iter_cases_by_seqs(sorted(seq for seq, _ in CASE_STORE.keyword_search(search_text, case_library)))
+    else:
+        cases = _iter_cases_by_seqs(CASE_STORE.list_seqs(case_library))
+    CASE_EXPORTER.sync_version(TEMPLATE_REGISTRY.generation)
+    return _zip_response(iter_export_zip(CASE_EXPORTER, cases), 'cases-%s.zip' % case_library)
+
+
+@app.route('/api/duplicate-cases', methods=['GET'])
+def get_duplicate_cases():
+    """
+    接口2.6: 查找近似重复的历史用例
+    查询参数: caseLibrary=all|archived（默认all），threshold=相似度阈值（0~1，默认0.8），limit=返回簇数（默认50，最大1000）
+    返回格式: {
+        "success": true,
+        "data": [{ "representative": "HTC001", "size": 2, "cases": [{ "id", "name", "library", ..., "similarity": 1.0 }] }],
+        "summary": { "indexed": 3, "clusters": 1, "duplicateCases": 1 }
+    }
+    用例按组件序列（组件类型、请求模板和关键参数）的MinHash签名分桶，只确认同桶的候选对，不做两两比较；
+    每个簇中最早入库的用例为代表，similarity为与代表用例的估计相似度，簇按大小降序
+    """
+    case_library = request.args.get('caseLibrary', 'all')
+    try:
+        threshold = float(request.args.get('threshold', DUPLICATE_INDEX.threshold))
+        limit = max(1, min(int(request.args.get('limit', DEFAULT_DUPLICATE_LIMIT)), MAX_DUPLICATE_LIMIT))
+    except ValueError:
+        return jsonify({"success": False, "message": "threshold和limit必须是数字"}), 400
+    if not 0 < threshold <= 1:
+        return jsonify({"success": False, "message": "threshold必须在0到1之间"}), 400
+
+    index = _duplicate_index()
+    clusters = index.clusters(threshold, None if case_library == 'all' else case_library)
+    page = clusters[:limit]
+    summaries = CASE_STORE.get_summaries([seq for cluster in page for seq, _ in cluster])
+    data = []
+    for cluster in page:
+        cases = [dict(summaries[seq], similarity=similarity) for seq, similarity in cluster if seq in summaries]
+        if cases:
+            data.append({"representative": cases[0]['id'], "size": len(cluster), "cases": cases})
+    return jsonify({
+        "success": True,
+        "data": data,
+        "summary": {
+            "indexed": len(index),
+            "clusters": len(clusters),
+            "duplicateCases": sum(len(cluster) - 1 for cluster in clusters)
+        }
+    })
+
+
+@app.route('/api/search-suggest', methods=['GET'])
+def search_suggest():
+    """
+    接口2.3: 搜索框输入联想
+    查询参数: q=已输入的文本（前缀），limit=返回条数（默认10，最大20）
+    返回格式: { "success": true, "data": [{ "text": "月度账单生成及计费验证", "type": "case" | "step" | "template", "count": 1 }] }
+    匹配用例名称、步骤名称和模板名称的开头、名称中各分段的开头以及中文名称的拼音首字母，按使用频次降序
+    """
+    prefix = request.args.get('q', '').strip().lower()
+    try:
+        limit = max(1, min(int(request.args.get('limit', DEFAULT_SUGGEST_LIMIT)), MAX_SUGGEST_LIMIT))
+    except ValueError:
+        limit = DEFAULT_SUGGEST_LIMIT
+
+    index = _suggest_index()
+    SUGGEST_CACHE.sync_version(id(index))
+    cache_key = (prefix, limit)
+    suggestions = SUGGEST_CACHE.get(cache_key)
+    if suggestions is None:
+        suggestions = index.suggest(prefix, limit)
+        SUGGEST_CACHE.put(cache_key, suggestions)
+    return jsonify({
+        "success": True,
+        "data": suggestions
+    })
 
 
 @app.route('/api/preset-data', methods=['GET'])
@@ -705,14 +1096,7 @@ def get_preset_data():
         }
     }
     """
-    return jsonify({
-        "success": True,
-        "data": {
-            "steps": PRESET_STEPS,
-            "components": PRESET_COMPONENTS,
-            "componentDefaultParams": COMPONENT_DEFAULT_PARAMS
-        }
-    })
+    return PRESET_DATA_PAYLOAD.response()
 
 
 @app.route('/api/param-schemas', methods=['GET'])
@@ -728,138 +1112,7 @@ def get_param_schemas():
         }
     }
     """
-    schemas = {
-        'phone': [
-            {'name': 'callingId', 'label': '主叫号码', 'type': 'combo', 'required': True, 'options': ['Native_HD_C1A1_Onnet', 'Native_HD_C1A2_Onnet', 'Roaming_HD_V1_Onnet']},
-            {'name': 'calledId', 'label': '被叫号码', 'type': 'combo', 'required': True, 'options': ['Native_HD_C1A1_Onnet', 'Native_HD_C1A2_Onnet', 'Roaming_HD_V1_Onnet']},
-            {'name': 'callingVisit', 'label': '主叫区域', 'type': 'input', 'required': False},
-            {'name': 'calledVisit', 'label': '被叫区域', 'type': 'input', 'required': False},
-            {'name': 'forwardId', 'label': '转移号码', 'type': 'input', 'required': False},
-            {'name': 'forwardVisit', 'label': '转移区域', 'type': 'input', 'required': False}
-        ],
-        'variable': [
-            {'name': 'vars', 'label': '变量列表', 'type': 'variable-list', 'required': True}
-        ],
-        'database': [
-            {'name': 'dbUrl', 'label': '数据库URL', 'type': 'input', 'required': True, 'placeholder': '${Env.AdminDB}'},
-            {'name': 'operation', 'label': '操作类型', 'type': 'combo', 'required': True, 'options': ['Select', 'Insert', 'Update', 'Delete']},
-            {'name': 'tableName', 'label': '表名', 'type': 'input', 'required': False},
-            {'name': 'sql', 'label': 'SQL语句', 'type': 'textarea', 'required': False},
-            {'name': 'conditions', 'label': '查询条件', 'type': 'input', 'required': False, 'placeholder': 'FIELD|VALUE'},
-            {'name': 'vars', 'label': '变量', 'type': 'input', 'required': False},
-            {'name': 'timeout', 'label': '超时时间(秒)', 'type': 'input', 'required': False, 'placeholder': '30'}
-        ],
-        'api': [
-            {'name': 'rTpl', 'label': '请求模板', 'type': 'template-select', 'required': True, 'options': [
-                {'value': '@\\soap\\CreateSubscriber.xml', 'label': '创建用户'},
-                {'value': '@\\soap\\QuerySubscriber.xml', 'label': '查询用户'},
-                {'value': '@\\soap\\ModifySubscriber.xml', 'label': '修改用户'},
-                {'value': '@\\soap\\DeleteSubscriber.xml', 'label': '删除用户'},
-                {'value': '@\\soap\\CreateAccount.xml', 'label': '创建账户'},
-                {'value': '@\\soap\\Payment.xml', 'label': '缴费'},
-                {'value': '@\\soap\\Adjustment.xml', 'label': '调账'},
-                {'value': '@\\soap\\ChangeOffering.xml', 'label': '变更套餐'}
-            ]},
-            {'name': 'url', 'label': '接口URL', 'type': 'input', 'required': True, 'placeholder': '${Env.BMPAPP101.SoapUrl}'},
-            {'name': 'tenantId', 'label': '租户ID', 'type': 'input', 'required': False, 'placeholder': '${My_tenantId}'},
-            {'name': 'rReq', 'label': '请求参数', 'type': 'json-tree', 'required': False, 'isRequest': True, 'defaultValue': {
-                'header': {
-                    'version': {'type': 'string', 'value': '1.0', 'isDefault': True},
-                    'bizCode': {'type': 'string', 'value': 'CREATE_SUBSCRIBER', 'isDefault': True},
-                    'transId': {'type': 'string', 'value': '${G.uuid()}', 'isDefault': True},
-                    'timestamp': {'type': 'string', 'value': '${G.now()}', 'isDefault': True}
-                },
-                'body': {
-                    'subscriberInfo': {
-                        'msisdn': {'type': 'string', 'value': '${My_SubIdentity}'},
-                        'imsi': {'type': 'string', 'value': '${My_IMSI}'},
-                        'status': {'type': 'number', 'value': 1, 'isDefault': True},
-                        'createDate': {'type': 'date', 'value': '${G.today()}', 'isDefault': True}
-                    },
-                    'offeringInfo': {
-                        'primaryOfferingId': {'type': 'string', 'value': '${My_PrimaryOfferingID}'},
-                        'effectiveDate': {'type': 'date', 'value': '${G.today()}', 'isDefault': True}
-                    }
-                }
-            }},
-            {'name': 'rRsp', 'label': '响应验证', 'type': 'json-tree', 'required': False, 'isResponse': True, 'defaultValue': {
-                'resultCode': {'type': 'string', 'value': '0', 'validation': 'equals', 'isDefault': True},
-                'resultMsg': {'type': 'string', 'value': 'Success', 'validation': 'noCare', 'isDefault': True},
-                'data': {
-                    'subscriberId': {'type': 'string', 'value': '', 'validation': 'notEmpty', 'saveAs': ''},
-                    'accountId': {'type': 'string', 'value': '', 'validation': 'notEmpty', 'saveAs': ''}
-                }
-            }}
-        ],
-        'task': [
-            {'name': 'planType', 'label': '计划类型', 'type': 'combo', 'required': True, 'options': ['triggeringTaskPlan', 'scheduledTaskPlan']},
-            {'name': 'planName', 'label': '任务名称', 'type': 'input', 'required': True},
-            {'name': 'status', 'label': '状态', 'type': 'combo', 'required': True, 'options': ['f', 's']},
-            {'name': 'tenantID', 'label': '租户ID', 'type': 'input', 'required': False, 'placeholder': '${My_tenantId}'},
-            {'name': 'timeout', 'label': '超时时间(秒)', 'type': 'input', 'required': False, 'placeholder': '120'}
-        ],
-        'delayTime': [
-            {'name': 'delaytimes', 'label': '延迟时间(秒)', 'type': 'input', 'required': True, 'placeholder': '60'},
-            {'name': 'comments', 'label': '备注', 'type': 'input', 'required': False}
-        ],
-        'moveForwardEfftime': [
-            {'name': 'number', 'label': '号码', 'type': 'input', 'required': True, 'placeholder': '${My_SubIdentity}'},
-            {'name': 'forwardhours', 'label': '前移小时数', 'type': 'input', 'required': True, 'placeholder': '24'},
-            {'name': 'env', 'label': '环境', 'type': 'input', 'required': False, 'placeholder': '${Env}'},
-            {'name': 'groupkey', 'label': '组键', 'type': 'input', 'required': False}
-        ],
-        'shell': [
-            {'name': 'url', 'label': 'SSH地址', 'type': 'input', 'required': True, 'placeholder': '${Env.BMPAPP101.sshurl}'},
-            {'name': 'cmd', 'label': 'Shell命令', 'type': 'textarea', 'required': True},
-            {'name': 'timeout', 'label': '超时时间(秒)', 'type': 'input', 'required': False, 'placeholder': '30'},
-            {'name': 'shellChecks', 'label': '校验值', 'type': 'input', 'required': False}
-        ],
-        'restful': [
-            {'name': 'rTpl', 'label': '请求模板', 'type': 'template-select', 'required': True, 'options': [
-                {'value': '@\\rest\\GetUser.json', 'label': 'GET 获取用户'},
-                {'value': '@\\rest\\CreateUser.json', 'label': 'POST 创建用户'},
-                {'value': '@\\rest\\UpdateUser.json', 'label': 'PUT 更新用户'},
-                {'value': '@\\rest\\DeleteUser.json', 'label': 'DELETE 删除用户'},
-                {'value': '@\\rest\\QueryList.json', 'label': 'GET 查询列表'},
-                {'value': '@\\rest\\BatchCreate.json', 'label': 'POST 批量创建'}
-            ]},
-            {'name': 'url', 'label': '接口URL', 'type': 'input', 'required': True, 'placeholder': '${Env.RestApiUrl}/api/v1'},
-            {'name': 'method', 'label': '请求方法', 'type': 'combo', 'required': True, 'options': ['GET', 'POST', 'PUT', 'DELETE', 'PATCH']},
-            {'name': 'rReq', 'label': '请求参数', 'type': 'json-tree', 'required': False, 'isRequest': True, 'defaultValue': {
-                'headers': {
-                    'Content-Type': {'type': 'string', 'value': 'application/json', 'isDefault': True},
-                    'Authorization': {'type': 'string', 'value': 'Bearer ${My_Token}'}
-                },
-                'body': {
-                    'userId': {'type': 'string', 'value': '${My_UserId}'},
-                    'name': {'type': 'string', 'value': ''},
-                    'email': {'type': 'string', 'value': ''},
-                    'status': {'type': 'number', 'value': 1, 'isDefault': True}
-                }
-            }},
-            {'name': 'rRsp', 'label': '响应验证', 'type': 'json-tree', 'required': False, 'isResponse': True, 'defaultValue': {
-                'code': {'type': 'number', 'value': 200, 'validation': 'equals', 'isDefault': True},
-                'message': {'type': 'string', 'value': 'success', 'validation': 'noCare', 'isDefault': True},
-                'data': {
-                    'id': {'type': 'string', 'value': '', 'validation': 'notEmpty', 'saveAs': ''},
-                    'createdAt': {'type': 'date', 'value': '', 'validation': 'noCare'}
-                }
-            }}
-        ],
-        'comment': [
-            {'name': 'content', 'label': '注释内容', 'type': 'textarea', 'required': True}
-        ],
-        'saveUserInfo': [
-            {'name': 'rTpl', 'label': '模板路径', 'type': 'input', 'required': False, 'placeholder': '@\\saveuserinfo\\SaveUserInfo.xml'},
-            {'name': 'rReq', 'label': '保存配置', 'type': 'textarea', 'required': False},
-            {'name': 'comments', 'label': '备注', 'type': 'input', 'required': False}
-        ]
-    }
-    
-    return jsonify({
-        "success": True,
-        "data": schemas
-    })
+    return PARAM_SCHEMAS_PAYLOAD.get(TEMPLATE_REGISTRY.generation).response()
 
 
 @app.route('/api/template-params/<component_type>/<path:template_name>', methods=['GET'])
@@ -868,10 +1121,7 @@ def get_template_params(component_type, template_name):
     接口5: 获取模板特定参数
     根据组件类型和模板名称返回对应的请求/响应参数结构
     """
-    # 将URL中的斜杠转换为反斜杠以匹配配置中的格式
-    template_key = '@\\' + template_name.replace('/', '\\')
-    
-    params = TEMPLATE_SPECIFIC_PARAMS.get(component_type, {}).get(template_key, None)
+    params = TEMPLATE_REGISTRY.params(component_type, template_name)
     
     if not params:
         return jsonify({
@@ -886,6 +1136,377 @@ def get_template_params(component_type, template_name):
     })
 
 
+@app.route('/api/template-params/batch', methods=['POST'])
+def get_template_params_batch():
+    """
+    接口5.1: 批量获取模板特定参数
+    请求体: { "templates": [{ "componentType": "api", "rTpl": "@\\soap\\CreateSubscriber.xml" }, ...], "mode": "delta" }
+    返回格式: { "success": true, "data": [{ "componentType": "api", "rTpl": "...", "params": {...} | null }, ...] }
+    结果与请求顺序一一对应，模板路径可使用正斜杠或反斜杠、带或不带@前缀；没有特定参数的模板params为null
+    mode为delta时返回 { "bases": { 组件类型: 基础树 }, "items": [{ "componentType", "rTpl", "delta": 差量 | null }] }，
+    每种组件类型的基础树只返回一次，模板参数 = 对基础树应用差量（JSON Merge Patch）
+    """
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"success": False, "message": "请求体必须是JSON对象"}), 400
+    templates = data.get('templates')
+    delta = data.get('mode') == 'delta'
+    if not isinstance(templates, list):
+        return jsonify({
+            "success": False,
+            "message": "templates必须是数组"
+        }), 400
+    if len(templates) > MAX_TEMPLATE_BATCH:
+        return jsonify({
+            "success": False,
+            "message": "单次最多查询%d个模板" % MAX_TEMPLATE_BATCH
+        }), 400
+
+    results = []
+    for item in templates:
+        if not isinstance(item, dict) or not isinstance(item.get('componentType'), str) or not isinstance(item.get('rTpl'), str):
+            return jsonify({
+                "success": False,
+                "message": "每一项必须包含字符串类型的componentType和rTpl"
+            }), 400
+        component_type, template = item['componentType'], item['rTpl']
+        if delta:
+            results.append({
+                "componentType": component_type,
+                "rTpl": template,
+                "delta": TEMPLATE_REGISTRY.params_delta(component_type, template)
+            })
+        else:
+            results.append({
+                "componentType": component_type,
+                "rTpl": template,
+                "params": TEMPLATE_REGISTRY.params(component_type, template)
+            })
+
+    if delta:
+        deltas = TEMPLATE_REGISTRY.delta_params()
+        bases = {
+            item['componentType']: deltas[item['componentType']]['base']
+            for item in results if item['delta'] is not None
+        }
+        return jsonify({
+            "success": True,
+            "data": {"bases": bases, "items": results}
+        })
+    return jsonify({
+        "success": True,
+        "data": results
+    })
+
+
+def _library_cases(case_library):
+    """按入库顺序分批读取案例库中的全部用例（生成器），每次只持有一批"""
+    after_seq = 0
+    while True:
+        seqs = CASE_STORE.list_seqs(case_library, after_seq=after_seq, limit=VALIDATE_BATCH_SIZE)
+        if not seqs:
+            return
+        cases = CASE_STORE.get_cases(seqs, cache=False)
+        for seq in seqs:
+            if seq in cases:
+                yield cases[seq]
+        after_seq = seqs[-1]
+
+
+@app.route('/api/validate-cases', methods=['POST'])
+def validate_cases():
+    """
+    接口4.1: 按参数配置架构批量校验用例
+    请求体: { "cases": [...] }（单次最多10000个）或 { "caseLibrary": "all" | "archived" }（校验整个案例库）
+    返回格式: {
+        "success": true,
+        "data": {
+            "total": 100, "valid": 98, "invalid": 2, "withWarnings": 5,
+            "results": [{
+                "id": "HTC001", "valid": false,
+                "errors": [{ "section": "steps", "blockIndex": 0, "componentIndex": 1, "componentId": "c2",
+                             "componentType": "api", "field": "rTpl", "code": "template", "message": "..." }],
+                "warnings": [...]
+            }]
+        }
+    }
+    results只包含有错误或警告的用例。错误代码: required（必填为空）、option（不在下拉选项中）、template（模板不存在）、
+    type（取值类型错误）、structure（用例结构错误）；警告代码: noSchema（组件类型没有参数配置架构）、unknownField（架构未定义的参数）
+    """
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"success": False, "message": "请求体必须是JSON对象"}), 400
+    cases = data.get('cases')
+    if cases is None and isinstance(data.get('caseLibrary'), str):
+        cases = _library_cases(data['caseLibrary'])
+    elif not isinstance(cases, list):
+        return jsonify({
+            "success": False,
+            "message": "cases必须是数组，或通过caseLibrary指定案例库"
+        }), 400
+    elif len(cases) > MAX_VALIDATE_CASES:
+        return jsonify({
+            "success": False,
+            "message": "单次最多校验%d个用例" % MAX_VALIDATE_CASES
+        }), 400
+
+    validator = _case_validator()
+    summary = {"total": 0, "valid": 0, "invalid": 0, "withWarnings": 0}
+    results = []
+    for case in cases:
+        result = validator.validate_case(case)
+        summary['total'] += 1
+        summary['valid' if result['valid'] else 'invalid'] += 1
+        if result['warnings']:
+            summary['withWarnings'] += 1
+        if result['errors'] or result['warnings']:
+            results.append(result)
+    return jsonify({
+        "success": True,
+        "data": dict(summary, results=results)
+    })
+
+
+# 6. 用例生成的Mock结果（实际生产中应该调用AI服务生成）
+MOCK_GENERATED_CASES = [
+    {
+        "id": "TC001",
+        "name": "用户登录功能测试",
+        "preconditions": [
+            { 
+                "id": "p1", 
+                "name": "用户已注册", 
+                "expanded": True, 
+                "components": [
+                    {"id": "pc1", "type": "api", "name": "接口调用 - 检查用户", "params": {"method": "GET", "url": "/api/users/check"}}
+                ] 
+            }
+        ],
+        "steps": [
+            { 
+                "id": "s1", 
+                "name": "打开登录页", 
+                "expanded": True, 
+                "components": [
+                    {"id": "c1", "type": "api", "name": "接口调用 - 获取登录页", "params": {"method": "GET", "url": "/login"}}
+                ] 
+            },
+            { 
+                "id": "s2", 
+                "name": "输入凭证", 
+                "expanded": True, 
+                "components": [
+                    {"id": "c2", "type": "variable", "name": "设置变量 - 登录参数", "params": {"vars": "My_Username=testuser;My_Password=pass123"}},
+                    {"id": "c3", "type": "api", "name": "SOAP接口调用 - 登录验证", "params": {"rTpl": "@\\soap\\CreateSubscriber.xml", "url": "${Env.BMPAPP101.SoapUrl}", "tenantId": "${My_tenantId}"}}
+                ] 
+            }
+        ],
+        "expectedResults": [
+            { 
+                "id": "e1", 
+                "name": "登录成功", 
+                "expanded": True, 
+                "components": [
+                    {"id": "ec1", "type": "database", "name": "数据库查询 - 验证登录状态", "params": {"dbUrl": "${Env.AdminDB}", "operation": "Select", "tableName": "USER_SESSION", "conditions": "USERNAME|${My_Username}", "timeout": "30"}}
+                ] 
+            }
+        ]
+    }
+]
+
+
+def _parse_generation_request(data):
+    """校验并规范化用例生成请求，返回 (请求, 错误信息)"""
+    if not isinstance(data, dict):
+        return None, '请求体必须是JSON对象'
+    template_file = data.get('templateFile', '')
+    api_version = data.get('apiVersion', '')
+    history_cases = data.get('historyCases') or []
+    if not isinstance(template_file, str) or not isinstance(api_version, str):
+        return None, 'templateFile和apiVersion必须是字符串'
+    if not isinstance(history_cases, list):
+        return None, 'historyCases必须是数组'
+    generation_request = {"templateFile": template_file, "apiVersion": api_version, "historyCases": history_cases}
+    if data.get('force') is True:
+        generation_request['force'] = True
+    return generation_request, None
+
+
+# 单个生成请求的超时(秒)，同时用于后台生成任务
+GENERATION_TIMEOUT = float(os.environ.get('GENERATION_TIMEOUT', DEFAULT_TIMEOUT))
+
+# 用例生成后端：配置了模型服务地址时通过HTTP调用（并发请求合并为批量调用、连接池复用），否则使用Mock数据
+GENERATION_BACKEND_URL = os.environ.get('GENERATION_BACKEND_URL')
+if GENERATION_BACKEND_URL:
+    GENERATION_BACKEND = HttpGenerationBackend(
+        GENERATION_BACKEND_URL,
+        max_batch=int(os.environ.get('GENERATION_MAX_BATCH', DEFAULT_MAX_BATCH)),
+        batch_window=float(os.environ.get('GENERATION_BATCH_WINDOW', DEFAULT_BATCH_WINDOW)),
+        pool_size=int(os.environ.get('GENERATION_POOL_SIZE', DEFAULT_POOL_SIZE)),
+        timeout=GENERATION_TIMEOUT
+    )
+else:
+    GENERATION_BACKEND = MockGenerationBackend(MOCK_GENERATED_CASES)
+
+
+# 生成结果缓存：相同输入的重复生成直接返回磁盘上的结果，总大小超过上限(MB)时淘汰最久未用的结果
+GENERATION_CACHE = DiskLRUCache(
+    os.environ.get('GENERATION_CACHE_DIR', os.path.join(os.path.dirname(CASE_DB_PATH), 'generation_cache')),
+    max_bytes=int(float(os.environ.get('GENERATION_CACHE_MAX_MB', 256)) * 1024 * 1024)
+)
+
+# 生成结果缓存状态
+CACHE_HIT = 'hit'
+CACHE_MISS = 'miss'
+CACHE_BYPASS = 'bypass'
+
+
+def _generation_cache_key(generation_request):
+    """
+    生成结果的缓存键：规范化请求体（模板路径写法统一、去掉首尾空白，与键顺序无关）的内容哈希，
+    包含生成后端地址，切换模型服务后不会命中旧结果
+    """
+    return content_key({
+        "backend": GENERATION_BACKEND_URL or 'mock',
+        "templateFile": normalize_template_path(generation_request['templateFile']),
+        "apiVersion": generation_request['apiVersion'].strip(),
+        "historyCases": generation_request['historyCases']
+    })
+
+
+def _iter_generated_cases(generation_request, context=None, meta=None, stream=False):
+    """
+    逐个产出生成的用例（生成器）
+    stream为True且未命中缓存时从生成后端的 iter_generate 逐个接收用例，收到一个产出一个，全部收到后再写入缓存；
+    否则通过 generate 一次取回整批用例（可与并发请求合并为一次上游批量调用）后逐个产出
+    context为任务上下文（后台任务执行时传入），每个用例前检查一次取消/超时并报告进度
+    结果先查生成结果缓存（请求带 force: true 时跳过），meta字典中记录缓存状态 cache 和缓存键 cacheKey
+    """
+    if context is not None:
+        context.check()
+    key = _generation_cache_key(generation_request)
+    force = generation_request.get('force', False)
+    cases = None if force else GENERATION_CACHE.get(key)
+    if meta is not None:
+        meta.update(cache=CACHE_BYPASS if force else CACHE_MISS if cases is None else CACHE_HIT, cacheKey=key)
+    if cases is None:
+        timeout = context.remaining if context is not None else GENERATION_TIMEOUT
+        backend_request = {name: value for name, value in generation_request.items() if name != 'force'}
+        try:
+            if stream:
+                cases = []
+                for case in GENERATION_BACKEND.iter_generate(backend_request, timeout=timeout):
+                    if context is not None:
+                        context.check()
+                    cases.append(case)
+                    yield case
+            else:
+                cases = GENERATION_BACKEND.generate(backend_request, timeout=timeout)
+        except TimeoutError:
+            if context is not None:
+                context.check()
+            raise
+        try:
+            GENERATION_CACHE.put(key, cases)
+        except OSError as e:
+            app.logger.warning('生成结果写入缓存失败: %s', e)
+        if stream:
+            return
+    total = len(cases)
+    for index, case in enumerate(cases):
+        if context is not None:
+            context.check()
+        yield case
+        if context is not None:
+            context.progress(index + 1, total)
+
+
+def _generate_cases(generation_request, context=None, meta=None):
+    """执行用例生成，返回生成的用例列表"""
+    return list(_iter_generated_cases(generation_request, context, meta))
+
+
+# 流式生成的输出格式
+STREAM_NDJSON = 'ndjson'
+STREAM_SSE = 'sse'
+_STREAM_MIMETYPES = {
+    STREAM_NDJSON: 'application/x-ndjson',
+    STREAM_SSE: 'text/event-stream'
+}
+
+_CASE_SECTIONS = ('preconditions', 'steps', 'expectedResults')
+
+
+def _stream_format():
+    """从查询参数stream或Accept请求头确定流式输出格式，非流式请求返回None"""
+    stream = request.args.get('stream')
+    if stream in _STREAM_MIMETYPES:
+        return stream
+    accept = request.accept_mimetypes
+    for stream, mimetype in _STREAM_MIMETYPES.items():
+        if accept.quality(mimetype) > 0 and accept.best == mimetype:
+            return stream
+    return None
+
+
+def _generation_events(generation_request, granularity):
+    """
+    将生成结果转换为事件序列：未命中缓存时生成后端每产出一个用例即发出对应事件，不等待整批生成完成
+    granularity为case时每个用例一个case事件；为block时先发用例头（各分组为空数组），
+    再逐个发送前置条件/步骤/预期结果分组的block事件，最后发送caseEnd事件
+    """
+    count = 0
+    meta = {}
+    try:
+        for index, case in enumerate(_iter_generated_cases(generation_request, meta=meta, stream=True)):
+            if granularity == 'block':
+                header = {key: value for key, value in case.items() if key not in _CASE_SECTIONS}
+                header.update((section, []) for section in _CASE_SECTIONS)
+                yield {"type": "case", "index": index, "case": header}
+                for section in _CASE_SECTIONS:
+                    for block in case.get(section) or []:
+                        yield {"type": "block", "index": index, "section": section, "block": block}
+                yield {"type": "caseEnd", "index": index}
+            else:
+                yield {"type": "case", "index": index, "case": case}
+            count += 1
+    except Exception as e:
+        app.logger.exception('流式生成用例失败')
+        yield {"type": "error", "message": str(e) or e.__class__.__name__}
+        return
+    yield {"type": "done", "count": count, "cache": meta.get('cache')}
+
+
+def _encode_stream_event(event, stream):
+    payload = json.dumps(event, ensure_ascii=False, separators=(',', ':'))
+    if stream == STREAM_SSE:
+        return 'event: %s\ndata: %s\n\n' % (event['type'], payload)
+    return payload + '\n'
+
+
+def _stream_response(events, stream):
+    """以生成器响应逐条输出事件，每条事件产生后立即发送"""
+    return Response(
+        stream_with_context(_encode_stream_event(event, stream) for event in events),
+        mimetype=_STREAM_MIMETYPES[stream],
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+# 用例生成任务队列：工作线程数、排队上限和单个任务的超时(秒)可通过环境变量调整
+GENERATION_JOBS = GenerationJobQueue(
+    os.environ.get('JOB_DB_PATH', os.path.join(os.path.dirname(CASE_DB_PATH), 'jobs.db')),
+    _generate_cases,
+    max_workers=int(os.environ.get('GENERATION_WORKERS', DEFAULT_WORKERS)),
+    max_queued=int(os.environ.get('GENERATION_MAX_QUEUED', DEFAULT_MAX_QUEUED)),
+    timeout=GENERATION_TIMEOUT,
+    heartbeat_interval=float(os.environ.get('GENERATION_HEARTBEAT_INTERVAL', DEFAULT_HEARTBEAT_INTERVAL))
+)
+
+# 任务队列已满时建议客户端重试的等待时间(秒)
+GENERATION_RETRY_AFTER = 5
+
+
 @app.route('/api/generate-test-cases', methods=['POST'])
 def generate_test_cases():
     """
@@ -893,64 +1514,250 @@ def generate_test_cases():
     请求参数: {
         "templateFile": "用例模板文件名",
         "apiVersion": "接口文档版本",
-        "historyCases": [...] // 可选，历史用例参考
+        "historyCases": [...], // 可选，历史用例参考
+        "force": true          // 可选，跳过生成结果缓存重新生成
     }
-    返回格式: { "success": true, "data": [...] }
+    返回格式: { "success": true, "data": [...], "meta": { "cache": "hit" | "miss" | "bypass", "cacheKey": "..." } }
+    流式模式: 查询参数 stream=ndjson|sse（或Accept为 application/x-ndjson / text/event-stream）时逐条输出事件，
+    每行一个JSON（NDJSON）或一个Server-Sent Event：
+        { "type": "case", "index": 0, "case": {...} }     生成后端返回后逐个序列化发送
+        { "type": "done", "count": 1, "cache": "hit" }     全部完成
+        { "type": "error", "message": "..." }              生成中途失败
+    granularity=block 时用例头之后逐个发送 { "type": "block", "index": 0, "section": "steps", "block": {...} }，
+    最后发送 { "type": "caseEnd", "index": 0 }
     
     注意：这是一个Mock实现，实际生产中应该调用AI服务生成用例
     """
-    data = request.get_json() or {}
+    generation_request, error = _parse_generation_request(request.get_json(silent=True) or {})
+    if error:
+        return jsonify({
+            "success": False,
+            "message": error
+        }), 400
+    stream = _stream_format()
+    if stream:
+        granularity = 'block' if request.args.get('granularity') == 'block' else 'case'
+        return _stream_response(_generation_events(generation_request, granularity), stream)
+    meta = {}
+    try:
+        generated_cases = _generate_cases(generation_request, meta=meta)
+    except TimeoutError:
+        return jsonify({
+            "success": False,
+            "message": "生成超时"
+        }), 504
+    except (GenerationError, OSError) as e:
+        app.logger.warning('用例生成失败: %s', e)
+        return jsonify({
+            "success": False,
+            "message": "生成服务调用失败: %s" % e
+        }), 502
     
-    # Mock生成的测试用例
-    generated_cases = [
-        {
-            "id": "TC001",
-            "name": "用户登录功能测试",
-            "preconditions": [
-                { 
-                    "id": "p1", 
-                    "name": "用户已注册", 
-                    "expanded": True, 
-                    "components": [
-                        {"id": "pc1", "type": "api", "name": "接口调用 - 检查用户", "params": {"method": "GET", "url": "/api/users/check"}}
-                    ] 
-                }
-            ],
-            "steps": [
-                { 
-                    "id": "s1", 
-                    "name": "打开登录页", 
-                    "expanded": True, 
-                    "components": [
-                        {"id": "c1", "type": "api", "name": "接口调用 - 获取登录页", "params": {"method": "GET", "url": "/login"}}
-                    ] 
-                },
-                { 
-                    "id": "s2", 
-                    "name": "输入凭证", 
-                    "expanded": True, 
-                    "components": [
-                        {"id": "c2", "type": "variable", "name": "设置变量 - 登录参数", "params": {"vars": "My_Username=testuser;My_Password=pass123"}},
-                        {"id": "c3", "type": "api", "name": "SOAP接口调用 - 登录验证", "params": {"rTpl": "@\\soap\\CreateSubscriber.xml", "url": "${Env.BMPAPP101.SoapUrl}", "tenantId": "${My_tenantId}"}}
-                    ] 
-                }
-            ],
-            "expectedResults": [
-                { 
-                    "id": "e1", 
-                    "name": "登录成功", 
-                    "expanded": True, 
-                    "components": [
-                        {"id": "ec1", "type": "database", "name": "数据库查询 - 验证登录状态", "params": {"dbUrl": "${Env.AdminDB}", "operation": "Select", "tableName": "USER_SESSION", "conditions": "USERNAME|${My_Username}", "timeout": "30"}}
-                    ] 
-                }
-            ]
+    return jsonify({
+        "success": True,
+        "data": generated_cases,
+        "meta": meta
+    })
+
+
+@app.route('/api/generation-jobs', methods=['POST'])
+def create_generation_job():
+    """
+    接口6.1: 提交用例生成任务（异步执行，立即返回任务ID）
+    请求参数: 与接口6相同 { "templateFile": "...", "apiVersion": "...", "historyCases": [...] }
+    返回格式: HTTP 202 { "success": true, "data": { "id": "任务ID", "status": "queued", ... } }
+    排队中的任务数达到上限时返回HTTP 429，并带Retry-After响应头
+    """
+    generation_request, error = _parse_generation_request(request.get_json(silent=True))
+    if error:
+        return jsonify({
+            "success": False,
+            "message": error
+        }), 400
+    try:
+        job = GENERATION_JOBS.submit(generation_request)
+    except QueueFullError:
+        response = jsonify({
+            "success": False,
+            "message": "生成任务排队已满，请稍后重试"
+        })
+        response.headers['Retry-After'] = str(GENERATION_RETRY_AFTER)
+        return response, 429
+    return jsonify({
+        "success": True,
+        "data": job
+    }), 202
+
+
+@app.route('/api/generation-jobs/<job_id>', methods=['GET'])
+def get_generation_job(job_id):
+    """
+    接口6.2: 查询用例生成任务
+    返回格式: {
+        "success": true,
+        "data": {
+            "id": "...",
+            "status": "queued" | "running" | "succeeded" | "failed" | "cancelled" | "timeout",
+            "progress": { "done": 1, "total": 1 },
+            "createdAt": "...", "startedAt": "...", "finishedAt": "...",
+            "result": [...],   // 仅succeeded时返回，即生成的用例
+            "error": "..."     // 仅失败、取消或超时时返回
         }
-    ]
-    
+    }
+    """
+    job = GENERATION_JOBS.get(job_id)
+    if job is None:
+        return jsonify({
+            "success": False,
+            "message": "生成任务不存在"
+        }), 404
     return jsonify({
         "success": True,
-        "data": generated_cases
+        "data": job
+    })
+
+
+@app.route('/api/generation-jobs/<job_id>/cancel', methods=['POST'])
+def cancel_generation_job(job_id):
+    """
+    接口6.3: 取消排队中或执行中的用例生成任务，已结束的任务保持原状态
+    返回格式: { "success": true, "data": { "id": "...", "status": "cancelled", ... } }
+    """
+    job = GENERATION_JOBS.cancel(job_id)
+    if job is None:
+        return jsonify({
+            "success": False,
+            "message": "生成任务不存在"
+        }), 404
+    return jsonify({
+        "success": True,
+        "data": job
+    })
+
+
+# 批量生成：单次最多的模板数，以及所有批量请求共用的生成线程数（单个请求的并发数不超过它）
+MAX_BULK_TEMPLATES = 200
+GENERATION_BULK_WORKERS = int(os.environ.get('GENERATION_BULK_WORKERS', 8))
+BULK_GENERATION_EXECUTOR = ThreadPoolExecutor(max_workers=GENERATION_BULK_WORKERS, thread_name_prefix='bulk-generation')
+
+# 批量生成中单个模板的结果状态
+ITEM_SUCCEEDED = 'succeeded'
+ITEM_FAILED = 'failed'
+ITEM_TIMED_OUT = 'timeout'
+
+
+def _parse_bulk_generation_request(data):
+    """校验批量生成请求，返回 (各模板的生成请求列表, 并发数, 错误信息)；templates缺省或为"all"时使用全部已注册模板"""
+    if not isinstance(data, dict):
+        return None, None, '请求体必须是JSON对象'
+    templates = data.get('templates', 'all')
+    if templates == 'all':
+        templates = TEMPLATE_REGISTRY.templates()
+    if not isinstance(templates, list) or not templates or not all(isinstance(item, str) for item in templates):
+        return None, None, 'templates必须是非空的模板文件名数组或"all"'
+    if len(templates) > MAX_BULK_TEMPLATES:
+        return None, None, '单次最多生成%d个模板' % MAX_BULK_TEMPLATES
+    concurrency = data.get('concurrency', GENERATION_BULK_WORKERS)
+    if not isinstance(concurrency, int) or isinstance(concurrency, bool) or concurrency < 1:
+        return None, None, 'concurrency必须是正整数'
+    generation_requests = []
+    for template_file in templates:
+        generation_request, error = _parse_generation_request(dict(data, templateFile=template_file))
+        if error:
+            return None, None, error
+        generation_requests.append(generation_request)
+    return generation_requests, min(concurrency, GENERATION_BULK_WORKERS), None
+
+
+def _bulk_generation_item(generation_request):
+    """生成单个模板的用例，失败不抛出异常，而是记录在结果的status/error中"""
+    started = time.perf_counter()
+    item = {"templateFile": generation_request['templateFile']}
+    meta = {}
+    try:
+        item['cases'] = _generate_cases(generation_request, meta=meta)
+        item['status'] = ITEM_SUCCEEDED
+    except TimeoutError:
+        item.update(status=ITEM_TIMED_OUT, error='生成超时')
+    except Exception as e:
+        app.logger.warning('批量生成 %s 失败: %s', generation_request['templateFile'], e)
+        item.update(status=ITEM_FAILED, error=str(e) or e.__class__.__name__)
+    item['cache'] = meta.get('cache')
+    item['elapsedMs'] = round((time.perf_counter() - started) * 1000, 1)
+    return item
+
+
+def _iter_bulk_generation(generation_requests, concurrency):
+    """
+    在共用线程池中并发生成各模板的用例，同时进行的不超过concurrency个，按完成顺序产出 (序号, 结果)
+    生成器提前关闭（如流式响应的客户端断开）时取消尚未开始的生成
+    """
+    pending = {}
+    next_index = 0
+    try:
+        while pending or next_index < len(generation_requests):
+            while next_index < len(generation_requests) and len(pending) < concurrency:
+                future = BULK_GENERATION_EXECUTOR.submit(_bulk_generation_item, generation_requests[next_index])
+                pending[future] = next_index
+                next_index += 1
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _bulk_generation_events(generation_requests, concurrency):
+    counts = {ITEM_SUCCEEDED: 0, ITEM_FAILED: 0, ITEM_TIMED_OUT: 0}
+    for index, item in _iter_bulk_generation(generation_requests, concurrency):
+        counts[item['status']] += 1
+        yield dict(item, type='item', index=index)
+    yield {"type": "done", "total": len(generation_requests), **counts}
+
+
+@app.route('/api/generate-test-cases/bulk', methods=['POST'])
+def generate_test_cases_bulk():
+    """
+    接口6.4: 批量生成多个模板的测试用例
+    请求参数: {
+        "templates": ["@\\soap\\CreateSubscriber.xml", ...] | "all",  // 缺省为全部已注册模板
+        "apiVersion": "接口文档版本",
+        "historyCases": [...],  // 可选，所有模板共用
+        "force": true,          // 可选，跳过生成结果缓存
+        "concurrency": 4        // 可选，同时生成的模板数，不超过GENERATION_BULK_WORKERS
+    }
+    返回格式: {
+        "success": true,
+        "data": {
+            "items": [{ "templateFile": "...", "status": "succeeded" | "failed" | "timeout", "cases": [...], "error": "...",
+                        "cache": "hit", "elapsedMs": 12.5 }, ...],  // 与templates顺序一致
+            "total": 14, "succeeded": 13, "failed": 1, "timeout": 0
+        }
+    }
+    流式模式（stream=ndjson|sse，同接口6）: 每个模板完成时立即发送 { "type": "item", "index": 3, ...单个结果 }，
+    最后发送 { "type": "done", "total": 14, "succeeded": 13, "failed": 1, "timeout": 0 }
+    """
+    generation_requests, concurrency, error = _parse_bulk_generation_request(request.get_json(silent=True))
+    if error:
+        return jsonify({
+            "success": False,
+            "message": error
+        }), 400
+    events = _bulk_generation_events(generation_requests, concurrency)
+    stream = _stream_format()
+    if stream:
+        return _stream_response(events, stream)
+    items = [None] * len(generation_requests)
+    summary = {}
+    for event in events:
+        if event.pop('type') == 'item':
+            items[event.pop('index')] = event
+        else:
+            summary = event
+    return jsonify({
+        "success": True,
+        "data": dict(summary, items=items)
     })
 
 
@@ -979,6 +1786,11 @@ SYSTEM_PRESET_FUNCTIONS = {
     ]
 }
 
+SYSTEM_FUNCTIONS_PAYLOAD = StaticPayload({
+    "success": True,
+    "data": SYSTEM_PRESET_FUNCTIONS
+}, max_age=STATIC_CACHE_MAX_AGE)
+
 
 @app.route('/api/system-functions', methods=['GET'])
 def get_system_functions():
@@ -993,9 +1805,259 @@ def get_system_functions():
         }
     }
     """
+    return SYSTEM_FUNCTIONS_PAYLOAD.response()
+
+
+# 表达式引擎：每个不同的参数字符串只解析一次，语法树缓存的条目数可通过环境变量调整
+EXPRESSION_ENGINE = ExpressionEngine(cache_size=int(os.environ.get('EXPRESSION_CACHE_SIZE', 100000)))
+
+# 表达式预览单次最多的表达式数
+MAX_EXPRESSIONS = 10000
+
+
+def _evaluation_context(data):
+    """从请求体的context构造求值上下文，返回 (上下文, 错误信息)"""
+    context = data.get('context') or {}
+    if not isinstance(context, dict):
+        return None, 'context必须是JSON对象'
+    variables, env, now = context.get('variables') or {}, context.get('env') or {}, context.get('now')
+    if not isinstance(variables, dict) or not isinstance(env, dict):
+        return None, 'context.variables和context.env必须是JSON对象'
+    if now is not None:
+        try:
+            now = parse_time(now)
+        except ValueError:
+            return None, 'context.now必须是yyyyMMddHHmmss格式的时间'
+    return EvaluationContext(variables, env, now), None
+
+
+@app.route('/api/expressions/evaluate', methods=['POST'])
+def evaluate_expressions():
+    """
+    接口7.1: 预览${}占位符的求值结果
+    请求体: {
+        "case": {...} | "expressions": ["${G.modDay(G.now(),1)}", "Bearer ${My_Token}", ...],
+        "context": {
+            "variables": { "My_SubIdentity": "13800000001", "calling": { "Sub": { "SUB_ID": "1001" } } },
+            "env": { "BMPAPP101": { "SoapUrl": "http://..." } },
+            "now": "20240101120000"   // 可选，固定G.now()等函数的当前时间
+        }
+    }
+    返回格式: 传case时 { "success": true, "data": { "case": {...替换后的用例}, "issues": [...] } }；
+    传expressions时 { "success": true, "data": { "results": [{ "value": "...", "issues": [...] }, ...] } }
+    issues中的每一项: { "path": "/steps/0/components/1/params/url", "expression": "Env.X", "code": "unresolved" | "error", "message": "..." }，
+    无法求值的占位符在结果中保留原文
+    """
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"success": False, "message": "请求体必须是JSON对象"}), 400
+    context, error = _evaluation_context(data)
+    if error:
+        return jsonify({
+            "success": False,
+            "message": error
+        }), 400
+    if isinstance(data.get('case'), dict):
+        issues = []
+        resolved = EXPRESSION_ENGINE.resolve(data['case'], context, issues)
+        return jsonify({
+            "success": True,
+            "data": {"case": resolved, "issues": issues}
+        })
+    expressions = data.get('expressions')
+    if not isinstance(expressions, list) or not all(isinstance(item, str) for item in expressions):
+        return jsonify({
+            "success": False,
+            "message": "需要提供case对象或expressions字符串数组"
+        }), 400
+    if len(expressions) > MAX_EXPRESSIONS:
+        return jsonify({
+            "success": False,
+            "message": "单次最多预览%d个表达式" % MAX_EXPRESSIONS
+        }), 400
+    results = []
+    for index, expression in enumerate(expressions):
+        issues = []
+        value = EXPRESSION_ENGINE.render(expression, context, issues, '/%d' % index)
+        results.append({"value": value, "issues": issues})
+    return jsonify({
+        "success": True,
+        "data": {"results": results}
+    })
+
+
+# 变量数据流分析：每个用例的分析结果按 (用例内容哈希, 外部变量声明) 缓存，重复分析案例库时只重新分析有变化的用例；
+# 分析依赖模板的rRsp，模板目录变化后缓存整体失效
+VARIABLE_ANALYZER = VariableAnalyzer(EXPRESSION_ENGINE, template_params=TEMPLATE_REGISTRY.params)
+VARIABLE_ANALYSIS_CACHE = LRUCache(max_entries=int(os.environ.get('VARIABLE_ANALYSIS_CACHE_SIZE', 100000)))
+
+
+@app.route('/api/analyze-variables', methods=['POST'])
+def analyze_variables():
+    """
+    接口7.2: 批量分析用例的变量定义和使用
+    请求体: {
+        "cases": [...] | "caseLibrary": "all" | "archived",   // 传入的用例（单次最多10000个）或整个案例库
+        "globals": ["Offer_*", "My_tenantId"]                 // 可选，由外部提供、无需在用例中定义的变量（支持通配符）
+    }
+    返回格式: {
+        "success": true,
+        "data": {
+            "total": 3, "withIssues": 2, "cached": 1,
+            "issueCounts": { "undefined": 2, "usedBeforeDefinition": 0, "unused": 5, "shadowed": 0, "structure": 0 },
+            "results": [{ "id": "HTC001", "defined": [...], "issues": [{ "code": "undefined", "variable": "My_AcctId",
+                          "path": "/expectedResults/0/components/0/params/sql", "message": "..." }] }]
+        }
+    }
+    results只包含有问题的用例；cached为直接使用缓存结果的用例数；结构不正确的用例、分组或组件报告为structure问题
+    """
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({"success": False, "message": "请求体必须是JSON对象"}), 400
+    global_names = data.get('globals') or []
+    if not isinstance(global_names, list) or not all(isinstance(name, str) for name in global_names):
+        return jsonify({
+            "success": False,
+            "message": "globals必须是字符串数组"
+        }), 400
+    cases = data.get('cases')
+    if cases is None and isinstance(data.get('caseLibrary'), str):
+        cases = _library_cases(data['caseLibrary'])
+    elif not isinstance(cases, list):
+        return jsonify({
+            "success": False,
+            "message": "cases必须是数组，或通过caseLibrary指定案例库"
+        }), 400
+    elif len(cases) > MAX_VALIDATE_CASES:
+        return jsonify({
+            "success": False,
+            "message": "单次最多分析%d个用例" % MAX_VALIDATE_CASES
+        }), 400
+
+    global_names = GlobalNames(global_names)
+    VARIABLE_ANALYSIS_CACHE.sync_version(TEMPLATE_REGISTRY.generation)
+    summary = {"total": 0, "withIssues": 0, "cached": 0}
+    issue_counts = dict.fromkeys(('undefined', 'usedBeforeDefinition', 'unused', 'shadowed', 'structure'), 0)
+    results = []
+    for case in cases:
+        cache_key = (content_key(case), global_names.key)
+        result = VARIABLE_ANALYSIS_CACHE.get(cache_key)
+        if result is None:
+            result = VARIABLE_ANALYZER.analyze(case, global_names)
+            VARIABLE_ANALYSIS_CACHE.put(cache_key, result)
+        else:
+            summary['cached'] += 1
+        summary['total'] += 1
+        if result['issues']:
+            summary['withIssues'] += 1
+            results.append(result)
+            for issue in result['issues']:
+                issue_counts[issue['code']] += 1
     return jsonify({
         "success": True,
-        "data": SYSTEM_PRESET_FUNCTIONS
+        "data": dict(summary, issueCounts=issue_counts, results=results)
+    })
+
+
+# 页面启动所需的全部静态配置，合并为一个响应，以内容哈希作为版本号；
+# 同一URL的响应会随部署和模板目录变化，因此不设浏览器缓存时间，每次通过ETag重新验证
+def _bootstrap_config(generation, delta=False):
+    config = {
+        "caseLibraryOptions": CASE_LIBRARY_OPTIONS,
+        "presetData": {
+            "steps": PRESET_STEPS,
+            "components": PRESET_COMPONENTS,
+            "componentDefaultParams": COMPONENT_DEFAULT_PARAMS
+        },
+        "paramSchemas": _param_schemas(),
+        "systemFunctions": SYSTEM_PRESET_FUNCTIONS,
+        "templateParams": TEMPLATE_REGISTRY.all_params()
+    }
+    # 版本号始终按完整内容计算，两种模板参数形式可共用since
+    version = content_digest(config)
+    if delta:
+        del config["templateParams"]
+        config["templateParamsDelta"] = TEMPLATE_REGISTRY.delta_params()
+    return {
+        "success": True,
+        "data": dict(config, version=version, unchanged=False)
+    }
+
+
+BOOTSTRAP_PAYLOAD = VersionedPayload(_bootstrap_config, max_age=0)
+BOOTSTRAP_DELTA_PAYLOAD = VersionedPayload(lambda generation: _bootstrap_config(generation, delta=True), max_age=0)
+BOOTSTRAP_UNCHANGED_PAYLOAD = VersionedPayload(lambda version: {
+    "success": True,
+    "data": {"version": version, "unchanged": True}
+}, max_age=0)
+
+
+@app.route('/api/bootstrap', methods=['GET'])
+def get_bootstrap():
+    """
+    接口9: 一次获取页面启动所需的全部静态配置（替代接口1、3、4、5、7的逐个请求）
+    查询参数: since=客户端已缓存配置的版本号（可选），templateParams=delta 时模板参数以差量形式返回（可选）
+    返回格式: {
+        "success": true,
+        "data": {
+            "version": "内容哈希",
+            "unchanged": false,
+            "caseLibraryOptions": [...],
+            "presetData": { "steps": [...], "components": [...], "componentDefaultParams": {...} },
+            "paramSchemas": {...},
+            "systemFunctions": {...},
+            "templateParams": { "api": { "@\\soap\\CreateSubscriber.xml": {...} }, ... }
+        }
+    }
+    since与当前版本一致时只返回 { "version": "...", "unchanged": true }；
+    templateParams=delta 时以 "templateParamsDelta": { 组件类型: { "base": 基础树, "deltas": { 模板: 差量 } } } 代替templateParams
+    """
+    if request.args.get('templateParams') == 'delta':
+        payload = BOOTSTRAP_DELTA_PAYLOAD.get(TEMPLATE_REGISTRY.generation)
+    else:
+        payload = BOOTSTRAP_PAYLOAD.get(TEMPLATE_REGISTRY.generation)
+    version = payload.data['data']['version']
+    if request.args.get('since') == version:
+        return BOOTSTRAP_UNCHANGED_PAYLOAD.get(version).response()
+    return payload.response()
+
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """
+    接口8: 获取服务运行指标
+    返回格式: {
+        "success": true,
+        "data": {
+            "searchCache": { "hits": 0, "misses": 0, "evictions": 0, ... },
+            "suggestCache": { ... },
+            "templates": { "templates": 14, "parsed": 3, "parses": 3, "parseErrors": 0, "reloads": 0, "generation": 1, "subtrees": {...} },
+            "generationJobs": { "workers": 4, "running": 0, "queued": 0, "maxQueued": 100, "rejected": 0, ... },
+            "generationBackend": { "backend": "http", "upstreamCalls": 3, "averageBatch": 5.3, "connectionsReused": 2, ... },
+            "generationCache": { "entries": 12, "bytes": 40960, "maxBytes": 268435456, "hits": 5, "misses": 12, ... },
+            "expressions": { "size": 120, "hits": 9880, "misses": 120, "placeholders": 10000, ... },
+            "variableAnalysis": { "size": 3, "hits": 3, "misses": 3, ... },
+            "caseExport": { "size": 5, "hits": 120, "compiled": 8, "fallbacks": 0, ... },
+            "duplicateIndex": { "indexed": 3, "version": 1, "numPerm": 64, "bands": 16, "threshold": 0.8, ... },
+            "caseCache": { "size": 0, "maxEntries": 0, "hits": 0, "misses": 0, "strings": 0, "shapes": 0, "sharedRecords": 0, ... }
+        }
+    }
+    """
+    return jsonify({
+        "success": True,
+        "data": {
+            "searchCache": SEARCH_CACHE.stats(),
+            "suggestCache": SUGGEST_CACHE.stats(),
+            "templates": TEMPLATE_REGISTRY.stats(),
+            "generationJobs": GENERATION_JOBS.stats(),
+            "generationBackend": GENERATION_BACKEND.stats(),
+            "generationCache": GENERATION_CACHE.stats(),
+            "expressions": EXPRESSION_ENGINE.stats(),
+            "variableAnalysis": VARIABLE_ANALYSIS_CACHE.stats(),
+            "caseExport": CASE_EXPORTER.stats(),
+            "duplicateIndex": DUPLICATE_INDEX.stats(),
+            "caseCache": CASE_STORE.cache.stats()
+        }
     })
 
 
@@ -1013,11 +2075,28 @@ if __name__ == '__main__':
     print("\n可用接口:")
     print("  GET  /api/case-library-options                    - 获取案例库选项")
     print("  POST /api/search-history-cases                    - 搜索历史用例")
+    print("  GET  /api/history-cases/<id>                      - 获取历史用例详情")
+    print("  PATCH /api/history-cases/<id>                     - 按JSON Patch增量修改历史用例")
+    print("  POST /api/history-cases/import                    - 批量导入历史用例(NDJSON)")
+    print("  GET  /api/history-cases/<id>/export               - 导出单个用例为可执行XML(zip)")
+    print("  POST /api/history-cases/export                    - 批量导出用例为可执行XML(流式zip)")
+    print("  GET  /api/duplicate-cases                         - 查找近似重复的历史用例")
+    print("  GET  /api/search-suggest?q=                       - 搜索框输入联想")
     print("  GET  /api/preset-data                             - 获取预置步骤和组件")
     print("  GET  /api/param-schemas                           - 获取参数配置架构")
+    print("  POST /api/validate-cases                          - 按参数配置架构批量校验用例")
     print("  GET  /api/template-params/<type>/<template>       - 获取模板特定参数")
+    print("  POST /api/template-params/batch                   - 批量获取模板特定参数")
     print("  POST /api/generate-test-cases                     - 生成测试用例")
+    print("  POST /api/generate-test-cases/bulk                - 批量生成多个模板的测试用例")
+    print("  POST /api/generation-jobs                         - 提交用例生成任务")
+    print("  GET  /api/generation-jobs/<id>                    - 查询用例生成任务")
+    print("  POST /api/generation-jobs/<id>/cancel             - 取消用例生成任务")
     print("  GET  /api/system-functions                        - 获取系统预置函数")
+    print("  POST /api/expressions/evaluate                    - 预览${}占位符的求值结果")
+    print("  POST /api/analyze-variables                       - 批量分析用例的变量定义和使用")
+    print("  GET  /api/bootstrap?since=                        - 获取页面启动所需的全部配置")
+    print("  GET  /api/metrics                                 - 获取服务运行指标")
     print("  GET  /health                                      - 健康检查")
     print("=" * 60 + "\n")
     
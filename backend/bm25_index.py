@@ -0,0 +1,318 @@
+"""
+字段加权BM25(BM25F)排序索引
+倒排链以CSR格式存放在内存映射的.npy文件中（基础段），此后写入的文档进入内存增量段，
+增量段积累到一定规模后与基础段合并；合并时按各字段长度和平均长度预先算好每个倒排项的
+词频得分，查询时只需乘以IDF并对命中词项的倒排链做一次bincount即可得到全部文档的得分
+"""
+
+import json
+import os
+from array import array
+from collections import defaultdict
+from itertools import chain
+
+import numpy as np
+
+# BM25参数
+K1 = 1.2
+B = 0.75
+
+# 增量段文档数超过 max(MERGE_MIN_DOCS, 基础段文档数 * MERGE_RATIO) 时合并
+MERGE_MIN_DOCS = 2000
+MERGE_RATIO = 0.25
+
+
+def _save_npy(path, values):
+    """先写临时文件再原子替换，避免其他进程读到不完整的文件"""
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        np.save(f, values)
+    os.replace(tmp_path, path)
+
+
+def _load_npy(path, mode='r'):
+    """内存映射打开.npy文件，返回普通ndarray视图（避免np.memmap子类的索引开销）"""
+    return np.asarray(np.load(path, mmap_mode=mode))
+
+
+class Bm25Index:
+    """
+    BM25F排序索引，文档键为整数（用例seq），词项由调用方映射为整数ID
+    词项在文档中的得分为 idf * tf / (k1 + tf)，其中
+    tf = Σ 字段权重 * 字段词频 / (1 - b + b * 字段长度 / 字段平均长度)
+    基础段保存每个倒排项的 tf / (k1 + tf)（按合并时的字段平均长度计算）和原始字段词频（供下次合并重算）
+    """
+
+    def __init__(self, path, field_weights, capacity=1024):
+        self.path = path
+        self.weights = np.asarray(field_weights, dtype=np.float32)
+        self.field_count = len(field_weights)
+        self._meta_path = path + '.meta.json'
+        self._docs_path = path + '.docs.npy'
+        self._impacts_path = path + '.impacts.npy'
+        self._tfs_path = path + '.tfs.npy'
+        self._offsets_path = path + '.offsets.npy'
+        self._lengths_path = path + '.lengths.npy'
+
+        self._load_base()
+        if os.path.exists(self._lengths_path):
+            self._lengths = np.load(self._lengths_path, mmap_mode='r+')
+        else:
+            self._lengths = self._allocate_lengths(capacity)
+        self._lengths_id = self._file_id(self._lengths_path)
+        self._superseded = None
+        self.reset_delta()
+
+    # ============ 文件 ============
+
+    @staticmethod
+    def _file_id(path):
+        stat = os.stat(path)
+        return stat.st_ino, stat.st_size
+
+    def _load_base(self):
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            self.base_version = meta['baseVersion']
+            self.base_doc_count = meta['baseDocs']
+            self._averages = np.asarray(meta['fieldAverages'], dtype=np.float32)
+            self._docs = _load_npy(self._docs_path)
+            self._impacts = _load_npy(self._impacts_path)
+            self._tfs = _load_npy(self._tfs_path)
+            self._offsets = _load_npy(self._offsets_path)
+        else:
+            self.base_version = -1
+            self.base_doc_count = 0
+            self._averages = np.ones(self.field_count, dtype=np.float32)
+            self._docs = np.zeros(0, dtype=np.int32)
+            self._impacts = np.zeros(0, dtype=np.float32)
+            self._tfs = np.zeros((0, self.field_count), dtype=np.uint16)
+            self._offsets = np.zeros(1, dtype=np.int64)
+
+    def _allocate_lengths(self, capacity, copy_from=None):
+        tmp_path = self._lengths_path + '.tmp'
+        lengths = np.lib.format.open_memmap(
+            tmp_path, mode='w+', dtype=np.float32, shape=(capacity, self.field_count)
+        )
+        if copy_from is not None:
+            lengths[:copy_from.shape[0]] = copy_from
+        lengths.flush()
+        del lengths
+        os.replace(tmp_path, self._lengths_path)
+        return np.load(self._lengths_path, mmap_mode='r+')
+
+    def _ensure_doc(self, doc):
+        capacity = self._lengths.shape[0]
+        if doc >= capacity:
+            while capacity <= doc:
+                capacity *= 2
+            self._lengths = self._allocate_lengths(capacity, copy_from=self._lengths)
+            self._lengths_id = self._file_id(self._lengths_path)
+        if doc >= self._superseded.shape[0]:
+            grown = np.zeros(self._lengths.shape[0], dtype=bool)
+            grown[:self._superseded.shape[0]] = self._superseded
+            self._superseded = grown
+
+    def reload_if_replaced(self):
+        """
+        其他进程合并了基础段或扩容了字段长度文件时重新映射
+        基础段被替换时丢弃增量段并返回True，调用方需要重新加载基础段版本之后写入的文档
+        """
+        if self._file_id(self._lengths_path) != self._lengths_id:
+            self._lengths = np.load(self._lengths_path, mmap_mode='r+')
+            self._lengths_id = self._file_id(self._lengths_path)
+            self._ensure_doc(self._lengths.shape[0] - 1)
+        if os.path.exists(self._meta_path):
+            with open(self._meta_path, encoding='utf-8') as f:
+                if json.load(f)['baseVersion'] != self.base_version:
+                    self._load_base()
+                    self.reset_delta()
+                    return True
+        return False
+
+    def flush(self):
+        self._lengths.flush()
+
+    # ============ 写入 ============
+
+    def reset_delta(self):
+        """清空增量段"""
+        # 增量段按写入记录组织：每次set_document分配一个记录号，文档被再次写入时旧记录标记为失效，
+        # 避免从倒排链中逐项删除；倒排项的记录号和字段词频按写入顺序整块追加，词项只保存倒排项位置
+        self._delta = defaultdict(lambda: array('i'))  # term_id -> 倒排项位置array
+        self._posting_records = array('i')
+        self._posting_tfs = array('H')
+        self._record_docs = array('i')
+        self._record_live = bytearray()
+        self._doc_records = {}  # doc -> 当前有效的记录号
+        self._superseded = np.zeros(self._lengths.shape[0], dtype=bool)
+        self._has_superseded = False
+
+    @property
+    def delta_doc_count(self):
+        return len(self._doc_records)
+
+    @property
+    def size(self):
+        """文档键的上界（打分数组的长度）"""
+        return self._lengths.shape[0]
+
+    def set_document(self, doc, field_term_ids):
+        """
+        写入或覆盖一个文档
+        field_term_ids: 每个字段一个词项ID序列（按出现顺序，可重复），顺序与field_weights一致
+        """
+        self._ensure_doc(doc)
+        self.remove_document(doc)
+        lengths = [len(term_ids) for term_ids in field_term_ids]
+        self._lengths[doc] = lengths
+
+        record = len(self._record_docs)
+        self._record_docs.append(doc)
+        self._record_live.append(1)
+        self._doc_records[doc] = record
+        if not sum(lengths):
+            return
+        # 统计每个(词项, 字段)的出现次数，得到每个词项一行的字段词频矩阵
+        keys = np.fromiter(chain.from_iterable(field_term_ids), dtype=np.int64) * self.field_count
+        keys += np.repeat(np.arange(self.field_count), lengths)
+        keys, counts = np.unique(keys, return_counts=True)
+        key_terms = keys // self.field_count
+        # keys已排序，同一词项的各字段相邻
+        new_term = np.empty(len(keys), dtype=bool)
+        new_term[0] = True
+        np.not_equal(key_terms[1:], key_terms[:-1], out=new_term[1:])
+        term_ids = key_terms[new_term]
+        tfs = np.zeros((len(term_ids), self.field_count), dtype=np.uint16)
+        tfs[np.cumsum(new_term) - 1, keys % self.field_count] = np.minimum(counts, 0xFFFF)
+
+        start = len(self._posting_records)
+        self._posting_records.frombytes(np.full(len(term_ids), record, dtype=np.int32).tobytes())
+        self._posting_tfs.frombytes(tfs.tobytes())
+        delta = self._delta
+        for position, term_id in enumerate(term_ids.tolist(), start):
+            delta[term_id].append(position)
+
+    def remove_document(self, doc):
+        if doc >= self._lengths.shape[0]:
+            return
+        record = self._doc_records.pop(doc, None)
+        if record is not None:
+            self._record_live[record] = 0
+        self._superseded[doc] = True
+        self._has_superseded = True
+        self._lengths[doc] = 0
+
+    def needs_merge(self):
+        """增量段需要合并进基础段时返回True（尚无基础段时，有文档即需要合并）"""
+        if self.base_version < 0:
+            return self.delta_doc_count > 0
+        return self.delta_doc_count >= max(MERGE_MIN_DOCS, self.base_doc_count * MERGE_RATIO)
+
+    def merge(self, version, term_count):
+        """
+        将增量段合并进基础段并写回磁盘，按当前的字段平均长度重算全部倒排项的词频得分
+        version为合并时的案例库版本，term_count为词项ID上界
+        """
+        base_terms = np.repeat(np.arange(len(self._offsets) - 1, dtype=np.int64), np.diff(self._offsets))
+        keep = ~self._superseded[self._docs]
+        parts_terms, parts_docs, parts_tfs = [base_terms[keep]], [self._docs[keep]], [self._tfs[keep]]
+        for term_id in self._delta:
+            docs, tfs = self._delta_postings(term_id)
+            parts_terms.append(np.full(len(docs), term_id, dtype=np.int64))
+            parts_docs.append(docs)
+            parts_tfs.append(tfs)
+
+        terms = np.concatenate(parts_terms)
+        docs = np.concatenate(parts_docs)
+        tfs = np.concatenate(parts_tfs)
+        order = np.lexsort((docs, terms))
+        docs, tfs = docs[order], tfs[order]
+        offsets = np.zeros(term_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms, minlength=term_count), out=offsets[1:])
+        doc_count = len(np.unique(docs))
+        if doc_count:
+            averages = np.asarray(self._lengths).sum(axis=0, dtype=np.float64) / doc_count
+            self._averages = np.maximum(averages, 1e-6).astype(np.float32)
+
+        _save_npy(self._docs_path, docs)
+        _save_npy(self._impacts_path, self._impact(docs, tfs))
+        _save_npy(self._tfs_path, tfs)
+        _save_npy(self._offsets_path, offsets)
+        self.flush()
+        tmp_path = self._meta_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "baseVersion": version,
+                "baseDocs": doc_count,
+                "fieldAverages": self._averages.tolist()
+            }, f)
+        os.replace(tmp_path, self._meta_path)
+
+        self._load_base()
+        self.reset_delta()
+
+    # ============ 查询 ============
+
+    def _impact(self, docs, tfs):
+        """计算倒排项的 tf / (k1 + tf)"""
+        norms = (1 - B) + B * (np.asarray(self._lengths)[docs] / self._averages)
+        tf = (tfs * self.weights / norms).sum(axis=1)
+        return (tf / (K1 + tf)).astype(np.float32)
+
+    def _delta_postings(self, term_id):
+        """返回增量段中词项的 (文档数组, 词频矩阵)，只包含有效记录"""
+        positions = np.frombuffer(self._delta[term_id], dtype=np.int32)
+        records = np.frombuffer(self._posting_records, dtype=np.int32)[positions]
+        live = np.frombuffer(self._record_live, dtype=np.uint8)[records].astype(bool)
+        docs = np.frombuffer(self._record_docs, dtype=np.int32)[records[live]]
+        tfs = np.frombuffer(self._posting_tfs, dtype=np.uint16).reshape(-1, self.field_count)
+        return docs, tfs[positions[live]]
+
+    def _postings(self, term_id):
+        """返回词项的 (文档数组, 词频得分数组)，已排除基础段中被覆盖的文档"""
+        parts_docs, parts_impacts = [], []
+        if term_id < len(self._offsets) - 1:
+            start, end = self._offsets[term_id], self._offsets[term_id + 1]
+            if end > start:
+                docs = self._docs[start:end]
+                impacts = self._impacts[start:end]
+                if self._has_superseded:
+                    live = ~self._superseded[docs]
+                    docs, impacts = docs[live], impacts[live]
+                parts_docs.append(docs)
+                parts_impacts.append(impacts)
+        if term_id in self._delta:
+            docs, tfs = self._delta_postings(term_id)
+            parts_docs.append(docs)
+            parts_impacts.append(self._impact(docs, tfs))
+        if not parts_docs:
+            return np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+        if len(parts_docs) == 1:
+            return parts_docs[0], parts_impacts[0]
+        return np.concatenate(parts_docs), np.concatenate(parts_impacts)
+
+    def score(self, term_groups, doc_count):
+        """
+        对词项组打分：组内词项为"或"关系（得分累加），组间为"与"关系
+        doc_count为文档总数（用于计算IDF）
+        返回 (得分数组, 命中全部词项组的文档布尔数组)，数组下标即文档键
+        """
+        size = self.size
+        scores = np.zeros(size, dtype=np.float64)
+        matched = None
+        for term_ids in term_groups:
+            present = np.zeros(size, dtype=bool)
+            for term_id in term_ids:
+                docs, impacts = self._postings(term_id)
+                if not len(docs):
+                    continue
+                df = len(docs)
+                idf = np.log(1.0 + (doc_count - df + 0.5) / (df + 0.5))
+                scores += np.bincount(docs, weights=impacts * idf, minlength=size)
+                present[docs] = True
+            matched = present if matched is None else matched & present
+        if matched is None:
+            matched = np.zeros(size, dtype=bool)
+        return scores.astype(np.float32), matched
@@ -0,0 +1,329 @@
+"""
+用例导出
+将用例转换为测试框架可执行的XML文件：每个组件输出为以其别名命名的元素（SoapClient、RestfulClient、TableSetVar 等），
+标量参数为元素属性，rTpl引用的模板的请求参数树和响应验证树填入 <rReq>/<rRsp>：
+SOAP请求为嵌套XML元素，REST请求为JSON，响应验证为逐个叶子的 <check path= validation= expected= saveAs=/>
+
+每个模板的参数树只编译一次为“静态片段 + 叶子槽位”的渲染计划并缓存，导出组件时只按路径填入取值；
+组件自带的参数树只改了叶子取值时复用模板的渲染计划，结构不同时才单独编译。
+多个用例打包为zip时逐个用例写入并立即输出已压缩的数据，内存中不保存整个压缩包
+"""
+
+import json
+import re
+import zipfile
+from xml.sax.saxutils import escape
+
+from case_validator import CASE_SECTIONS
+from result_cache import LRUCache
+
+# 各分组在导出文件中的元素名
+SECTION_ELEMENTS = {
+    'preconditions': 'Preconditions',
+    'steps': 'Steps',
+    'expectedResults': 'ExpectedResults'
+}
+
+# 参数树中叶子的渲染方式
+_XML_REQUEST = 'xml'
+_JSON_REQUEST = 'json'
+_CHECKS = 'checks'
+
+_TREE_PARAMS = ('rReq', 'rRsp')
+
+_UNSAFE_FILENAME = re.compile(r'[^\w.\-]+')
+
+# XML 1.0 不允许出现的字符（除制表、换行、回车外的控制字符、代理项和U+FFFE/U+FFFF），输出时删除
+_INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ud800-\udfff\ufffe\uffff]')
+
+# 组件元素自身的属性，同名的组件参数改用带前缀的属性名
+_COMPONENT_ATTRIBUTES = ('type', 'id', 'name')
+
+
+def _is_leaf(node):
+    return isinstance(node, dict) and 'type' in node and not isinstance(node['type'], dict)
+
+
+def _leaves(tree, prefix=()):
+    """参数树的全部叶子 {路径元组: 叶子}"""
+    leaves = {}
+    for key, node in tree.items():
+        path = prefix + (key,)
+        if _is_leaf(node):
+            leaves[path] = node
+        elif isinstance(node, dict):
+            leaves.update(_leaves(node, path))
+    return leaves
+
+
+def _text(value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return '' if value is None else str(value)
+
+
+_xml_names = {}
+
+
+def _xml_name(key):
+    """参数名用作XML元素名，不合法的字符替换为下划线（参数名重复出现，结果缓存）"""
+    name = _xml_names.get(key)
+    if name is None:
+        name = re.sub(r'[^\w.\-]', '_', str(key))
+        name = _xml_names[key] = name if re.match(r'[A-Za-z_]', name) else '_' + name
+    return name
+
+
+def _escape(value):
+    """XML文本转义，并删除XML 1.0不允许的字符"""
+    return escape(_INVALID_XML_CHARS.sub('', value))
+
+
+def _quoteattr(value):
+    """带引号的XML属性值（只处理需要转义的字符，比xml.sax.saxutils.quoteattr快），删除XML 1.0不允许的字符"""
+    value = _INVALID_XML_CHARS.sub('', value)
+    return '"%s"' % value.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace(
+        '"', '&quot;').replace('\n', '&#10;').replace('\r', '&#13;').replace('\t', '&#9;')
+
+
+def _compile(tree, kind):
+    """
+    将参数树编译为渲染计划：字符串为静态片段，元组 (路径,) 为叶子槽位
+    相邻的静态片段合并，渲染时只需按顺序拼接
+    """
+    parts = []
+
+    def emit(chunk):
+        if parts and isinstance(parts[-1], str):
+            parts[-1] += chunk
+        else:
+            parts.append(chunk)
+
+    def walk(node, path):
+        if kind == _JSON_REQUEST:
+            emit('{')
+        for index, (key, child) in enumerate(node.items()):
+            child_path = path + (key,)
+            if kind == _XML_REQUEST:
+                if _is_leaf(child):
+                    emit('<%s>' % _xml_name(key))
+                    parts.append((child_path,))
+                    emit('</%s>' % _xml_name(key))
+                elif isinstance(child, dict):
+                    emit('<%s>' % _xml_name(key))
+                    walk(child, child_path)
+                    emit('</%s>' % _xml_name(key))
+            elif kind == _JSON_REQUEST:
+                emit((', ' if index else '') + json.dumps(str(key), ensure_ascii=False) + ': ')
+                if _is_leaf(child):
+                    parts.append((child_path,))
+                elif isinstance(child, dict):
+                    walk(child, child_path)
+                else:
+                    emit('null')
+            elif _is_leaf(child):
+                parts.append((child_path,))
+            elif isinstance(child, dict):
+                walk(child, child_path)
+        if kind == _JSON_REQUEST:
+            emit('}')
+
+    walk(tree, ())
+    return tuple(parts), frozenset(part[0] for part in parts if isinstance(part, tuple))
+
+
+def _render_leaf(kind, path, leaf):
+    value = leaf.get('value')
+    if kind == _XML_REQUEST:
+        return _escape(_text(value))
+    if kind == _JSON_REQUEST:
+        return json.dumps(value, ensure_ascii=False)
+    attributes = [('path', '.'.join(str(part) for part in path)), ('type', leaf.get('type'))]
+    attributes.extend((name, leaf.get(name)) for name in ('validation', 'saveAs'))
+    attributes.append(('expected', value))
+    return '<check %s/>' % ' '.join(
+        '%s=%s' % (name, _quoteattr(_text(item))) for name, item in attributes if item is not None and item != ''
+    )
+
+
+def _render(plan, kind, leaves, defaults):
+    """按渲染计划输出，叶子取组件参数树中的值，组件未提供的叶子使用模板默认值"""
+    parts, _ = plan
+    output = []
+    for part in parts:
+        if isinstance(part, str):
+            output.append(part)
+        else:
+            path = part[0]
+            output.append(_render_leaf(kind, path, leaves.get(path) or defaults[path]))
+    return ''.join(output)
+
+
+class CaseExporter:
+    """
+    用例导出器
+    template_params(组件类型, 模板路径) 返回模板的 {"rReq", "rRsp"}；aliases为 {组件类型: 导出元素名}；
+    request_formats为 {组件类型: "xml" | "json"}，决定请求参数树的输出格式（默认xml）
+    """
+
+    def __init__(self, template_params, aliases=None, request_formats=None, cache_size=4096):
+        self._template_params = template_params
+        self._aliases = aliases or {}
+        self._request_formats = request_formats or {}
+        self._plans = LRUCache(max_entries=cache_size)
+        self.compiled = 0
+        self.fallbacks = 0
+
+    def sync_version(self, version):
+        """模板目录变化时丢弃已编译的渲染计划"""
+        self._plans.sync_version(version)
+
+    def _template_plan(self, component_type, template_path):
+        """返回模板的 {参数名: (渲染方式, 渲染计划, 叶子默认值)}，模板不存在时返回空字典"""
+        key = (component_type, template_path)
+        plans = self._plans.get(key)
+        if plans is None:
+            params = self._template_params(component_type, template_path) or {}
+            plans = {}
+            for name in _TREE_PARAMS:
+                if isinstance(params.get(name), dict):
+                    kind = self._tree_kind(component_type, name)
+                    plans[name] = (kind, _compile(params[name], kind), _leaves(params[name]))
+                    self.compiled += 1
+            self._plans.put(key, plans)
+        return plans
+
+    def _tree_kind(self, component_type, name):
+        if name == 'rRsp':
+            return _CHECKS
+        return self._request_formats.get(component_type, _XML_REQUEST)
+
+    def _render_tree(self, component_type, name, tree, template_plans):
+        """渲染组件的rReq/rRsp：组件参数树的叶子都在模板中时复用模板的渲染计划，否则单独编译"""
+        template = template_plans.get(name)
+        leaves = _leaves(tree) if isinstance(tree, dict) else {}
+        if template is not None:
+            kind, plan, defaults = template
+            if leaves.keys() <= plan[1]:
+                return _render(plan, kind, leaves, defaults)
+        if not isinstance(tree, dict):
+            return None
+        self.fallbacks += 1
+        kind = self._tree_kind(component_type, name)
+        return _render(_compile(tree, kind), kind, leaves, leaves)
+
+    def _component_xml(self, component, indent):
+        component_type = component.get('type')
+        params = component.get('params') if isinstance(component.get('params'), dict) else {}
+        attributes = [('type', component_type), ('id', component.get('id')), ('name', component.get('name'))]
+        # 参数名转换为XML名称后可能与组件属性或其他参数重名（如 "a b" 和 "a_b"），重名时加下划线前缀直到唯一
+        used = set(_COMPONENT_ATTRIBUTES)
+        for name, value in params.items():
+            if name in _TREE_PARAMS and isinstance(value, dict) or value is None:
+                continue
+            attribute = _xml_name(name)
+            while attribute in used:
+                attribute = '_' + attribute
+            used.add(attribute)
+            attributes.append((attribute, value if not isinstance(value, (dict, list)) else json.dumps(value, ensure_ascii=False)))
+        element = _xml_name(self._aliases.get(component_type) or component_type or 'Component')
+        opening = '%s<%s' % (indent, element) + ''.join(
+            ' %s=%s' % (name, _quoteattr(_text(value))) for name, value in attributes if value is not None or name == 'type'
+        )
+
+        template_path = params.get('rTpl')
+        template_plans = self._template_plan(component_type, template_path) if isinstance(template_path, str) else {}
+        children = []
+        for name in _TREE_PARAMS:
+            tree = params.get(name)
+            if not isinstance(tree, dict) and name not in template_plans:
+                continue
+            rendered = self._render_tree(component_type, name, tree, template_plans)
+            if rendered is None:
+                continue
+            if self._tree_kind(component_type, name) == _JSON_REQUEST:
+                children.append('%s  <%s format="json">%s</%s>' % (indent, name, _escape(rendered), name))
+            else:
+                children.append('%s  <%s>%s</%s>' % (indent, name, rendered, name))
+        if not children:
+            return opening + '/>'
+        return '%s>\n%s\n%s</%s>' % (opening, '\n'.join(children), indent, element)
+
+    def render_case(self, case):
+        """将用例渲染为可执行的XML文档（bytes）"""
+        lines = [
+            '<?xml version="1.0" encoding="UTF-8"?>',
+            '<TestCase id=%s name=%s>' % (_quoteattr(_text(case.get('id'))), _quoteattr(_text(case.get('name'))))
+        ]
+        for section in CASE_SECTIONS:
+            blocks = case.get(section)
+            if not isinstance(blocks, list):
+                continue
+            lines.append('  <%s>' % SECTION_ELEMENTS[section])
+            for block in blocks:
+                if not isinstance(block, dict):
+                    continue
+                lines.append('    <Step id=%s name=%s>' % (_quoteattr(_text(block.get('id'))), _quoteattr(_text(block.get('name')))))
+                for component in block.get('components') or []:
+                    if isinstance(component, dict):
+                        lines.append(self._component_xml(component, '      '))
+                lines.append('    </Step>')
+            lines.append('  </%s>' % SECTION_ELEMENTS[section])
+        lines.append('</TestCase>')
+        return ('\n'.join(lines) + '\n').encode('utf-8')
+
+    def stats(self):
+        return dict(self._plans.stats(), compiled=self.compiled, fallbacks=self.fallbacks)
+
+
+def artifact_name(case, used):
+    """用例在压缩包中的文件名（按用例ID，重名时加序号）"""
+    base = _UNSAFE_FILENAME.sub('_', _text(case.get('id')) or 'case').strip('._') or 'case'
+    name = 'cases/%s.xml' % base
+    counter = 1
+    while name in used:
+        counter += 1
+        name = 'cases/%s_%d.xml' % (base, counter)
+    used.add(name)
+    return name
+
+
+class _ChunkWriter:
+    """zipfile的输出目标：收集写入的数据，由生成器取走后清空（不可seek，zipfile改用数据描述符记录大小）"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_export_zip(exporter, cases):
+    """
+    逐个渲染用例并写入zip，每写完一个文件即产出已压缩的数据（生成器）
+    压缩包末尾附 manifest.json，列出各用例的ID、名称和文件名
+    """
+    writer = _ChunkWriter()
+    manifest = []
+    used = set()
+    with zipfile.ZipFile(writer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for case in cases:
+            if not isinstance(case, dict):
+                continue
+            name = artifact_name(case, used)
+            archive.writestr(name, exporter.render_case(case))
+            manifest.append({"id": case.get('id'), "name": case.get('name'), "file": name})
+            chunk = writer.drain()
+            if chunk:
+                yield chunk
+        archive.writestr('manifest.json', json.dumps({"count": len(manifest), "cases": manifest}, ensure_ascii=False, indent=2))
+    yield writer.drain()
@@ -0,0 +1,144 @@
+"""
+历史用例批量导入
+逐行解析NDJSON（每行一个用例），校验结构后按批写入案例库，内存占用只与批大小有关，与导入文件大小无关
+"""
+
+import json
+
+from case_store import LIBRARY_ALL, LIBRARY_ARCHIVED
+
+# 每个事务写入的用例数
+IMPORT_BATCH_SIZE = 500
+
+# 单行最大字节数，超长的行按失败处理
+MAX_LINE_BYTES = 4 * 1024 * 1024
+
+# 读取请求体的块大小
+READ_CHUNK_BYTES = 64 * 1024
+
+# 导入结果中最多返回的错误明细条数
+MAX_REPORTED_ERRORS = 100
+
+_SECTION_KEYS = ('preconditions', 'steps', 'expectedResults')
+
+
+def validate_case_shape(case):
+    """校验用例的基本结构，返回错误信息列表（为空表示合法）"""
+    if not isinstance(case, dict):
+        return ['用例必须是JSON对象']
+    errors = []
+    for key in ('id', 'name'):
+        if not isinstance(case.get(key), str) or not case[key].strip():
+            errors.append('%s必须是非空字符串' % key)
+    if case.get('library', LIBRARY_ALL) not in (LIBRARY_ALL, LIBRARY_ARCHIVED):
+        errors.append('library只能是%s或%s' % (LIBRARY_ALL, LIBRARY_ARCHIVED))
+    for section_key in _SECTION_KEYS:
+        sections = case.get(section_key, [])
+        if not isinstance(sections, list):
+            errors.append('%s必须是数组' % section_key)
+            continue
+        for i, section in enumerate(sections):
+            path = '%s[%d]' % (section_key, i)
+            if not isinstance(section, dict):
+                errors.append('%s必须是对象' % path)
+                continue
+            if not isinstance(section.get('name', ''), str):
+                errors.append('%s.name必须是字符串' % path)
+            components = section.get('components', [])
+            if not isinstance(components, list):
+                errors.append('%s.components必须是数组' % path)
+                continue
+            for j, component in enumerate(components):
+                component_path = '%s.components[%d]' % (path, j)
+                if not isinstance(component, dict):
+                    errors.append('%s必须是对象' % component_path)
+                    continue
+                if not isinstance(component.get('type'), str) or not component['type']:
+                    errors.append('%s.type必须是非空字符串' % component_path)
+                if not isinstance(component.get('name', ''), str):
+                    errors.append('%s.name必须是字符串' % component_path)
+                if not isinstance(component.get('params', {}), dict):
+                    errors.append('%s.params必须是对象' % component_path)
+    return errors
+
+
+def iter_lines(stream, max_line_bytes=MAX_LINE_BYTES, chunk_size=READ_CHUNK_BYTES):
+    """
+    从二进制流中按块读取并逐行切分，产出 (行号, 行内容bytes或None)
+    超过max_line_bytes的行产出None并丢弃其剩余部分；不依赖流自身的readline（WSGI输入流逐字节读取很慢）
+    """
+    line_no = 0
+    pending = b''
+    oversized = False
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        scan_from = len(pending)
+        pending += chunk
+        start = 0
+        while True:
+            end = pending.find(b'\n', max(start, scan_from))
+            if end < 0:
+                break
+            line_no += 1
+            if oversized:
+                oversized = False
+                yield line_no, None
+            else:
+                yield line_no, pending[start:end]
+            start = end + 1
+        pending = pending[start:]
+        if len(pending) > max_line_bytes:
+            # 超长行：丢弃已读取部分，直到下一个换行符
+            oversized = True
+            pending = b''
+    if oversized:
+        yield line_no + 1, None
+    elif pending:
+        yield line_no + 1, pending
+
+
+def import_ndjson(store, stream, skip_existing=False, batch_size=IMPORT_BATCH_SIZE):
+    """
+    从NDJSON流导入用例到案例库
+    skip_existing为True时跳过ID已存在的用例，否则覆盖
+    返回 {"imported", "inserted", "updated", "skipped", "failed", "errors"}
+    """
+    summary = {"imported": 0, "inserted": 0, "updated": 0, "skipped": 0, "failed": 0, "errors": []}
+
+    def fail(line_no, message):
+        summary['failed'] += 1
+        if len(summary['errors']) < MAX_REPORTED_ERRORS:
+            summary['errors'].append({"line": line_no, "message": message})
+
+    def flush(batch):
+        result = store.upsert_cases(batch, skip_existing=skip_existing)
+        summary['inserted'] += result['inserted']
+        summary['updated'] += result['updated']
+        summary['skipped'] += result['skipped']
+        summary['imported'] += result['inserted'] + result['updated']
+
+    batch = []
+    for line_no, line in iter_lines(stream):
+        if line is None:
+            fail(line_no, '行长度超过%d字节' % MAX_LINE_BYTES)
+            continue
+        if not line.strip():
+            continue
+        try:
+            case = json.loads(line)
+        except ValueError as error:
+            fail(line_no, 'JSON解析失败: %s' % error)
+            continue
+        errors = validate_case_shape(case)
+        if errors:
+            fail(line_no, '; '.join(errors))
+            continue
+        batch.append(case)
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+    if batch:
+        flush(batch)
+    return summary
@@ -0,0 +1,726 @@
+"""
+历史用例案例库存储引擎
+用例持久化在磁盘SQLite数据库中：cases表保存完整用例及其所属案例库（带索引）和各检索字段的原文，
+名称、步骤名称、组件名称和组件参数的倒排索引（字段加权BM25）和语义向量以内存映射文件存放；
+进程内存不随案例库规模增长，重启后直接打开即可使用，无需重建任何索引
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from collections import Counter
+
+import numpy as np
+
+from bm25_index import Bm25Index
+from compact_case import CompactCaseCache
+from search_index import MATCH_EXACT, MATCH_PREFIX, MATCH_SUFFIX, iter_terms, query_terms
+from vector_index import HashingVectorizer, VectorIndex, case_semantic_fields
+
+SCHEMA_VERSION = 3
+
+# 案例库取值，与 CASE_LIBRARY_OPTIONS 对应：all为全量案例库（包含已归档用例），archived为已归档精品案例库
+LIBRARY_ALL = 'all'
+LIBRARY_ARCHIVED = 'archived'
+
+# 向量索引中的案例库标签（0表示空行）
+_LIBRARY_TAGS = {LIBRARY_ALL: 1, LIBRARY_ARCHIVED: 2}
+
+# 检索字段，与cases表中保存原文的列对应
+SEARCH_COLUMNS = ('name', 'step_names', 'component_names', 'component_params')
+
+# 各检索字段的BM25权重，顺序与SEARCH_COLUMNS一致：用例名称 > 步骤名称 > 组件名称 > 组件参数
+FIELD_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+
+# 前缀/后缀/包含约束展开的词项数上限，超过时放弃该约束，由子串校验兜底
+MAX_TERM_EXPANSION = 256
+
+# 词项ID缓存的条目上限
+_TERM_ID_CACHE_SIZE = 200000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cases (
+    seq INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    library TEXT NOT NULL DEFAULT 'all',
+    step_names TEXT NOT NULL DEFAULT '',
+    component_names TEXT NOT NULL DEFAULT '',
+    component_params TEXT NOT NULL DEFAULT '',
+    precondition_count INTEGER NOT NULL DEFAULT 0,
+    step_count INTEGER NOT NULL DEFAULT 0,
+    expected_result_count INTEGER NOT NULL DEFAULT 0,
+    component_count INTEGER NOT NULL DEFAULT 0,
+    body TEXT NOT NULL,
+    updated_version INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_cases_library ON cases(library, seq);
+CREATE INDEX IF NOT EXISTS idx_cases_updated_version ON cases(updated_version);
+CREATE TABLE IF NOT EXISTS bm25_terms (
+    id INTEGER PRIMARY KEY,
+    term TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def _param_texts(value):
+    """递归提取组件参数中的文本值；rReq/rRsp参数树只取节点的value和saveAs"""
+    if isinstance(value, dict):
+        if 'type' in value and 'value' in value:
+            yield from _param_texts(value.get('value'))
+            yield from _param_texts(value.get('saveAs'))
+            return
+        for item in value.values():
+            yield from _param_texts(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _param_texts(item)
+    elif isinstance(value, str):
+        if value:
+            yield value
+    elif value is not None and not isinstance(value, bool):
+        yield str(value)
+
+
+def case_search_fields(case):
+    """提取用例各检索字段的原始文本，多段文本以换行分隔"""
+    step_names, component_names, component_params = [], [], []
+    for section_key in ('preconditions', 'steps', 'expectedResults'):
+        for section in case.get(section_key) or []:
+            step_names.append(section.get('name') or '')
+            for component in section.get('components') or []:
+                component_names.append(component.get('name') or '')
+                component_params.extend(_param_texts(component.get('params')))
+    return {
+        'name': case.get('name') or '',
+        'step_names': '\n'.join(step_names),
+        'component_names': '\n'.join(component_names),
+        'component_params': '\n'.join(component_params)
+    }
+
+
+def case_counts(case):
+    """统计用例的前置条件/步骤/预期结果/组件数量，顺序与cases表的计数列一致"""
+    sections = [case.get(key) or [] for key in ('preconditions', 'steps', 'expectedResults')]
+    component_count = sum(len(section.get('components') or []) for items in sections for section in items)
+    return tuple(len(items) for items in sections) + (component_count,)
+
+
+def _migrate_v2(conn):
+    """v2: 增加用例计数列，供搜索结果摘要使用，避免读取完整用例"""
+    for column in ('precondition_count', 'step_count', 'expected_result_count', 'component_count'):
+        conn.execute('ALTER TABLE cases ADD COLUMN %s INTEGER NOT NULL DEFAULT 0' % column)
+    rows = conn.execute('SELECT seq, body FROM cases').fetchall()
+    for seq, body in rows:
+        conn.execute(
+            'UPDATE cases SET precondition_count = ?, step_count = ?, expected_result_count = ?, '
+            'component_count = ? WHERE seq = ?',
+            case_counts(json.loads(body)) + (seq,)
+        )
+
+
+def _migrate_v3(conn):
+    """
+    v3: 关键字检索改由BM25排序索引完成，删除FTS5表，增加词项表和用例写入版本列；
+    排序索引文件在打开案例库时从cases表中的检索字段原文构建
+    """
+    conn.execute('DROP TABLE IF EXISTS case_fts_vocab')
+    conn.execute('DROP TABLE IF EXISTS case_fts')
+    conn.execute('ALTER TABLE cases ADD COLUMN updated_version INTEGER NOT NULL DEFAULT 0')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_cases_updated_version ON cases(updated_version)')
+    conn.execute('CREATE TABLE IF NOT EXISTS bm25_terms (id INTEGER PRIMARY KEY, term TEXT NOT NULL UNIQUE)')
+
+
+# 数据库迁移：键为迁移后的版本号
+_MIGRATIONS = {
+    2: _migrate_v2,
+    3: _migrate_v3
+}
+
+
+def _field_terms(fields):
+    """按SEARCH_COLUMNS的顺序返回各检索字段的词项列表"""
+    return [list(iter_terms(fields[column].lower())) for column in SEARCH_COLUMNS]
+
+
+class VersionConflictError(Exception):
+    """用例已被修改，当前版本与请求的版本不一致"""
+
+    def __init__(self, current_version):
+        super().__init__('用例已被修改，当前版本为%d' % current_version)
+        self.current_version = current_version
+
+
+class CaseStore:
+    """
+    SQLite案例库，每个线程持有独立连接，写操作串行化
+    seq为用例的内部序号，同时作为BM25排序索引的文档键和向量索引的行号
+    """
+
+    def __init__(self, path, vectorizer=None, cache_size=0):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._write_lock = threading.RLock()
+        self._expansions = {}
+        self._expansions_version = None
+        self._term_id_cache = {}
+        self._ranking_lock = threading.RLock()
+        self._ranked_count = None
+        self.vectorizer = vectorizer or HashingVectorizer()
+        # cache_size大于0时最近读取的完整用例以紧凑表示缓存在进程内，读取时展开为dict；默认不缓存
+        self.cache = CompactCaseCache(max_entries=cache_size)
+        with self._write_lock:
+            self._init_schema()
+            base_path = os.path.splitext(path)[0]
+            self.vectors = VectorIndex(self.vectorizer.dim, path=base_path + '.vectors')
+            self._sync_vectors()
+            self.ranking = Bm25Index(base_path + '.bm25', FIELD_WEIGHTS)
+            self._ranking_version = self.ranking.base_version
+            with self._connection():
+                # 首次打开（或迁移后）需要为全部用例的词项分配ID
+                self._refresh_ranking(create_terms=True)
+            self._merge_ranking_if_needed()
+
+    # ============ 连接与元数据 ============
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def _init_schema(self):
+        conn = self._connection()
+        user_version = conn.execute('PRAGMA user_version').fetchone()[0]
+        if user_version > SCHEMA_VERSION:
+            raise RuntimeError('案例库数据库版本%d高于程序支持的版本%d' % (user_version, SCHEMA_VERSION))
+        with conn:
+            if user_version == 0:
+                conn.executescript(_SCHEMA)
+            else:
+                for version in range(user_version + 1, SCHEMA_VERSION + 1):
+                    _MIGRATIONS[version](conn)
+            conn.execute('PRAGMA user_version = %d' % SCHEMA_VERSION)
+
+    def _get_meta(self, key, default=None):
+        row = self._connection().execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else default
+
+    @staticmethod
+    def _set_meta(conn, key, value):
+        conn.execute(
+            'INSERT INTO meta(key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value',
+            (key, str(value))
+        )
+
+    @property
+    def version(self):
+        """案例库版本号，用例每次新增或修改后递增"""
+        return int(self._get_meta('library_version', 0))
+
+    def count(self, library=LIBRARY_ALL):
+        conn = self._connection()
+        if library == LIBRARY_ALL:
+            return conn.execute('SELECT COUNT(*) FROM cases').fetchone()[0]
+        return conn.execute('SELECT COUNT(*) FROM cases WHERE library = ?', (library,)).fetchone()[0]
+
+    # ============ 写入 ============
+
+    def _vector_tag(self, library):
+        return _LIBRARY_TAGS.get(library, _LIBRARY_TAGS[LIBRARY_ALL])
+
+    def _term_ids(self, conn, terms, create=False):
+        """把词项映射为BM25排序索引的词项ID，返回 {term: id}；create为True时为新词项分配ID"""
+        ids, missing = {}, []
+        for term in terms:
+            term_id = self._term_id_cache.get(term)
+            if term_id is None:
+                missing.append(term)
+            else:
+                ids[term] = term_id
+        if missing:
+            if create:
+                conn.executemany('INSERT OR IGNORE INTO bm25_terms(term) VALUES (?)', [(term,) for term in missing])
+            if len(self._term_id_cache) + len(missing) > _TERM_ID_CACHE_SIZE:
+                self._term_id_cache.clear()
+            for start in range(0, len(missing), 500):
+                chunk = missing[start:start + 500]
+                rows = conn.execute(
+                    'SELECT term, id FROM bm25_terms WHERE term IN (%s)' % ','.join('?' * len(chunk)), chunk
+                )
+                for term, term_id in rows:
+                    ids[term] = self._term_id_cache[term] = term_id
+        return ids
+
+    def _index_ranking(self, conn, seq, field_terms, create=False):
+        """把用例各字段的词项写入BM25排序索引的增量段"""
+        ids = self._term_ids(conn, set().union(*field_terms), create)
+        field_term_ids = [[ids[term] for term in terms if term in ids] for terms in field_terms]
+        with self._ranking_lock:
+            self.ranking.set_document(seq, field_term_ids)
+
+    def _write_case(self, conn, case, version, skip_existing=False):
+        """写入或覆盖单个用例及其检索词项，返回(seq, 'inserted' | 'updated' | 'skipped')"""
+        row = conn.execute('SELECT seq FROM cases WHERE id = ?', (case['id'],)).fetchone()
+        if row and skip_existing:
+            return row[0], 'skipped'
+        library = case.get('library') or LIBRARY_ALL
+        fields = case_search_fields(case)
+        values = (
+            fields['name'], library, fields['step_names'], fields['component_names'],
+            fields['component_params']
+        ) + case_counts(case) + (json.dumps(case, ensure_ascii=False), version)
+        if row:
+            seq = row[0]
+            conn.execute(
+                'UPDATE cases SET name = ?, library = ?, step_names = ?, component_names = ?, '
+                'component_params = ?, precondition_count = ?, step_count = ?, expected_result_count = ?, '
+                'component_count = ?, body = ?, updated_version = ? WHERE seq = ?',
+                values + (seq,)
+            )
+        else:
+            seq = conn.execute(
+                'INSERT INTO cases(name, library, step_names, component_names, component_params, '
+                'precondition_count, step_count, expected_result_count, component_count, body, '
+                'updated_version, id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                values + (case['id'],)
+            ).lastrowid
+        self._index_ranking(conn, seq, _field_terms(fields), create=True)
+        self.vectors.upsert(
+            seq, self.vectorizer.transform(case_semantic_fields(case)), self._vector_tag(library)
+        )
+        return seq, 'updated' if row else 'inserted'
+
+    def _write(self, write):
+        """
+        在一个事务中执行 write(conn, version)，其返回 (是否写入了用例, 结果)，本方法返回该结果；
+        写入了用例时递增案例库版本，并同步排序索引和向量索引的版本
+        """
+        with self._write_lock:
+            self._refresh_ranking()
+            conn = self._connection()
+            try:
+                with conn:
+                    # 写入版本在事务内读取，事务持有写锁期间不会被其他进程改变
+                    conn.execute('INSERT OR IGNORE INTO meta(key, value) VALUES (?, ?)', ('library_version', '0'))
+                    version = self.version + 1
+                    written, result = write(conn, version)
+                    if written:
+                        self._set_meta(conn, 'library_version', version)
+                    else:
+                        version -= 1
+            except Exception:
+                # 回滚后已写入增量段的文档和缓存的词项ID不再有效
+                self._term_id_cache.clear()
+                self._reset_ranking()
+                raise
+            if self._ranking_version == version - 1:
+                self._ranking_version = version
+            self._mark_vectors_synced(version)
+            self._merge_ranking_if_needed()
+        return result
+
+    def upsert_cases(self, cases, skip_existing=False):
+        """
+        在一个事务中写入一批用例（按id匹配，已存在时覆盖；skip_existing为True时跳过已存在的用例）
+        返回 {"inserted": n, "updated": n, "skipped": n}
+        """
+        def write(conn, version):
+            result = {"inserted": 0, "updated": 0, "skipped": 0}
+            for case in cases:
+                _, outcome = self._write_case(conn, case, version, skip_existing)
+                result[outcome] += 1
+            return bool(result['inserted'] or result['updated']), result
+        return self._write(write)
+
+    def patch_case(self, case_id, patch, expected_versions=None):
+        """
+        修改单个用例：在写事务中读取用例，patch(case) 原地修改并返回修改后的用例，再写回同一行。
+        expected_versions不为None时用例的当前版本必须在其中，否则抛出VersionConflictError（乐观并发控制）；
+        patch抛出的异常原样抛出，修改后的用例结构不正确时抛出ValueError，均不写入任何内容。
+        检索字段或语义字段没有变化时不更新BM25排序索引或语义向量（例如只修改了参数树叶子的type/validation）
+        返回 (修改后的用例, 新版本)，用例不存在时返回None
+        """
+        # case_import依赖本模块，在调用时导入
+        from case_import import validate_case_shape
+
+        def write(conn, version):
+            row = conn.execute(
+                'SELECT seq, library, body, updated_version, name, step_names, component_names, component_params '
+                'FROM cases WHERE id = ?', (case_id,)
+            ).fetchone()
+            if row is None:
+                return False, None
+            seq, library, body, current_version = row[:4]
+            if expected_versions is not None and current_version not in expected_versions:
+                return False, VersionConflictError(current_version)
+            case = json.loads(body)
+            old_semantic_fields = case_semantic_fields(case)
+            try:
+                case = patch(case)
+            except Exception as error:
+                return False, error
+            if not isinstance(case, dict) or case.get('id') != case_id:
+                return False, ValueError('不能修改用例ID')
+            errors = validate_case_shape(case)
+            if errors:
+                return False, ValueError('修改后的用例结构不正确: %s' % '；'.join(errors[:5]))
+            old_fields = dict(zip(SEARCH_COLUMNS, row[4:]))
+            self._rewrite_case(conn, seq, case, version, old_fields, old_semantic_fields, library)
+            return True, (case, version)
+
+        result = self._write(write)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def _rewrite_case(self, conn, seq, case, version, old_fields, old_semantic_fields, old_library):
+        """覆盖已有用例，只更新内容有变化的索引"""
+        library = case.get('library') or LIBRARY_ALL
+        fields = case_search_fields(case)
+        conn.execute(
+            'UPDATE cases SET name = ?, library = ?, step_names = ?, component_names = ?, '
+            'component_params = ?, precondition_count = ?, step_count = ?, expected_result_count = ?, '
+            'component_count = ?, body = ?, updated_version = ? WHERE seq = ?',
+            (fields['name'], library, fields['step_names'], fields['component_names'], fields['component_params'])
+            + case_counts(case) + (json.dumps(case, ensure_ascii=False), version, seq)
+        )
+        if fields != old_fields:
+            self._index_ranking(conn, seq, _field_terms(fields), create=True)
+        semantic_fields = case_semantic_fields(case)
+        if library != old_library or semantic_fields != old_semantic_fields:
+            self.vectors.upsert(seq, self.vectorizer.transform(semantic_fields), self._vector_tag(library))
+
+    def seed(self, cases):
+        """案例库为空时写入初始用例"""
+        with self._write_lock:
+            if self.count() == 0:
+                self.upsert_cases(cases)
+
+    # ============ 向量索引同步 ============
+
+    def _mark_vectors_synced(self, version):
+        self.vectors.flush()
+        conn = self._connection()
+        with conn:
+            self._set_meta(conn, 'vectors_version', version)
+
+    def _sync_vectors(self):
+        """向量文件缺失或落后于案例库（如写入过程中进程退出）时从数据库重建"""
+        version = self.version
+        if int(self._get_meta('vectors_version', -1)) == version and len(self.vectors) == self.count():
+            return
+        self.vectors.clear()
+        cursor = self._connection().execute('SELECT seq, library, body FROM cases ORDER BY seq')
+        while True:
+            rows = cursor.fetchmany(500)
+            if not rows:
+                break
+            for seq, library, body in rows:
+                vector = self.vectorizer.transform(case_semantic_fields(json.loads(body)))
+                self.vectors.upsert(seq, vector, self._vector_tag(library))
+        self._mark_vectors_synced(version)
+
+    # ============ BM25排序索引同步 ============
+
+    def _reset_ranking(self):
+        """丢弃增量段，从基础段的版本开始重新加载"""
+        with self._ranking_lock:
+            self.ranking.reset_delta()
+            self._ranking_version = self.ranking.base_version
+        self._refresh_ranking()
+
+    def _refresh_ranking(self, create_terms=False):
+        """把基础段之后写入的用例（包括其他进程写入的）加载到排序索引的增量段"""
+        version = self.version
+        if version == self._ranking_version:
+            return
+        conn = self._connection()
+        with self._ranking_lock:
+            if self.ranking.reload_if_replaced():
+                self._ranking_version = self.ranking.base_version
+            cursor = conn.execute(
+                'SELECT seq, name, step_names, component_names, component_params FROM cases '
+                'WHERE updated_version > ?', (self._ranking_version,)
+            )
+            while True:
+                rows = cursor.fetchmany(500)
+                if not rows:
+                    break
+                for row in rows:
+                    self._index_ranking(
+                        conn, row[0], _field_terms(dict(zip(SEARCH_COLUMNS, row[1:]))), create_terms
+                    )
+            self._ranking_version = version
+
+    def _merge_ranking_if_needed(self):
+        """增量段积累到一定规模时合并进基础段；合并期间持有数据库写锁，避免多个进程同时合并"""
+        if not self.ranking.needs_merge():
+            return
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            self._refresh_ranking()
+            with self._ranking_lock:
+                if self.ranking.needs_merge():
+                    term_count = conn.execute('SELECT COALESCE(MAX(id), 0) + 1 FROM bm25_terms').fetchone()[0]
+                    self.ranking.merge(self._ranking_version, term_count)
+        finally:
+            conn.commit()
+
+    def _ranked_doc_count(self):
+        """案例库的用例总数（用于计算IDF），按案例库版本缓存"""
+        version = self._ranking_version
+        if self._ranked_count is None or self._ranked_count[0] != version:
+            self._ranked_count = (version, self.count())
+        return self._ranked_count[1]
+
+    # ============ 查询 ============
+
+    def _expand(self, fragment, mode):
+        """在词项表中查找以fragment开头(prefix)、结尾(suffix)或包含fragment(infix)的词项，结果按案例库版本缓存"""
+        version = self.version
+        if self._expansions_version != version:
+            self._expansions = {}
+            self._expansions_version = version
+        key = (fragment, mode)
+        terms = self._expansions.get(key)
+        if terms is None:
+            if mode == MATCH_PREFIX:
+                sql = 'SELECT term FROM bm25_terms WHERE term >= ?1 AND term < ?1 || char(1114111) LIMIT ?2'
+            elif mode == MATCH_SUFFIX:
+                sql = 'SELECT term FROM bm25_terms WHERE substr(term, -length(?1)) = ?1 LIMIT ?2'
+            else:
+                sql = 'SELECT term FROM bm25_terms WHERE instr(term, ?1) > 0 LIMIT ?2'
+            terms = [row[0] for row in self._connection().execute(sql, (fragment, MAX_TERM_EXPANSION + 1))]
+            if len(self._expansions) >= 1024:
+                self._expansions.clear()
+            self._expansions[key] = terms
+        return terms
+
+    def _term_groups(self, constraints):
+        """
+        把查询的词项约束转换为BM25排序索引的词项ID组：组内为"或"关系，组间为"与"关系
+        返回None表示查询中没有可用的词项约束（需要逐条校验）；词表中不存在的词项得到空组，必然无结果
+        """
+        groups = []
+        conn = self._connection()
+        for term, mode in constraints:
+            if mode == MATCH_EXACT:
+                terms = [term]
+            else:
+                terms = self._expand(term, mode)
+                if len(terms) > MAX_TERM_EXPANSION:
+                    continue
+            groups.append(list(self._term_ids(conn, terms).values()))
+        return groups or None
+
+    def list_seqs(self, library=LIBRARY_ALL, after_seq=0, limit=None):
+        """按入库顺序返回案例库中seq大于after_seq的用例seq列表"""
+        sql, params = 'SELECT seq FROM cases WHERE seq > ?', [after_seq]
+        if library != LIBRARY_ALL:
+            sql += ' AND library = ?'
+            params.append(library)
+        sql += ' ORDER BY seq'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        return [seq for seq, in self._connection().execute(sql, params)]
+
+    def keyword_search(self, text, library=LIBRARY_ALL, after=None, limit=None):
+        """
+        返回用例名称、步骤名称、组件名称或组件参数中包含text（大小写不敏感）的用例 [(seq, score), ...]
+        按字段加权BM25得分降序、seq升序排列；after=(score, seq)用于分页，只返回排在该位置之后的前limit个结果
+        全部候选用例的得分由排序索引一次向量化算出，只有排在前面的候选需要读取原文做子串校验
+        """
+        lowered = text.lower()
+        constraints = query_terms(lowered)
+        groups = self._term_groups(constraints)
+        if groups is None:
+            return self._scan_search(lowered, library, after, limit)
+        # 查询本身就是单个词项时，命中该词项（或包含它的词项）即包含查询子串，无需读取原文校验
+        verified = len(constraints) == 1 and len(groups) == 1 and constraints[0][0] == lowered
+
+        with self._ranking_lock:
+            self._refresh_ranking()
+            scores, matched = self.ranking.score(groups, self._ranked_doc_count())
+        if library != LIBRARY_ALL:
+            self.vectors.reload_if_replaced()
+            matched &= self.vectors.tag_rows(_LIBRARY_TAGS.get(library, 0), len(matched))
+        if after is not None:
+            after_score, after_seq = after
+            matched &= (scores < after_score) | (
+                (scores == after_score) & (np.arange(len(scores)) > after_seq)
+            )
+        candidates = np.flatnonzero(matched)
+        candidate_scores = scores[candidates]
+
+        hits = []
+        batch = max(limit or 0, 16) * 2
+        while len(candidates) and (limit is None or len(hits) < limit):
+            if limit is not None and batch < len(candidates):
+                # 只排序得分最高的一批候选；与边界得分相同的候选一并取出，保证同分时按seq排序
+                threshold = np.partition(candidate_scores, len(candidates) - batch)[len(candidates) - batch]
+                taken = candidate_scores >= threshold
+            else:
+                taken = np.ones(len(candidates), dtype=bool)
+            seqs, seq_scores = candidates[taken], candidate_scores[taken]
+            candidates, candidate_scores = candidates[~taken], candidate_scores[~taken]
+            order = np.lexsort((seqs, -seq_scores))
+            if verified:
+                hits.extend((int(seqs[index]), float(seq_scores[index])) for index in order[:limit])
+                continue
+            for start in range(0, len(order), 500):
+                chunk = order[start:start + 500]
+                texts = {
+                    row[0]: row[1:]
+                    for row in self._select_by_seqs(', '.join(SEARCH_COLUMNS), seqs[chunk].tolist())
+                }
+                for index in chunk:
+                    seq = int(seqs[index])
+                    fields = texts.get(seq)
+                    if fields and any(lowered in field.lower() for field in fields):
+                        hits.append((seq, float(seq_scores[index])))
+                        if limit is not None and len(hits) >= limit:
+                            return hits
+            batch *= 2
+        return hits
+
+    def _scan_search(self, lowered, library, after, limit):
+        """查询中没有可用的词项约束时逐条校验，无法计算相关性得分，结果按seq排列且得分均为0"""
+        sql = 'SELECT seq, %s FROM cases WHERE seq > ?' % ', '.join(SEARCH_COLUMNS)
+        params = [after[1] if after is not None else 0]
+        if library != LIBRARY_ALL:
+            sql += ' AND library = ?'
+            params.append(library)
+        hits = []
+        for row in self._connection().execute(sql + ' ORDER BY seq', params):
+            if any(lowered in field.lower() for field in row[1:]):
+                hits.append((row[0], 0.0))
+                if limit is not None and len(hits) >= limit:
+                    break
+        return hits
+
+    def semantic_search(self, text, library=LIBRARY_ALL, k=20):
+        """返回与text语义最相似的k个用例 [(seq, score), ...]，按相似度降序"""
+        self.vectors.reload_if_replaced()
+        tag = None if library == LIBRARY_ALL else _LIBRARY_TAGS.get(library)
+        if library != LIBRARY_ALL and tag is None:
+            return []
+        return self.vectors.search(self.vectorizer.transform_query(text), k, tag)
+
+    # ============ 读取 ============
+
+    def _select_by_seqs(self, columns, seqs):
+        if not seqs:
+            return []
+        placeholders = ','.join('?' * len(seqs))
+        return self._connection().execute(
+            'SELECT seq, %s FROM cases WHERE seq IN (%s)' % (columns, placeholders), list(seqs)
+        ).fetchall()
+
+    def get_summaries(self, seqs):
+        """批量读取用例摘要，返回 {seq: summary}，不读取完整用例内容"""
+        return {
+            seq: {
+                "id": case_id,
+                "name": name,
+                "library": library,
+                "preconditionCount": precondition_count,
+                "stepCount": step_count,
+                "expectedResultCount": expected_result_count,
+                "componentCount": component_count
+            }
+            for seq, case_id, name, library, precondition_count, step_count, expected_result_count, component_count
+            in self._select_by_seqs(
+                'id, name, library, precondition_count, step_count, expected_result_count, component_count', seqs
+            )
+        }
+
+    def _sync_cache(self):
+        """案例库版本变化（包括其他进程写入）时，从用例缓存中丢弃之后新增或修改的用例，返回当前版本"""
+        version = self.version
+        self.cache.sync(version, self._changed_seqs)
+        return self.cache.version
+
+    def _changed_seqs(self, since_version):
+        return [row[0] for row in self._connection().execute(
+            'SELECT seq FROM cases WHERE updated_version > ?', (since_version,)
+        )]
+
+    def get_cases(self, seqs, cache=True):
+        """
+        批量读取完整用例，返回 {seq: case}；启用用例缓存时优先从缓存中展开，未缓存的用例读取后写入缓存
+        （未启用时直接读取，不查询案例库版本）。cache为False时不写入缓存（导出、校验整个案例库等批量扫描，避免挤出常用的用例）
+        """
+        if not self.cache.enabled:
+            return {seq: json.loads(body) for seq, body in self._select_by_seqs('body', seqs)}
+        version = self._sync_cache()
+        cases, missing = {}, []
+        for seq in seqs:
+            case = self.cache.get(seq)
+            if case is None:
+                missing.append(seq)
+            else:
+                cases[seq] = case
+        for seq, body in self._select_by_seqs('body', missing):
+            case = cases[seq] = json.loads(body)
+            if cache:
+                self.cache.put(seq, case, version)
+        return cases
+
+    def name_usage(self, template_paths=()):
+        """
+        统计用例名称、步骤名称和模板的使用次数，返回 (用例名称Counter, 步骤名称Counter, 模板Counter)
+        模板按组件参数中与template_paths之一完全相同的取值计数；只读取检索字段列，不解析完整用例
+        """
+        case_names, step_names, templates = Counter(), Counter(), Counter()
+        template_paths = set(template_paths)
+        cursor = self._connection().execute('SELECT name, step_names, component_params FROM cases')
+        while True:
+            rows = cursor.fetchmany(1000)
+            if not rows:
+                break
+            for name, steps, params in rows:
+                case_names[name] += 1
+                if steps:
+                    step_names.update(steps.split('\n'))
+                if template_paths and params:
+                    templates.update(value for value in params.split('\n') if value in template_paths)
+        step_names.pop('', None)
+        return case_names, step_names, templates
+
+    def iter_changed_cases(self, since_version=0):
+        """逐批读取案例库版本since_version之后新增或修改的用例，产出 (seq, library, case)"""
+        cursor = self._connection().execute(
+            'SELECT seq, library, body FROM cases WHERE updated_version > ? ORDER BY seq', (since_version,)
+        )
+        while True:
+            rows = cursor.fetchmany(500)
+            if not rows:
+                break
+            for seq, library, body in rows:
+                yield seq, library, json.loads(body)
+
+    def get_versioned_case(self, case_id):
+        """按用例ID读取完整用例及其版本（最后一次写入时的案例库版本），不存在时返回None"""
+        row = self._connection().execute('SELECT seq, updated_version FROM cases WHERE id = ?', (case_id,)).fetchone()
+        if row is None:
+            return None
+        case = self.get_cases([row[0]]).get(row[0])
+        return (case, row[1]) if case is not None else None
+
+    def get_case(self, case_id):
+        """按用例ID读取完整用例，不存在时返回None"""
+        row = self._connection().execute('SELECT seq FROM cases WHERE id = ?', (case_id,)).fetchone()
+        return self.get_cases([row[0]]).get(row[0]) if row else None
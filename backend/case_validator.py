@@ -0,0 +1,228 @@
+"""
+用例校验引擎
+按组件参数配置架构（/api/param-schemas）校验用例中每个组件的参数：必填字段、下拉选项、模板路径和取值类型。
+每种组件类型的架构在构造时编译一次为校验函数（必填字段、已知字段集合、各字段的检查函数都预先算好），
+校验时每个组件只做一次字典查找和若干集合/类型判断，不再遍历架构定义
+
+问题分为两级：error（不符合架构，用例无效）和 warning（没有架构的组件类型、架构未定义的参数），
+warning不影响用例是否有效
+"""
+
+from template_registry import normalize_template_path
+
+LEVEL_ERROR = 'error'
+LEVEL_WARNING = 'warning'
+
+# 问题代码
+CODE_STRUCTURE = 'structure'
+CODE_REQUIRED = 'required'
+CODE_OPTION = 'option'
+CODE_TEMPLATE = 'template'
+CODE_TYPE = 'type'
+CODE_UNKNOWN_FIELD = 'unknownField'
+CODE_NO_SCHEMA = 'noSchema'
+
+CASE_SECTIONS = ('preconditions', 'steps', 'expectedResults')
+
+_SCALAR_TYPES = (str, int, float, bool)
+
+
+def _is_empty(value):
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def _is_dynamic(value):
+    """包含 ${...} 占位符的取值在执行时才确定，不按静态选项校验"""
+    return isinstance(value, str) and '${' in value
+
+
+def _check_scalar(value):
+    if not isinstance(value, _SCALAR_TYPES):
+        return CODE_TYPE, '取值必须是字符串或数字'
+    return None
+
+
+def _check_tree(value):
+    if not isinstance(value, (dict, str)):
+        return CODE_TYPE, '取值必须是参数树对象'
+    return None
+
+
+def _option_check(options):
+    allowed = frozenset(options)
+
+    def check(value):
+        if not isinstance(value, _SCALAR_TYPES):
+            return CODE_TYPE, '取值必须是字符串'
+        if value not in allowed and not _is_dynamic(value):
+            return CODE_OPTION, '取值 %s 不在可选项中' % value
+        return None
+    return check
+
+
+def _template_check(templates):
+    allowed = frozenset(normalize_template_path(path) for path in templates)
+
+    def check(value):
+        if not isinstance(value, str):
+            return CODE_TYPE, '模板路径必须是字符串'
+        if normalize_template_path(value) not in allowed and not _is_dynamic(value):
+            return CODE_TEMPLATE, '模板 %s 不存在' % value
+        return None
+    return check
+
+
+def compile_schema(fields, templates=()):
+    """
+    将一种组件类型的字段定义编译为校验函数 validate(params)，返回问题列表 [(级别, 字段, 代码, 说明), ...]
+    templates为该组件类型可选的模板路径，用于template-select字段
+    """
+    known = frozenset(field['name'] for field in fields)
+    required = tuple(field['name'] for field in fields if field.get('required'))
+    checks = []
+    for field in fields:
+        field_type = field.get('type')
+        if field_type == 'combo' and field.get('options'):
+            check = _option_check(field['options'])
+        elif field_type == 'template-select':
+            check = _template_check(templates)
+        elif field_type == 'json-tree':
+            check = _check_tree
+        else:
+            check = _check_scalar
+        checks.append((field['name'], check))
+    checks = tuple(checks)
+
+    def validate(params):
+        issues = []
+        for name in required:
+            if _is_empty(params.get(name)):
+                issues.append((LEVEL_ERROR, name, CODE_REQUIRED, '必填参数为空'))
+        for name, check in checks:
+            value = params.get(name)
+            if value is None or value == '':
+                continue
+            problem = check(value)
+            if problem:
+                issues.append((LEVEL_ERROR, name) + problem)
+        if not known.issuperset(params):
+            for name in params:
+                if name not in known:
+                    issues.append((LEVEL_WARNING, name, CODE_UNKNOWN_FIELD, '参数配置架构中没有该参数'))
+        return issues
+    return validate
+
+
+class CaseValidator:
+    """
+    编译好的用例校验器
+    schemas为 {组件类型: 字段定义列表}（同 PARAM_SCHEMAS），templates为 {组件类型: 模板路径列表}
+    """
+
+    def __init__(self, schemas, templates=None):
+        templates = templates or {}
+        self._validators = {
+            component_type: compile_schema(fields, templates.get(component_type, ()))
+            for component_type, fields in schemas.items()
+        }
+
+    def validate_component(self, component):
+        """校验单个组件，返回问题列表 [(级别, 字段, 代码, 说明), ...]"""
+        if not isinstance(component, dict):
+            return [(LEVEL_ERROR, None, CODE_STRUCTURE, '组件必须是JSON对象')]
+        params = component.get('params')
+        if params is None:
+            params = {}
+        elif not isinstance(params, dict):
+            return [(LEVEL_ERROR, 'params', CODE_STRUCTURE, 'params必须是JSON对象')]
+        validate = self._validators.get(component.get('type'))
+        if validate is None:
+            return [(LEVEL_WARNING, None, CODE_NO_SCHEMA, '组件类型 %s 没有参数配置架构' % component.get('type'))]
+        return validate(params)
+
+    def validate_case(self, case):
+        """
+        校验整个用例，返回 {"id", "valid", "errors": [...], "warnings": [...]}
+        每个问题带所在分组、步骤序号、组件序号、组件ID和类型、字段、代码和说明
+        """
+        if not isinstance(case, dict):
+            return {
+                "id": None,
+                "valid": False,
+                "errors": [{"code": CODE_STRUCTURE, "message": '用例必须是JSON对象'}],
+                "warnings": []
+            }
+        errors, warnings = [], []
+        for section in CASE_SECTIONS:
+            blocks = case.get(section) or []
+            if not isinstance(blocks, list):
+                errors.append({"section": section, "code": CODE_STRUCTURE, "message": '%s必须是数组' % section})
+                continue
+            for block_index, block in enumerate(blocks):
+                components = block.get('components') if isinstance(block, dict) else None
+                if not isinstance(components, list):
+                    errors.append({
+                        "section": section, "blockIndex": block_index,
+                        "code": CODE_STRUCTURE, "message": '步骤的components必须是数组'
+                    })
+                    continue
+                for component_index, component in enumerate(components):
+                    self._component_issues(section, block_index, component_index, component, errors, warnings)
+        return {"id": case.get('id'), "valid": not errors, "errors": errors, "warnings": warnings}
+
+    def _component_issues(self, section, block_index, component_index, component, errors, warnings):
+        for level, field, code, message in self.validate_component(component):
+            issue = {
+                "section": section,
+                "blockIndex": block_index,
+                "componentIndex": component_index,
+                "componentId": component.get('id') if isinstance(component, dict) else None,
+                "componentType": component.get('type') if isinstance(component, dict) else None,
+                "field": field,
+                "code": code,
+                "message": message
+            }
+            (errors if level == LEVEL_ERROR else warnings).append(issue)
+
+    def validate_paths(self, case, paths):
+        """
+        只校验paths（路径元组，如JSON Patch修改的位置）所在的组件，返回 {"components": 校验的组件数, "errors", "warnings"}
+        路径指向整个分组或步骤时校验其下的全部组件，指向整个用例时等同于validate_case
+        """
+        if not isinstance(case, dict) or any(not path for path in paths):
+            result = self.validate_case(case)
+            return {"components": None, "errors": result['errors'], "warnings": result['warnings']}
+        locations = set()
+        for path in paths:
+            if path[0] not in CASE_SECTIONS or not isinstance(case.get(path[0]), list):
+                continue
+            blocks = case[path[0]]
+            block_indexes = range(len(blocks)) if len(path) == 1 else [_location_index(path[1], len(blocks))]
+            for block_index in block_indexes:
+                if block_index is None or not isinstance(blocks[block_index], dict):
+                    continue
+                components = blocks[block_index].get('components')
+                if not isinstance(components, list):
+                    continue
+                if len(path) >= 4 and path[2] == 'components':
+                    component_index = _location_index(path[3], len(components))
+                    if component_index is not None:
+                        locations.add((path[0], block_index, component_index))
+                elif len(path) <= 2 or (len(path) == 3 and path[2] == 'components'):
+                    locations.update((path[0], block_index, index) for index in range(len(components)))
+        errors, warnings = [], []
+        for section, block_index, component_index in sorted(locations, key=lambda item: (
+                CASE_SECTIONS.index(item[0]), item[1], item[2])):
+            component = case[section][block_index]['components'][component_index]
+            self._component_issues(section, block_index, component_index, component, errors, warnings)
+        return {"components": len(locations), "errors": errors, "warnings": warnings}
+
+
+def _location_index(token, length):
+    """路径中的数组下标（'-' 为最后一个元素），超出范围时返回None"""
+    if token == '-':
+        return length - 1 if length else None
+    if isinstance(token, int) or (isinstance(token, str) and token.isdigit()):
+        index = int(token)
+        return index if index < length else None
+    return None
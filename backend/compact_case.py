@@ -0,0 +1,190 @@
+"""
+用例的紧凑内存表示
+json.loads得到的用例树中每个组件、每个参数树叶子都是一个完整的dict，"id"/"type"/"name"/"params"等键名
+和组件类型、模板路径、${Env.*}占位符等取值在每个用例中重复保存。紧凑表示中：
+- 每个JSON对象保存为 _Record(shape, values)：shape为键名元组，由共享字符串表合并，相同键集合的对象共用同一个元组
+  （所有组件、所有参数树叶子 {type, value, ...} 各自只有少数几种shape），values为取值元组
+- JSON数组保存为元组，短字符串（键名、组件类型、模板路径、占位符等）经共享字符串表合并为同一个对象，
+  内容相同的对象（如从模板复制的rReq/rRsp子树）也合并为同一个对象
+- 用例本身为 CompactCase 记录（__slots__），摘要字段直接可读，不需要展开用例树
+
+只在序列化响应时通过 to_dict() 展开为dict；紧凑记录不可变，多个请求可以同时读取
+"""
+
+import threading
+
+from result_cache import LRUCache
+
+# 超过该长度的字符串（SQL、Shell命令等）很少重复，不进入字符串表
+MAX_INTERN_LENGTH = 64
+
+# 字符串表平均每个缓存条目超过该数量时（大量用例被淘汰或修改后）清空缓存并重建字符串表
+MAX_STRINGS_PER_ENTRY = 256
+
+
+class StringTable:
+    """
+    共享字符串表：相同内容的字符串、键名元组和JSON对象只保存一份
+    对象按 (shape, 取值) 合并，取值含数组的对象不参与合并；参数树中从模板复制来的子树在各用例间共用同一个对象
+    """
+
+    def __init__(self):
+        self._strings = {}
+        self._shapes = {}
+        self._records = {}
+        self._lock = threading.Lock()
+
+    def intern(self, text):
+        if len(text) > MAX_INTERN_LENGTH:
+            return text
+        return self._strings.setdefault(text, text)
+
+    def shape(self, keys):
+        """键名元组（键名本身也合并）"""
+        shape = self._shapes.get(keys)
+        if shape is None:
+            with self._lock:
+                shape = self._shapes.setdefault(keys, tuple(self.intern(key) for key in keys))
+        return shape
+
+    def record(self, shape, values):
+        typed = False
+        for value in values:
+            value_type = type(value)
+            if value_type not in _SHAREABLE:
+                if value_type not in _NUMBERS:
+                    return _Record(shape, values)
+                typed = True
+        if typed:
+            # 1、1.0和true相等且哈希相同，数字和布尔值带上类型参与比较
+            values_key = tuple((type(value), value) if type(value) in _NUMBERS else value for value in values)
+            key = (shape, values_key)
+        else:
+            key = (shape, values)
+        record = self._records.get(key)
+        if record is None:
+            record = self._records.setdefault(key, _Record(shape, values))
+        return record
+
+    def __len__(self):
+        return len(self._strings) + len(self._records)
+
+    def stats(self):
+        return {"strings": len(self._strings), "shapes": len(self._shapes), "sharedRecords": len(self._records)}
+
+
+class _Record:
+    """一个JSON对象：键名元组（共享）和对应的取值；合并后的对象按身份比较"""
+    __slots__ = ('shape', 'values')
+
+    def __init__(self, shape, values):
+        self.shape = shape
+        self.values = values
+
+
+# 取值参与对象合并的字段（组件参数：各用例中大量组件参数和模板的参数树完全相同）
+SHARED_FIELDS = frozenset(['params'])
+
+# 可参与对象合并的取值类型
+_SHAREABLE = frozenset([str, type(None), _Record])
+_NUMBERS = frozenset([int, float, bool])
+
+
+def pack(value, table, share=False):
+    """
+    将JSON值转换为紧凑表示
+    share为True时对象参与合并；用例、步骤、组件各层带有唯一的ID，不做合并，只合并组件参数（SHARED_FIELDS）以下的对象
+    """
+    value_type = type(value)
+    if value_type is str:
+        return table.intern(value)
+    if value_type is dict:
+        shape = table.shape(tuple(value))
+        if share:
+            return table.record(shape, tuple([pack(item, table, True) for item in value.values()]))
+        return _Record(shape, tuple([pack(item, table, key in SHARED_FIELDS) for key, item in value.items()]))
+    if value_type is list:
+        return tuple([pack(item, table, share) for item in value])
+    return value
+
+
+def unpack(value):
+    """将紧凑表示展开为JSON值（dict/list为新对象，调用方可以修改）"""
+    if type(value) is _Record:
+        return dict(zip(value.shape, map(unpack, value.values)))
+    if type(value) is tuple:
+        return list(map(unpack, value))
+    return value
+
+
+class CompactCase:
+    """紧凑表示的用例：摘要字段直接保存，完整用例树按需展开"""
+    __slots__ = ('id', 'name', 'library', 'tree')
+
+    def __init__(self, case, table):
+        self.id = case.get('id')
+        self.name = case.get('name')
+        self.library = case.get('library')
+        self.tree = pack(case, table)
+
+    def to_dict(self):
+        return unpack(self.tree)
+
+
+class CompactCaseCache:
+    """
+    已加载用例的进程内缓存 {seq: CompactCase}，按LRU淘汰
+    所有条目共用一张字符串表；缓存被清空时字符串表一并重建，不保留已淘汰用例的字符串。
+    version为缓存内容对应的案例库版本：sync时丢弃之后被修改的用例，put时版本已变化则不写入（读到的可能是旧内容）
+    """
+
+    def __init__(self, max_entries=10000):
+        self._entries = LRUCache(max_entries=max_entries)
+        self._table = StringTable()
+        self._lock = threading.Lock()
+        self.version = None
+
+    @property
+    def enabled(self):
+        return self._entries.max_entries > 0
+
+    def sync(self, version, changed_seqs):
+        """案例库版本变化时丢弃changed_seqs(旧版本)返回的用例，首次同步时不需要丢弃"""
+        if version == self.version:
+            return
+        with self._lock:
+            if version == self.version:
+                return
+            if self.version is not None and len(self._entries):
+                for seq in changed_seqs(self.version):
+                    self._entries.discard(seq)
+            self.version = version
+
+    def get(self, seq):
+        """返回用例dict（每次展开为新对象），未缓存时返回None"""
+        compact = self._entries.get(seq)
+        return compact.to_dict() if compact is not None else None
+
+    def put(self, seq, case, version):
+        if not self.enabled:
+            return
+        compact = CompactCase(case, self._table)
+        with self._lock:
+            if version != self.version:
+                return
+            if len(self._table) > self._entries.max_entries * MAX_STRINGS_PER_ENTRY:
+                self._entries.clear()
+                self._table = StringTable()
+                compact = CompactCase(case, self._table)
+            self._entries.put(seq, compact)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._table = StringTable()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return dict(self._entries.stats(), **self._table.stats())
@@ -0,0 +1,139 @@
+"""
+内容寻址的磁盘结果缓存
+以请求内容的规范化哈希为键，结果以JSON文件保存在缓存目录中（按哈希前两位分子目录），进程重启后仍然有效；
+缓存总大小超过上限时按最近访问时间淘汰（LRU），访问时间以文件修改时间记录
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# 超过该时间(秒)未修改的临时文件视为写入中断（进程崩溃）遗留，启动时删除；更新的可能是其他进程正在写入的文件
+STALE_TMP_SECONDS = 3600
+
+
+def content_key(data):
+    """返回数据的内容哈希（SHA-256），与字典键顺序无关"""
+    canonical = json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class DiskLRUCache:
+    """线程安全的磁盘LRU缓存，值为可JSON序列化的对象"""
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> 文件大小，按最近访问排序
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._load_index()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + '.json')
+
+    def _load_index(self):
+        """扫描缓存目录重建索引，按文件修改时间恢复访问顺序；同时删除写入中断遗留的临时文件"""
+        found = []
+        stale_before = time.time() - STALE_TMP_SECONDS
+        for dirpath, _, filenames in os.walk(self.directory):
+            for filename in filenames:
+                if filename.endswith('.tmp'):
+                    self._remove_stale_tmp(os.path.join(dirpath, filename), stale_before)
+                    continue
+                if not filename.endswith('.json'):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(dirpath, filename))
+                except OSError:
+                    continue
+                found.append((stat.st_mtime_ns, filename[:-len('.json')], stat.st_size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._bytes += size
+        with self._lock:
+            self._evict()
+
+    @staticmethod
+    def _remove_stale_tmp(path, stale_before):
+        try:
+            if os.stat(path).st_mtime < stale_before:
+                os.remove(path)
+        except OSError:
+            pass
+
+    def get(self, key):
+        """返回缓存的值，不存在时返回None"""
+        path = self._path(key)
+        try:
+            with open(path, encoding='utf-8') as f:
+                value = json.load(f)
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+                size = self._entries.pop(key, None)
+                if size is not None:
+                    self._bytes -= size
+            return None
+        with self._lock:
+            self.hits += 1
+            if key in self._entries:
+                self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        body = json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        tmp_path = '%s.%d.%d.tmp' % (path, os.getpid(), threading.get_ident())
+        try:
+            with open(tmp_path, 'wb') as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        finally:
+            # 写入或替换失败（磁盘已满等）时删除临时文件，替换成功后临时文件已不存在
+            if os.path.exists(tmp_path):
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+        with self._lock:
+            self.writes += 1
+            self._bytes += len(body) - self._entries.pop(key, 0)
+            self._entries[key] = len(body)
+            self._evict()
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "maxBytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "evictions": self.evictions
+        }
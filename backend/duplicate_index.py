@@ -0,0 +1,305 @@
+"""
+近似重复用例检测
+用例按执行顺序展开为组件序列，每个组件取 (组件类型, 请求模板, 关键参数) 作为一个词元：
+URL、租户、超时等随环境变化的参数和组件名称不参与比较，复制后只改了这些参数的用例视为重复。
+词元和相邻词元对（保留先后顺序）经crc32哈希为shingle集合，再计算MinHash签名估计两个用例的Jaccard相似度。
+
+签名按LSH分段（bands × rows），每段哈希为一个桶键；只有至少一段桶键相同的用例才成为候选对，
+候选对再按签名估计的相似度确认，用并查集合并为重复簇。所有签名存放在一个NumPy矩阵中，
+每段的分桶为一次排序，不做全部用例的两两比较。桶内不超过 MAX_PAIRWISE_BUCKET 个用例时比较桶内全部用例对；
+更大的桶（大量用例某一段签名相同）只比较每个用例与桶内第一个用例及排序相邻的用例，
+与这两者都不相似的用例对可能漏检。LSH本身也是概率性的：相似度接近阈值的用例对可能没有任何一段桶键相同，
+因此重复簇是近似结果，不保证找出全部重复用例
+"""
+
+import threading
+import zlib
+
+import numpy as np
+
+from case_validator import CASE_SECTIONS
+from template_registry import normalize_template_path
+
+# 各组件类型参与比较的关键参数（rTpl对所有组件类型都参与比较；variable组件比较变量名列表）
+KEY_PARAMS = {
+    'phone': ('callingId', 'calledId', 'forwardId'),
+    'database': ('operation', 'tableName'),
+    'task': ('planType', 'planName'),
+    'restful': ('method',),
+    'shell': ('cmd',)
+}
+
+DEFAULT_NUM_PERM = 64
+DEFAULT_BANDS = 16
+DEFAULT_THRESHOLD = 0.8
+
+# MinHash的哈希函数族 h(x) = (a*x + b) mod p，a、b小于2^32时乘积不会溢出uint64
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64(0xFFFFFFFF)
+
+# 桶内用例数不超过该值时比较桶内全部用例对，超过时只与桶内第一个用例及相邻用例比较
+MAX_PAIRWISE_BUCKET = 32
+
+# 候选对的相似度分块计算，避免一次性展开 候选对数 × 签名长度 的比较矩阵
+_VERIFY_CHUNK = 65536
+
+
+def component_token(component):
+    """组件的比较词元：类型、请求模板和关键参数"""
+    component_type = component.get('type') or ''
+    params = component.get('params') if isinstance(component.get('params'), dict) else {}
+    parts = [component_type]
+    template = params.get('rTpl')
+    if isinstance(template, str) and template:
+        parts.append(normalize_template_path(template))
+    if component_type == 'variable':
+        names = [item.partition('=')[0].strip() for item in str(params.get('vars') or '').replace('\n', ';').split(';')]
+        parts.append('vars=' + ','.join(name for name in names if name))
+    for name in KEY_PARAMS.get(component_type, ()):
+        value = params.get(name)
+        if value not in (None, ''):
+            parts.append('%s=%s' % (name, value))
+    return '|'.join(parts)
+
+
+def case_shingles(case):
+    """用例的shingle哈希集合：各分组标记和组件词元，以及相邻词元对；用例没有组件时返回空集合"""
+    tokens = []
+    has_component = False
+    for section in CASE_SECTIONS:
+        blocks = case.get(section)
+        if not isinstance(blocks, list):
+            continue
+        tokens.append('#' + section)
+        for block in blocks:
+            components = block.get('components') if isinstance(block, dict) else None
+            for component in components if isinstance(components, list) else ():
+                if isinstance(component, dict):
+                    tokens.append(component_token(component))
+                    has_component = True
+    if not has_component:
+        return set()
+    shingles = {zlib.crc32(token.encode('utf-8')) for token in tokens}
+    shingles.update(
+        zlib.crc32(('%s>%s' % pair).encode('utf-8')) for pair in zip(tokens, tokens[1:])
+    )
+    return shingles
+
+
+class DuplicateIndex:
+    """
+    MinHash/LSH重复检测索引，按用例seq增量更新
+    version为已同步的案例库版本（-1表示尚未同步），由调用方在同步后设置
+    """
+
+    def __init__(self, num_perm=DEFAULT_NUM_PERM, bands=DEFAULT_BANDS, threshold=DEFAULT_THRESHOLD, seed=1):
+        if num_perm % bands:
+            raise ValueError('签名长度必须是分段数的整数倍')
+        random = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self._a = random.randint(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = random.randint(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._band_weights = random.randint(1, 1 << 62, size=self.rows, dtype=np.uint64) | np.uint64(1)
+        self._lock = threading.RLock()
+        self._signatures = np.zeros((0, num_perm), dtype=np.uint32)
+        self._band_keys = np.zeros((0, bands), dtype=np.uint64)
+        self._active = np.zeros(0, dtype=bool)
+        self._seqs = np.zeros(0, dtype=np.int64)
+        self._libraries = []
+        self._rows_by_seq = {}
+        self._size = 0
+        self._clusters = {}  # (阈值, 案例库) -> 聚类结果（及代表用例映射），索引变化时清空
+        self.version = -1
+        self.updates = 0
+        self.clusterings = 0
+
+    def __len__(self):
+        return int(self._active[:self._size].sum())
+
+    def signatures(self, shingle_sets):
+        """一批非空shingle集合的MinHash签名矩阵（uint32，每行长度num_perm），整批一次计算"""
+        lengths = np.fromiter((len(shingles) for shingles in shingle_sets), dtype=np.int64, count=len(shingle_sets))
+        values = np.fromiter(
+            (value for shingles in shingle_sets for value in shingles), dtype=np.uint64, count=int(lengths.sum())
+        )
+        hashed = (np.outer(self._a, values) + self._b[:, None]) % _MERSENNE_PRIME & _MAX_HASH
+        offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        return np.minimum.reduceat(hashed, offsets, axis=1).T.astype(np.uint32)
+
+    def _band_keys_of(self, signatures):
+        """每段签名哈希为一个uint64桶键（乘法溢出即取模，桶键冲突由相似度确认兜底）"""
+        with np.errstate(over='ignore'):
+            banded = signatures.reshape(len(signatures), self.bands, self.rows).astype(np.uint64)
+            return (banded * self._band_weights).sum(axis=2)
+
+    def _grow(self, capacity):
+        def grow(array):
+            grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+            grown[:len(array)] = array
+            return grown
+        self._signatures = grow(self._signatures)
+        self._band_keys = grow(self._band_keys)
+        self._active = grow(self._active)
+        self._seqs = grow(self._seqs)
+
+    def update(self, seq, case, library=None):
+        """新增或替换一个用例的签名；用例没有组件时从索引中移除"""
+        self.update_many([(seq, case, library)])
+
+    def update_many(self, items):
+        """批量新增或替换 [(seq, case, library), ...] 的签名，整批只做一次签名计算"""
+        indexed, shingle_sets = [], []
+        with self._lock:
+            for seq, case, library in items:
+                shingles = case_shingles(case) if isinstance(case, dict) else set()
+                if shingles:
+                    indexed.append((seq, library))
+                    shingle_sets.append(shingles)
+                else:
+                    self.remove(seq)
+            if not indexed:
+                return
+            signatures = self.signatures(shingle_sets)
+            band_keys = self._band_keys_of(signatures)
+            rows = []
+            for seq, library in indexed:
+                row = self._rows_by_seq.get(seq)
+                if row is None:
+                    if self._size == len(self._active):
+                        self._grow(max(1024, self._size * 2))
+                    row = self._size
+                    self._size += 1
+                    self._rows_by_seq[seq] = row
+                    self._seqs[row] = seq
+                    self._libraries.append(library)
+                self._libraries[row] = library
+                rows.append(row)
+            self._signatures[rows] = signatures
+            self._band_keys[rows] = band_keys
+            self._active[rows] = True
+            self.updates += len(rows)
+            self._clusters.clear()
+
+    def remove(self, seq):
+        with self._lock:
+            row = self._rows_by_seq.get(seq)
+            if row is not None and self._active[row]:
+                self._active[row] = False
+                self._clusters.clear()
+
+    def _candidate_pairs(self, rows):
+        """
+        各段桶键排序后，桶键相同的行为候选对：小桶内全部两两组合，大桶内每行与桶内第一行及排序相邻的行；
+        返回去重后的 (左行, 右行) 数组
+        """
+        keys = self._band_keys[rows]
+        lefts, rights = [], []
+        for band in range(self.bands):
+            order = np.argsort(keys[:, band], kind='stable')
+            sorted_keys = keys[order, band]
+            starts = np.concatenate(([True], sorted_keys[1:] != sorted_keys[:-1]))
+            bucket_ids = np.cumsum(starts) - 1
+            bucket_starts = np.flatnonzero(starts)
+            bucket_sizes = np.diff(np.append(bucket_starts, len(sorted_keys)))[bucket_ids]
+            small = bucket_sizes <= MAX_PAIRWISE_BUCKET
+            # 排序后相距offset的两行属于同一个桶即为候选对；offset为1时包括大桶内的相邻行
+            for offset in range(1, min(MAX_PAIRWISE_BUCKET, len(sorted_keys))):
+                same = bucket_ids[offset:] == bucket_ids[:-offset]
+                if offset > 1:
+                    same &= small[offset:]
+                positions = np.flatnonzero(same)
+                if not len(positions):
+                    break
+                lefts.append(order[positions])
+                rights.append(order[positions + offset])
+            positions = np.flatnonzero(~small & ~starts)
+            lefts.append(order[bucket_starts[bucket_ids[positions]]])
+            rights.append(order[positions])
+        left = np.concatenate(lefts)
+        right = np.concatenate(rights)
+        codes = np.unique(np.minimum(left, right).astype(np.int64) * len(rows) + np.maximum(left, right))
+        return codes // len(rows), codes % len(rows)
+
+    def _similarities(self, signatures, left, right):
+        similarities = np.empty(len(left), dtype=np.float32)
+        for start in range(0, len(left), _VERIFY_CHUNK):
+            end = start + _VERIFY_CHUNK
+            similarities[start:end] = (signatures[left[start:end]] == signatures[right[start:end]]).mean(axis=1)
+        return similarities
+
+    def clusters(self, threshold=None, library=None):
+        """
+        找出全部重复簇（结果按索引版本缓存），返回 [[(seq, 与代表用例的相似度), ...], ...]
+        每个簇按seq升序，第一个（最早入库的）用例为代表；簇按大小降序、代表seq升序排列
+        library不为None时只在该案例库的用例中聚类
+        """
+        threshold = self.threshold if threshold is None else threshold
+        key = (threshold, library)
+        with self._lock:
+            cached = self._clusters.get(key)
+            if cached is not None:
+                return cached
+            active = self._active[:self._size]
+            if library is not None:
+                active = active & np.array([item == library for item in self._libraries], dtype=bool)
+            rows = np.flatnonzero(active)
+            signatures = self._signatures[rows]
+            seqs = self._seqs[rows]
+            result = []
+            if len(rows) > 1:
+                left, right = self._candidate_pairs(rows)
+                keep = self._similarities(signatures, left, right) >= threshold
+                parent = list(range(len(rows)))
+
+                def find(item):
+                    while parent[item] != item:
+                        parent[item] = parent[parent[item]]
+                        item = parent[item]
+                    return item
+
+                for first, second in zip(left[keep].tolist(), right[keep].tolist()):
+                    first, second = find(first), find(second)
+                    if first != second:
+                        parent[max(first, second)] = min(first, second)
+                groups = {}
+                for member in sorted(set(left[keep].tolist()) | set(right[keep].tolist())):
+                    groups.setdefault(find(member), []).append(member)
+                for members in groups.values():
+                    members.sort(key=lambda member: seqs[member])
+                    leader = signatures[members[0]]
+                    similarities = (signatures[members] == leader).mean(axis=1)
+                    result.append([(int(seqs[member]), round(float(similarity), 4))
+                                   for member, similarity in zip(members, similarities)])
+                result.sort(key=lambda cluster: (-len(cluster), cluster[0][0]))
+            self._clusters[key] = result
+            self.clusterings += 1
+            return result
+
+    def representatives(self, threshold=None):
+        """重复簇成员的 {seq: (代表用例seq, 簇大小)}，不在任何簇中的用例不出现"""
+        threshold = self.threshold if threshold is None else threshold
+        key = ('representatives', threshold)
+        with self._lock:
+            mapping = self._clusters.get(key)
+            if mapping is None:
+                mapping = {}
+                for cluster in self.clusters(threshold):
+                    leader = cluster[0][0]
+                    for seq, _ in cluster:
+                        mapping[seq] = (leader, len(cluster))
+                self._clusters[key] = mapping
+            return mapping
+
+    def stats(self):
+        return {
+            "indexed": len(self),
+            "version": self.version,
+            "numPerm": self.num_perm,
+            "bands": self.bands,
+            "threshold": self.threshold,
+            "updates": self.updates,
+            "clusterings": self.clusterings
+        }
@@ -0,0 +1,394 @@
+"""
+${...} 占位符表达式引擎
+组件参数中的 ${G.now()}、${G.modDay(G.now(),1)}、${Env.BMPAPP101.SoapUrl}、${My_SubIdentity} 等占位符
+在这里解析和求值。每个不同的参数字符串只解析一次：切分为文本片段和表达式语法树后放入LRU缓存，
+之后的求值只遍历语法树；函数在解析时即绑定，未知函数和语法错误同样缓存，不会重复解析
+
+表达式语法：
+- 引用: My_SubIdentity、Env.BMPAPP101.SoapUrl、calling.Sub.SUB_ID（按上下文中的变量和环境配置解析）
+- 字面量: 'yyyyMMdd'、"abc"、数字 1、-1
+- 函数调用: G.name(参数, ...)，参数可以是任意表达式；常量 G.TIMESTAMP
+时间取值统一为 yyyyMMddHHmmss（或 yyyyMMdd）格式的字符串，格式串使用 yyyy/MM/dd/HH/mm/ss/SSS 写法，与系统预置函数的说明一致
+"""
+
+import calendar
+import re
+import uuid
+from datetime import datetime, timedelta
+
+from result_cache import LRUCache
+
+DEFAULT_CACHE_SIZE = 100000
+
+TIME_FORMAT = 'yyyyMMddHHmmss'
+DATE_FORMAT = 'yyyyMMdd'
+
+_PLACEHOLDER = re.compile(r'\$\{([^{}]*)\}')
+
+_TOKEN = re.compile(r"""\s*(?:
+    (?P<number>-?\d+(?:\.\d+)?)
+  | (?P<name>[A-Za-z_]\w*(?:\.\w+)*)
+  | '(?P<single>[^']*)'
+  | "(?P<double>[^"]*)"
+  | (?P<punct>[(),])
+)""", re.VERBOSE)
+
+# 语法树节点：(LITERAL, 值) | (REFERENCE, 引用路径) | (CALL, 函数名, 函数, (参数节点, ...))
+LITERAL = 'literal'
+REFERENCE = 'reference'
+CALL = 'call'
+
+
+class ExpressionError(Exception):
+    """表达式语法错误、未知函数或函数参数错误"""
+
+
+class UnresolvedReference(Exception):
+    """引用的变量或环境配置在上下文中不存在"""
+
+
+# ============ 时间格式 ============
+
+_JAVA_FORMAT_TOKENS = re.compile(r'yyyy|yy|MM|dd|HH|mm|ss|SSS|.', re.DOTALL)
+_STRFTIME = {'yyyy': '%Y', 'yy': '%y', 'MM': '%m', 'dd': '%d', 'HH': '%H', 'mm': '%M', 'ss': '%S'}
+_format_cache = {}
+
+
+def _strftime_pattern(pattern):
+    """yyyyMMddHHmmss 写法的格式串转换为strftime格式（SSS为毫秒，只用于输出）"""
+    converted = _format_cache.get(pattern)
+    if converted is None:
+        parts = []
+        for token in _JAVA_FORMAT_TOKENS.findall(pattern):
+            if token in _STRFTIME:
+                parts.append(_STRFTIME[token])
+            elif token == 'SSS':
+                parts.append('{ms}')
+            else:
+                parts.append(token.replace('%', '%%').replace('{', '{{').replace('}', '}}'))
+        converted = _format_cache[pattern] = ''.join(parts)
+    return converted
+
+
+def format_time(value, pattern=TIME_FORMAT):
+    if pattern == 'W':
+        return str(value.isoweekday())
+    return value.strftime(_strftime_pattern(pattern)).format(ms='%03d' % (value.microsecond // 1000))
+
+
+def parse_time(text, pattern=None):
+    """解析时间字符串；未指定格式时按长度识别 yyyyMMddHHmmss / yyyyMMddHHmm / yyyyMMdd"""
+    text = str(text).strip()
+    if pattern is None:
+        pattern = {14: TIME_FORMAT, 12: 'yyyyMMddHHmm', 8: DATE_FORMAT}.get(len(text))
+        if pattern is None:
+            raise ValueError('无法识别的时间: %s' % text)
+    return datetime.strptime(text, _strftime_pattern(pattern).replace('{ms}', '%f'))
+
+
+def _time_pattern(text):
+    """返回与输入时间相同精度的格式，时间偏移后按原格式输出"""
+    return {8: DATE_FORMAT, 12: 'yyyyMMddHHmm'}.get(len(str(text).strip()), TIME_FORMAT)
+
+
+def _add_months(value, months):
+    month_index = value.month - 1 + months
+    year, month = value.year + month_index // 12, month_index % 12 + 1
+    return value.replace(year=year, month=month, day=min(value.day, calendar.monthrange(year, month)[1]))
+
+
+# ============ 系统预置函数（G.*） ============
+
+def _now(context):
+    return format_time(context.now)
+
+
+def _now_fmt(context, pattern=TIME_FORMAT):
+    if pattern == 'TIMESTAMP':
+        return str(int(context.now.timestamp() * 1000))
+    return format_time(context.now, pattern)
+
+
+def _today(context):
+    return format_time(context.now, DATE_FORMAT)
+
+
+def _modifier(offset_of):
+    def modify(context, time, offset):
+        return format_time(offset_of(parse_time(time), int(offset)), _time_pattern(time))
+    return modify
+
+
+def _date_fmt(context, time, pattern, new_pattern=None):
+    if new_pattern is None:
+        return format_time(parse_time(time), pattern)
+    return format_time(parse_time(time, pattern), new_pattern)
+
+
+def _month_total_day(context, time):
+    value = parse_time(time)
+    return str(calendar.monthrange(value.year, value.month)[1])
+
+
+def _date_by_week(context, weekday):
+    monday = context.now - timedelta(days=context.now.weekday())
+    return format_time(monday + timedelta(days=int(weekday) - 1), DATE_FORMAT)
+
+
+def _get_second(context, time):
+    return str(int(parse_time(time).timestamp()))
+
+
+def _env_time(context, env=None):
+    """预览时无法连接被测环境，返回求值时的当前时间"""
+    return format_time(context.now)
+
+
+def _is_in_time(context, time, start, end, pattern=None):
+    return 'true' if parse_time(start, pattern) <= parse_time(time, pattern) <= parse_time(end, pattern) else 'false'
+
+
+def _uuid(context):
+    return str(uuid.uuid4())
+
+
+FUNCTIONS = {
+    'G.now': _now,
+    'G.nowFmt': _now_fmt,
+    'G.today': _today,
+    'G.modYear': _modifier(lambda value, offset: _add_months(value, offset * 12)),
+    'G.modMonth': _modifier(_add_months),
+    'G.modDay': _modifier(lambda value, offset: value + timedelta(days=offset)),
+    'G.modHour': _modifier(lambda value, offset: value + timedelta(hours=offset)),
+    'G.modMinute': _modifier(lambda value, offset: value + timedelta(minutes=offset)),
+    'G.modSecond': _modifier(lambda value, offset: value + timedelta(seconds=offset)),
+    'G.dateFmt': _date_fmt,
+    'G.getMonthTotalDay': _month_total_day,
+    'G.getDateByWeek': _date_by_week,
+    'G.getSecond': _get_second,
+    'G.getEnvTime': _env_time,
+    'G.isInTime': _is_in_time,
+    'G.uuid': _uuid
+}
+
+CONSTANTS = {
+    'G.TIMESTAMP': 'TIMESTAMP'
+}
+
+
+# ============ 解析 ============
+
+# 函数调用的最大嵌套层数，更深的表达式按语法错误处理（解析、求值和引用收集都是递归的）
+MAX_NESTING_DEPTH = 32
+
+def _tokenize(source):
+    tokens = []
+    position = 0
+    source = source.rstrip()
+    while position < len(source):
+        match = _TOKEN.match(source, position)
+        if match is None or match.end() == position:
+            raise ExpressionError('无法解析: %s' % source[position:].strip())
+        kind = match.lastgroup
+        value = match.group(kind)
+        if kind in ('single', 'double'):
+            kind = 'string'
+        tokens.append((kind, value))
+        position = match.end()
+    return tokens
+
+
+def parse_expression(source):
+    """将 ${} 中的表达式解析为语法树，语法错误或未知函数时抛出ExpressionError"""
+    tokens = _tokenize(source)
+    if not tokens:
+        raise ExpressionError('表达式为空')
+    node, position = _parse(tokens, 0)
+    if position != len(tokens):
+        raise ExpressionError('表达式末尾有多余内容: %s' % source)
+    return node
+
+
+def _parse(tokens, position, depth=0):
+    if depth > MAX_NESTING_DEPTH:
+        raise ExpressionError('函数嵌套超过%d层' % MAX_NESTING_DEPTH)
+    if position >= len(tokens):
+        raise ExpressionError('表达式不完整')
+    kind, value = tokens[position]
+    position += 1
+    if kind in ('string', 'number'):
+        return (LITERAL, value), position
+    if kind != 'name':
+        raise ExpressionError('意外的符号: %s' % value)
+    if position < len(tokens) and tokens[position] == ('punct', '('):
+        function = FUNCTIONS.get(value)
+        if function is None:
+            raise ExpressionError('未知函数: %s' % value)
+        args = []
+        position += 1
+        if position < len(tokens) and tokens[position] == ('punct', ')'):
+            return (CALL, value, function, ()), position + 1
+        while True:
+            arg, position = _parse(tokens, position, depth + 1)
+            args.append(arg)
+            if position >= len(tokens):
+                raise ExpressionError('函数 %s 缺少右括号' % value)
+            if tokens[position] == ('punct', ')'):
+                return (CALL, value, function, tuple(args)), position + 1
+            if tokens[position] != ('punct', ','):
+                raise ExpressionError('函数 %s 的参数之间缺少逗号' % value)
+            position += 1
+    if value in CONSTANTS:
+        return (LITERAL, CONSTANTS[value]), position
+    return (REFERENCE, value), position
+
+
+# ============ 求值 ============
+
+class EvaluationContext:
+    """
+    求值上下文：variables为变量 {名称: 值}（名称可带点，如 calling.Sub.SUB_ID，值也可以是嵌套对象），
+    env为环境配置（${Env.X.Y} 在其中按路径查找），now为求值时刻（同一次预览中的 G.now() 取值一致）
+    """
+
+    def __init__(self, variables=None, env=None, now=None):
+        self.variables = variables or {}
+        self.env = env or {}
+        self.now = now or datetime.now()
+
+    def lookup(self, path):
+        if path in self.variables:
+            value = self.variables[path]
+        else:
+            parts = path.split('.')
+            if parts[0] == 'Env':
+                value, parts = self.env, parts[1:]
+                if parts and '.'.join(parts) in value:
+                    value, parts = value['.'.join(parts)], ()
+            elif parts[0] in self.variables:
+                value, parts = self.variables[parts[0]], parts[1:]
+            else:
+                raise UnresolvedReference(path)
+            for part in parts:
+                if not isinstance(value, dict) or part not in value:
+                    raise UnresolvedReference(path)
+                value = value[part]
+        if isinstance(value, (dict, list)) or value is None:
+            raise UnresolvedReference(path)
+        return value
+
+
+def evaluate(node, context):
+    kind = node[0]
+    if kind == LITERAL:
+        return node[1]
+    if kind == REFERENCE:
+        return context.lookup(node[1])
+    _, name, function, args = node
+    values = [evaluate(arg, context) for arg in args]
+    try:
+        return function(context, *values)
+    except (TypeError, ValueError, OverflowError) as e:
+        raise ExpressionError('函数 %s 调用失败: %s' % (name, e))
+
+
+def references(node):
+    """返回语法树中引用的全部路径（包括函数参数中的引用）"""
+    if node[0] == REFERENCE:
+        return [node[1]]
+    if node[0] == CALL:
+        return [path for arg in node[3] for path in references(arg)]
+    return []
+
+
+def _to_text(value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+
+class ExpressionEngine:
+    """
+    带语法树缓存的表达式引擎
+    render(text, context) 替换字符串中的全部占位符，resolve(data, context) 替换任意JSON结构中全部字符串的占位符；
+    无法求值的占位符保留原文，并以问题列表返回
+    """
+
+    def __init__(self, cache_size=DEFAULT_CACHE_SIZE):
+        self._cache = LRUCache(max_entries=cache_size)
+        self.placeholders = 0
+
+    def compile(self, text):
+        """
+        将字符串切分为 (文本片段 | (表达式原文, 语法树, 错误信息), ...) 并缓存；
+        无法解析的占位符语法树为None，只缓存错误信息（不缓存异常对象，避免重复抛出时累积调用栈）
+        """
+        parts = self._cache.get(text)
+        if parts is None:
+            parts = []
+            position = 0
+            for match in _PLACEHOLDER.finditer(text):
+                if match.start() > position:
+                    parts.append(text[position:match.start()])
+                source = match.group(1)
+                try:
+                    parts.append((source, parse_expression(source), None))
+                except ExpressionError as e:
+                    parts.append((source, None, str(e)))
+                position = match.end()
+            if position < len(text):
+                parts.append(text[position:])
+            parts = tuple(parts)
+            self._cache.put(text, parts)
+        return parts
+
+    def references(self, text):
+        """返回字符串中各占位符引用的路径列表，无法解析的占位符忽略"""
+        return [
+            path
+            for part in self.compile(text) if not isinstance(part, str) and part[1] is not None
+            for path in references(part[1])
+        ]
+
+    def render(self, text, context, issues=None, path=''):
+        """替换text中的占位符；issues不为None时把无法求值的占位符记入其中"""
+        parts = self.compile(text)
+        output = []
+        for part in parts:
+            if isinstance(part, str):
+                output.append(part)
+                continue
+            source, node, error = part
+            self.placeholders += 1
+            if node is None:
+                output.append('${%s}' % source)
+                if issues is not None:
+                    issues.append({"path": path, "expression": source, "code": "error", "message": error})
+                continue
+            try:
+                output.append(_to_text(evaluate(node, context)))
+            except UnresolvedReference as e:
+                output.append('${%s}' % source)
+                if issues is not None:
+                    issues.append({"path": path, "expression": source, "code": "unresolved", "message": '未定义: %s' % e})
+            except ExpressionError as e:
+                output.append('${%s}' % source)
+                if issues is not None:
+                    issues.append({"path": path, "expression": source, "code": "error", "message": str(e)})
+        return ''.join(output)
+
+    def resolve(self, data, context, issues=None, path=''):
+        """返回替换了全部占位符的副本，path为JSON Pointer形式的位置（如 /steps/0/components/1/params/url）"""
+        if isinstance(data, str):
+            return self.render(data, context, issues, path) if '${' in data else data
+        if isinstance(data, dict):
+            return {
+                key: self.resolve(value, context, issues, '%s/%s' % (path, str(key).replace('~', '~0').replace('/', '~1')))
+                for key, value in data.items()
+            }
+        if isinstance(data, list):
+            return [self.resolve(value, context, issues, '%s/%d' % (path, index)) for index, value in enumerate(data)]
+        return data
+
+    def stats(self):
+        return dict(self._cache.stats(), placeholders=self.placeholders)
@@ -0,0 +1,336 @@
+"""
+用例生成后端
+GenerationBackend 是生成接口调用的后端接口：MockGenerationBackend 返回固定的Mock用例，
+HttpGenerationBackend 调用远程模型服务——短时间窗口内并发到达的生成请求合并为一次上游批量调用（micro-batching），
+上游连接保存在连接池中以keep-alive复用，批量结果再按顺序分发回各个请求
+
+流式生成（iter_generate）不做批量合并，每个请求单独调用上游流式接口，每解析出一个用例立即产出
+
+上游接口协议（stub_model_server.py 提供本地实现，用于离线测试）:
+    批量: POST <url>  { "requests": [{ "templateFile": "...", "apiVersion": "...", "historyCases": [...] }, ...] }
+          返回        { "results": [{ "cases": [...] } | { "error": "..." }, ...] }，与requests顺序一一对应
+    流式: POST <url>  请求头 Accept: application/x-ndjson，请求体 { "request": { "templateFile": "...", ... } }
+          返回NDJSON（分块传输），每生成一个用例一行 { "case": {...} }，最后一行 { "done": true } 或 { "error": "..." }
+"""
+
+import http.client
+import json
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+DEFAULT_MAX_BATCH = 16
+
+# 合并请求的时间窗口(秒)：第一个请求到达后最多再等待这么久收集同批请求
+DEFAULT_BATCH_WINDOW = 0.02
+
+# 连接池大小，同时也是并发的上游批量调用数
+DEFAULT_POOL_SIZE = 4
+
+DEFAULT_UPSTREAM_TIMEOUT = 120.0
+
+
+class GenerationError(Exception):
+    """生成后端返回错误或上游调用失败"""
+
+
+class GenerationBackend(ABC):
+    """
+    生成后端接口：generate(request, timeout) 返回为该请求生成的全部用例（可合并为批量调用），
+    iter_generate(request, timeout) 逐个产出用例，调用方收到第一个用例时不必等待其余用例生成；超时均抛出TimeoutError
+    """
+
+    @abstractmethod
+    def generate(self, request, timeout=None):
+        """返回为该请求生成的用例列表"""
+
+    def iter_generate(self, request, timeout=None):
+        """逐个产出为该请求生成的用例（生成器）；不支持流式的后端整批返回后再逐个产出"""
+        yield from self.generate(request, timeout)
+
+    def stats(self):
+        return {}
+
+    def close(self):
+        pass
+
+
+class MockGenerationBackend(GenerationBackend):
+    """返回固定用例的Mock后端"""
+
+    def __init__(self, cases):
+        self.cases = cases
+        self.requests = 0
+
+    def generate(self, request, timeout=None):
+        self.requests += 1
+        return list(self.cases)
+
+    def iter_generate(self, request, timeout=None):
+        self.requests += 1
+        yield from self.cases
+
+    def stats(self):
+        return {"backend": "mock", "requests": self.requests}
+
+
+class ConnectionPool:
+    """
+    HTTP keep-alive连接池（后进先出，最近用过的连接最可能仍然有效）
+    连接出错时丢弃，空闲连接数不超过size
+    """
+
+    def __init__(self, host, port, https=False, size=DEFAULT_POOL_SIZE, timeout=DEFAULT_UPSTREAM_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.https = https
+        self.size = size
+        self.timeout = timeout
+        self._idle = []
+        self._lock = threading.Lock()
+        self.created = 0
+        self.reused = 0
+
+    def acquire(self):
+        with self._lock:
+            if self._idle:
+                self.reused += 1
+                return self._idle.pop(), True
+            self.created += 1
+        connection_class = http.client.HTTPSConnection if self.https else http.client.HTTPConnection
+        return connection_class(self.host, self.port, timeout=self.timeout), False
+
+    def release(self, connection):
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(connection)
+                return
+        connection.close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+
+class MicroBatcher:
+    """
+    将并发提交的请求合并为批：第一个请求到达后，在window秒内或凑满max_batch个时把这一批交给handler(items)，
+    handler返回与items等长的结果列表（元素为异常时对应的请求以该异常结束）。
+    同时进行的批次数不超过max_concurrent，上游繁忙时后到的请求自然合并成更大的批
+    """
+
+    def __init__(self, handler, max_batch=DEFAULT_MAX_BATCH, window=DEFAULT_BATCH_WINDOW,
+                 max_concurrent=DEFAULT_POOL_SIZE):
+        self._handler = handler
+        self.max_batch = max_batch
+        self.window = window
+        self._queue = queue.Queue()
+        self._slots = threading.Semaphore(max_concurrent)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix='generation-batch')
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+        self._thread = threading.Thread(target=self._collect, name='generation-batcher', daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def _collect(self):
+        while True:
+            batch = [self._queue.get()]
+            # 等待空闲的并发槽位期间到达的请求会并入这一批
+            self._slots.acquire()
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            # 调用方已放弃（超时后取消）的请求不再发送
+            batch = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                self._slots.release()
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            self.largest_batch = max(self.largest_batch, len(batch))
+            self._executor.submit(self._dispatch, batch)
+
+    def _dispatch(self, batch):
+        try:
+            results = self._handler([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise GenerationError('上游返回%d个结果，请求为%d个' % (len(results), len(batch)))
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+        for (_, future), result in zip(batch, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+class HttpGenerationBackend(GenerationBackend):
+    """通过HTTP调用模型服务的生成后端，并发请求经MicroBatcher合并为批量调用"""
+
+    def __init__(self, url, max_batch=DEFAULT_MAX_BATCH, batch_window=DEFAULT_BATCH_WINDOW,
+                 pool_size=DEFAULT_POOL_SIZE, timeout=DEFAULT_UPSTREAM_TIMEOUT):
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise ValueError('生成服务地址无效: %s' % url)
+        self.url = url
+        self._path = (parts.path or '/') + ('?' + parts.query if parts.query else '')
+        self.pool = ConnectionPool(parts.hostname, parts.port, https=parts.scheme == 'https',
+                                   size=pool_size, timeout=timeout)
+        self.batcher = MicroBatcher(self._call_upstream, max_batch=max_batch, window=batch_window,
+                                    max_concurrent=pool_size)
+        self.requests = 0
+        self.upstream_calls = 0
+        self.upstream_errors = 0
+        self.stream_calls = 0
+
+    def generate(self, request, timeout=None):
+        self.requests += 1
+        future = self.batcher.submit(request)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def _send(self, body, headers=None):
+        """
+        发送一次请求，返回 (连接, 响应)，响应体由调用方读取后交还或关闭连接；
+        复用的keep-alive连接已被服务端关闭时换新连接重试一次
+        """
+        headers = dict({'Content-Type': 'application/json', 'Connection': 'keep-alive'}, **(headers or {}))
+        for attempt in range(2):
+            connection, reused = self.pool.acquire()
+            try:
+                connection.request('POST', self._path, body=body, headers=headers)
+                return connection, connection.getresponse()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                connection.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            except Exception:
+                connection.close()
+                raise
+
+    def _finish(self, connection, response):
+        """响应体已读完：连接可复用时放回连接池"""
+        if response.will_close:
+            connection.close()
+        else:
+            self.pool.release(connection)
+
+    def _post(self, body):
+        """发送一次批量请求，返回 (HTTP状态码, 响应体)"""
+        connection, response = self._send(body)
+        try:
+            payload = response.read()
+        except Exception:
+            connection.close()
+            raise
+        self._finish(connection, response)
+        return response.status, payload
+
+    def iter_generate(self, request, timeout=None):
+        """
+        调用上游流式接口，每读到一行用例立即产出；timeout为整个生成过程的时限。
+        调用方提前关闭生成器（如客户端断开）时关闭连接，上游停止发送
+        """
+        self.requests += 1
+        self.stream_calls += 1
+        deadline = None if timeout is None else time.monotonic() + timeout
+        body = json.dumps({"request": request}, ensure_ascii=False).encode('utf-8')
+        connection, response = None, None
+        finished = False
+        try:
+            connection, response = self._send(body, {'Accept': 'application/x-ndjson'})
+            if response.status != 200:
+                raise GenerationError('生成服务返回HTTP %d' % response.status)
+            while True:
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError('生成超时')
+                    # 响应带Connection: close时socket已移交给响应对象，只在行间检查时限
+                    if connection.sock is not None:
+                        connection.sock.settimeout(remaining)
+                line = response.readline()
+                if not line:
+                    raise GenerationError('生成服务的流式响应不完整')
+                if not line.strip():
+                    continue
+                event = json.loads(line)
+                if not isinstance(event, dict):
+                    raise GenerationError('生成结果格式错误')
+                if 'case' in event:
+                    yield event['case']
+                elif event.get('done'):
+                    finished = response.read() == b''
+                    return
+                else:
+                    raise GenerationError(event.get('error') or '生成失败')
+        except Exception:
+            self.upstream_errors += 1
+            raise
+        finally:
+            if connection is not None:
+                if finished:
+                    if connection.sock is not None:
+                        connection.sock.settimeout(self.pool.timeout)
+                    self._finish(connection, response)
+                else:
+                    connection.close()
+
+    def _call_upstream(self, requests):
+        self.upstream_calls += 1
+        body = json.dumps({"requests": requests}, ensure_ascii=False).encode('utf-8')
+        try:
+            status, payload = self._post(body)
+            if status != 200:
+                raise GenerationError('生成服务返回HTTP %d' % status)
+            results = json.loads(payload).get('results')
+            if not isinstance(results, list):
+                raise GenerationError('生成服务响应缺少results')
+        except Exception:
+            self.upstream_errors += 1
+            raise
+        return [
+            result['cases'] if isinstance(result, dict) and isinstance(result.get('cases'), list)
+            else GenerationError(result.get('error', '生成失败') if isinstance(result, dict) else '生成结果格式错误')
+            for result in results
+        ]
+
+    def stats(self):
+        return {
+            "backend": "http",
+            "requests": self.requests,
+            "upstreamCalls": self.upstream_calls,
+            "upstreamErrors": self.upstream_errors,
+            "streamCalls": self.stream_calls,
+            "batches": self.batcher.batches,
+            "largestBatch": self.batcher.largest_batch,
+            "averageBatch": round(self.batcher.items / self.batcher.batches, 2) if self.batcher.batches else 0,
+            "connectionsCreated": self.pool.created,
+            "connectionsReused": self.pool.reused
+        }
+
+    def close(self):
+        self.pool.close()
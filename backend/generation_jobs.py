@@ -0,0 +1,416 @@
+"""
+用例生成任务队列
+生成请求提交后立即返回任务ID，由固定大小的线程池在后台执行，请求线程不会被长时间的生成过程占用；
+任务状态、进度和结果持久化在SQLite中，重启后已完成的结果仍可查询，被中断的任务重新排队执行。
+每个进程作为一个任务所有者登记并定期发送心跳：所有者进程已退出（同一主机上按进程号判断）或心跳过期时，
+其排队中/执行中的任务由存活的进程接管重新执行。
+排队中的任务数超过上限时拒绝新任务（准入控制），每个任务有执行超时并支持取消
+"""
+
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+# 任务状态
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_SUCCEEDED = 'succeeded'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+JOB_TIMED_OUT = 'timeout'
+
+FINISHED_STATUSES = (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED, JOB_TIMED_OUT)
+
+DEFAULT_WORKERS = 4
+DEFAULT_MAX_QUEUED = 100
+DEFAULT_TIMEOUT = 120.0
+
+# 已结束的任务保留时间(秒)，启动时清理更早的任务
+DEFAULT_RETENTION = 7 * 86400
+
+# 所有者心跳间隔(秒)；超过 HEARTBEAT_EXPIRY 个间隔没有心跳的所有者视为已退出
+DEFAULT_HEARTBEAT_INTERVAL = 10.0
+HEARTBEAT_EXPIRY = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS generation_jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    request TEXT NOT NULL,
+    progress_done INTEGER NOT NULL DEFAULT 0,
+    progress_total INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    updated_at REAL NOT NULL,
+    owner TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_generation_jobs_status ON generation_jobs(status, created_at);
+CREATE TABLE IF NOT EXISTS generation_job_owners (
+    id TEXT PRIMARY KEY,
+    host TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    heartbeat_at REAL NOT NULL
+);
+"""
+
+# 本进程中存活的所有者ID：进程号相同（如容器重启后的1号进程）但不在其中的所有者属于已退出的进程
+_LOCAL_OWNERS = set()
+
+
+class QueueFullError(Exception):
+    """排队中的任务数已达上限"""
+
+
+class JobCancelled(Exception):
+    """任务已被取消，由JobContext.check在生成过程中抛出"""
+
+
+class JobTimedOut(JobCancelled):
+    """任务执行超时"""
+
+
+def _process_alive(pid):
+    """同一主机上的进程是否存在；Windows上os.kill会结束进程，不做判断"""
+    if os.name == 'nt':
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def _isoformat(timestamp):
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+class JobContext:
+    """
+    传给生成函数的任务上下文
+    生成函数应在各阶段之间调用check()（取消或超时时抛出JobCancelled），并通过progress()报告进度
+    """
+
+    def __init__(self, queue, job_id, deadline):
+        self._queue = queue
+        self.job_id = job_id
+        self.deadline = deadline
+        self._cancelled = threading.Event()
+        self._timed_out = False
+
+    @property
+    def remaining(self):
+        """距超时剩余的秒数，可用作下游调用的超时时间"""
+        return max(0.0, self.deadline - self._queue.clock())
+
+    def cancel(self, timed_out=False):
+        self._timed_out = self._timed_out or timed_out
+        self._cancelled.set()
+
+    def check(self):
+        if self._cancelled.is_set():
+            raise JobTimedOut() if self._timed_out else JobCancelled()
+        if self._queue.clock() >= self.deadline:
+            self._timed_out = True
+            raise JobTimedOut()
+
+    def progress(self, done, total):
+        self._queue._update_progress(self.job_id, done, total)
+
+
+class GenerationJobQueue:
+    """
+    持久化的生成任务队列
+    runner(request, context) 执行生成并返回可JSON序列化的结果；超时由JobContext.check协作式地中断，
+    生成函数不检查时任务也会在超时后被标记为timeout，其稍后返回的结果被丢弃
+    """
+
+    def __init__(self, path, runner, max_workers=DEFAULT_WORKERS, max_queued=DEFAULT_MAX_QUEUED,
+                 timeout=DEFAULT_TIMEOUT, retention=DEFAULT_RETENTION, heartbeat_interval=DEFAULT_HEARTBEAT_INTERVAL,
+                 clock=time.time):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.runner = runner
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self.heartbeat_interval = heartbeat_interval
+        self.clock = clock
+        self.owner_id = uuid.uuid4().hex
+        self.host = socket.gethostname()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._contexts = {}  # 本进程中未结束任务的上下文
+        self._waiting = 0
+        self._running = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.recovered = 0
+        self.finished = {status: 0 for status in FINISHED_STATUSES}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='generation')
+
+        conn = self._connection()
+        conn.executescript(_SCHEMA)
+        with conn:
+            # 旧版本数据库没有owner列，其中未结束的任务（owner为NULL）在启动时直接接管
+            columns = [row['name'] for row in conn.execute('PRAGMA table_info(generation_jobs)')]
+            if 'owner' not in columns:
+                conn.execute('ALTER TABLE generation_jobs ADD COLUMN owner TEXT')
+            conn.execute(
+                'DELETE FROM generation_jobs WHERE status IN (%s) AND finished_at < ?' % ','.join('?' * len(FINISHED_STATUSES)),
+                FINISHED_STATUSES + (self.clock() - retention,)
+            )
+        _LOCAL_OWNERS.add(self.owner_id)
+        self._heartbeat()
+        self._recover()
+        self._stopped = threading.Event()
+        self._heartbeat_thread = threading.Thread(target=self._heartbeat_loop, name='generation-heartbeat', daemon=True)
+        self._heartbeat_thread.start()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    # ============ 所有者心跳与任务接管 ============
+
+    def _heartbeat(self):
+        with self._connection() as conn:
+            conn.execute(
+                'INSERT OR REPLACE INTO generation_job_owners(id, host, pid, heartbeat_at) VALUES (?, ?, ?, ?)',
+                (self.owner_id, self.host, os.getpid(), self.clock())
+            )
+
+    def _heartbeat_loop(self):
+        while not self._stopped.wait(self.heartbeat_interval):
+            try:
+                self._heartbeat()
+                self._recover()
+            except Exception:
+                logger.exception('生成任务心跳失败')
+
+    def _owner_alive(self, owner, now):
+        """所有者是否存活：心跳未过期，且同一主机上的所有者进程仍存在"""
+        if owner is None:
+            return False
+        if owner['heartbeat_at'] < now - self.heartbeat_interval * HEARTBEAT_EXPIRY:
+            return False
+        if owner['host'] == self.host:
+            if owner['pid'] == os.getpid():
+                return owner['id'] in _LOCAL_OWNERS
+            return _process_alive(owner['pid'])
+        return True
+
+    def _recover(self):
+        """
+        接管所有者已退出的排队中/执行中任务并重新排队：启动时接管本主机上次运行留下的任务，
+        之后随心跳检查同一数据库上的其他进程；接管以owner列做条件更新，同一任务只会被一个进程接管
+        """
+        conn = self._connection()
+        now = self.clock()
+        owners = {row['id']: row for row in conn.execute('SELECT * FROM generation_job_owners')}
+        dead = {owner for owner in owners if owner != self.owner_id and not self._owner_alive(owners[owner], now)}
+        rows = conn.execute(
+            'SELECT id, request, owner FROM generation_jobs WHERE status IN (?, ?) AND (owner IS NULL OR owner != ?) '
+            'ORDER BY created_at',
+            (JOB_QUEUED, JOB_RUNNING, self.owner_id)
+        ).fetchall()
+        recovered = 0
+        for row in rows:
+            if row['owner'] in owners and row['owner'] not in dead:
+                continue
+            with conn:
+                claimed = conn.execute(
+                    'UPDATE generation_jobs SET status = ?, owner = ?, started_at = NULL, progress_done = 0, updated_at = ? '
+                    'WHERE id = ? AND status IN (?, ?) AND owner IS ?',
+                    (JOB_QUEUED, self.owner_id, self.clock(), row['id'], JOB_QUEUED, JOB_RUNNING, row['owner'])
+                ).rowcount
+            if claimed:
+                recovered += 1
+                self._enqueue(row['id'], json.loads(row['request']))
+        if dead:
+            with conn:
+                conn.executemany('DELETE FROM generation_job_owners WHERE id = ?', [(owner,) for owner in dead])
+        if recovered:
+            self.recovered += recovered
+            logger.info('重新排队%d个被中断的生成任务', recovered)
+
+    # ============ 提交与执行 ============
+
+    def submit(self, request):
+        """提交生成任务，返回任务信息；排队中的任务数已达上限时抛出QueueFullError"""
+        with self._lock:
+            if self._waiting >= self.max_queued:
+                self.rejected += 1
+                raise QueueFullError()
+            self._waiting += 1
+        job_id = uuid.uuid4().hex
+        now = self.clock()
+        try:
+            with self._connection() as conn:
+                conn.execute(
+                    'INSERT INTO generation_jobs(id, status, request, created_at, updated_at, owner) VALUES (?, ?, ?, ?, ?, ?)',
+                    (job_id, JOB_QUEUED, json.dumps(request, ensure_ascii=False), now, now, self.owner_id)
+                )
+        except Exception:
+            with self._lock:
+                self._waiting -= 1
+            raise
+        self.submitted += 1
+        self._enqueue(job_id, request, counted=True)
+        return self.get(job_id)
+
+    def _enqueue(self, job_id, request, counted=False):
+        context = JobContext(self, job_id, deadline=float('inf'))
+        with self._lock:
+            if not counted:
+                self._waiting += 1
+            self._contexts[job_id] = context
+        self._executor.submit(self._run, job_id, request, context)
+
+    def _run(self, job_id, request, context):
+        with self._lock:
+            self._waiting -= 1
+            self._running += 1
+        timer = None
+        try:
+            started_at = self.clock()
+            with self._connection() as conn:
+                # 排队期间被取消或被其他进程接管的任务不再执行
+                claimed = conn.execute(
+                    'UPDATE generation_jobs SET status = ?, started_at = ?, updated_at = ? WHERE id = ? AND status = ? AND owner = ?',
+                    (JOB_RUNNING, started_at, started_at, job_id, JOB_QUEUED, self.owner_id)
+                ).rowcount
+            if not claimed or context._cancelled.is_set():
+                return
+            context.deadline = started_at + self.timeout
+            timer = threading.Timer(self.timeout, self._expire, args=(job_id,))
+            timer.daemon = True
+            timer.start()
+
+            try:
+                result = self.runner(request, context)
+                context.check()
+            except JobTimedOut:
+                self._finish(job_id, JOB_TIMED_OUT, error='生成超时（%d秒）' % self.timeout)
+            except JobCancelled:
+                self._finish(job_id, JOB_CANCELLED, error='任务已取消')
+            except Exception as e:
+                logger.exception('生成任务%s失败', job_id)
+                self._finish(job_id, JOB_FAILED, error=str(e) or e.__class__.__name__)
+            else:
+                self._finish(job_id, JOB_SUCCEEDED, result=result)
+        finally:
+            if timer is not None:
+                timer.cancel()
+            with self._lock:
+                self._running -= 1
+                self._contexts.pop(job_id, None)
+
+    def _finish(self, job_id, status, result=None, error=None, owned=True):
+        """
+        记录任务结束状态；任务已被标记为取消或超时时保持原状态。
+        owned为True时只更新本进程所有的任务（已被其他进程接管的任务以接管方的结果为准），取消不受此限制
+        """
+        now = self.clock()
+        sql = ('UPDATE generation_jobs SET status = ?, result = ?, error = ?, finished_at = ?, updated_at = ? '
+               'WHERE id = ? AND status IN (?, ?)')
+        args = (status, None if result is None else json.dumps(result, ensure_ascii=False), error,
+                now, now, job_id, JOB_QUEUED, JOB_RUNNING)
+        if owned:
+            sql += ' AND owner = ?'
+            args += (self.owner_id,)
+        with self._connection() as conn:
+            updated = conn.execute(sql, args).rowcount
+        if updated:
+            with self._lock:
+                self.finished[status] += 1
+        return updated
+
+    def _expire(self, job_id):
+        """执行超时：立即标记为timeout，并通知生成函数在下次check时停止"""
+        context = self._contexts.get(job_id)
+        if context is not None:
+            context.cancel(timed_out=True)
+        self._finish(job_id, JOB_TIMED_OUT, error='生成超时（%d秒）' % self.timeout)
+
+    def _update_progress(self, job_id, done, total):
+        now = self.clock()
+        with self._connection() as conn:
+            conn.execute(
+                'UPDATE generation_jobs SET progress_done = ?, progress_total = ?, updated_at = ? WHERE id = ? AND status = ?',
+                (done, total, now, job_id, JOB_RUNNING)
+            )
+
+    # ============ 查询与取消 ============
+
+    def get(self, job_id, include_result=True):
+        """返回任务信息，不存在时返回None"""
+        row = self._connection().execute('SELECT * FROM generation_jobs WHERE id = ?', (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = {
+            "id": row['id'],
+            "status": row['status'],
+            "progress": {"done": row['progress_done'], "total": row['progress_total']},
+            "createdAt": _isoformat(row['created_at']),
+            "startedAt": _isoformat(row['started_at']),
+            "finishedAt": _isoformat(row['finished_at'])
+        }
+        if row['error'] is not None:
+            job['error'] = row['error']
+        if include_result and row['status'] == JOB_SUCCEEDED:
+            job['result'] = json.loads(row['result'])
+        return job
+
+    def cancel(self, job_id):
+        """取消排队中或执行中的任务，返回任务信息；任务不存在时返回None，已结束的任务保持原状态"""
+        context = self._contexts.get(job_id)
+        if context is not None:
+            context.cancel()
+        self._finish(job_id, JOB_CANCELLED, error='任务已取消', owned=False)
+        return self.get(job_id, include_result=False)
+
+    def stats(self):
+        return {
+            "workers": self.max_workers,
+            "running": self._running,
+            "queued": self._waiting,
+            "maxQueued": self.max_queued,
+            "timeout": self.timeout,
+            "submitted": self.submitted,
+            "rejected": self.rejected,
+            "recovered": self.recovered,
+            "finished": dict(self.finished)
+        }
+
+    def shutdown(self, wait=True):
+        """停止心跳并取消本进程的任务；注销所有者后，未执行的排队任务由其他进程或下次启动时立即接管"""
+        self._stopped.set()
+        for context in list(self._contexts.values()):
+            context.cancel()
+        self._executor.shutdown(wait=wait)
+        self._heartbeat_thread.join(timeout=self.heartbeat_interval)
+        _LOCAL_OWNERS.discard(self.owner_id)
+        with self._connection() as conn:
+            conn.execute('DELETE FROM generation_job_owners WHERE id = ?', (self.owner_id,))
@@ -0,0 +1,170 @@
+"""
+JSON Patch（RFC 6902）
+按顺序把 add/remove/replace/move/copy/test 操作原地应用到JSON文档上，路径为JSON Pointer（RFC 6901）；
+任一操作失败时抛出 JsonPatchError，调用方应丢弃已部分修改的文档
+"""
+
+import copy
+import re
+
+OPERATIONS = ('add', 'remove', 'replace', 'move', 'copy', 'test')
+
+_ARRAY_INDEX = re.compile(r'0|[1-9][0-9]*')
+
+
+class JsonPatchError(ValueError):
+    """补丁无法应用（路径不存在、test不相等等）"""
+
+
+class InvalidPatchError(JsonPatchError):
+    """补丁文档格式不正确"""
+
+
+def parse_pointer(pointer):
+    """JSON Pointer 转换为路径元组，'' 为整个文档"""
+    if not isinstance(pointer, str):
+        raise InvalidPatchError('路径必须是字符串')
+    if pointer == '':
+        return ()
+    if not pointer.startswith('/'):
+        raise InvalidPatchError('路径 %s 必须以 / 开头' % pointer)
+    return tuple(token.replace('~1', '/').replace('~0', '~') for token in pointer[1:].split('/'))
+
+
+def _format(path):
+    return ''.join('/' + str(token).replace('~', '~0').replace('/', '~1') for token in path)
+
+
+def _index(container, token, path, allow_end=False):
+    """数组下标：只接受不带前导零的非负整数，allow_end时 '-' 和 len 表示末尾之后"""
+    if allow_end and token == '-':
+        return len(container)
+    if not _ARRAY_INDEX.fullmatch(token):
+        raise JsonPatchError('路径 %s 中的数组下标 %s 无效' % (_format(path), token))
+    index = int(token)
+    if index > len(container) or (index == len(container) and not allow_end):
+        raise JsonPatchError('路径 %s 的数组下标越界' % _format(path))
+    return index
+
+
+def _resolve(document, path):
+    """返回路径指向的值，不存在时抛出JsonPatchError"""
+    node = document
+    for position, token in enumerate(path):
+        if isinstance(node, dict):
+            if token not in node:
+                raise JsonPatchError('路径 %s 不存在' % _format(path[:position + 1]))
+            node = node[token]
+        elif isinstance(node, list):
+            node = node[_index(node, token, path[:position + 1])]
+        else:
+            raise JsonPatchError('路径 %s 不存在' % _format(path[:position + 1]))
+    return node
+
+
+def _parent(document, path):
+    parent = _resolve(document, path[:-1])
+    if not isinstance(parent, (dict, list)):
+        raise JsonPatchError('路径 %s 的上级不是对象或数组' % _format(path))
+    return parent
+
+
+def _json_equal(left, right):
+    """JSON取值比较：数字按数值比较，布尔值与数字不相等"""
+    if isinstance(left, bool) or isinstance(right, bool):
+        return type(left) is type(right) and left == right
+    if isinstance(left, dict) and isinstance(right, dict):
+        return left.keys() == right.keys() and all(_json_equal(left[key], right[key]) for key in left)
+    if isinstance(left, list) and isinstance(right, list):
+        return len(left) == len(right) and all(_json_equal(a, b) for a, b in zip(left, right))
+    if isinstance(left, (int, float)) and isinstance(right, (int, float)):
+        return left == right
+    return type(left) is type(right) and left == right
+
+
+def _add(document, path, value):
+    if not path:
+        return value
+    parent = _parent(document, path)
+    if isinstance(parent, dict):
+        parent[path[-1]] = value
+    else:
+        parent.insert(_index(parent, path[-1], path, allow_end=True), value)
+    return document
+
+
+def _remove(document, path):
+    """删除路径指向的值，返回 (文档, 被删除的值)"""
+    if not path:
+        raise JsonPatchError('不能删除整个文档')
+    parent = _parent(document, path)
+    if isinstance(parent, dict):
+        if path[-1] not in parent:
+            raise JsonPatchError('路径 %s 不存在' % _format(path))
+        return document, parent.pop(path[-1])
+    return document, parent.pop(_index(parent, path[-1], path))
+
+
+def _replace(document, path, value):
+    if not path:
+        return value
+    parent = _parent(document, path)
+    if isinstance(parent, dict):
+        if path[-1] not in parent:
+            raise JsonPatchError('路径 %s 不存在' % _format(path))
+        parent[path[-1]] = value
+    else:
+        parent[_index(parent, path[-1], path)] = value
+    return document
+
+
+def parse_patch(operations):
+    """校验补丁文档格式，返回 [(op, 路径元组, from路径元组或None, value), ...]"""
+    if not isinstance(operations, list):
+        raise InvalidPatchError('补丁必须是操作数组')
+    parsed = []
+    for number, operation in enumerate(operations):
+        if not isinstance(operation, dict) or operation.get('op') not in OPERATIONS:
+            raise InvalidPatchError('第%d个操作的op必须是 %s 之一' % (number + 1, '/'.join(OPERATIONS)))
+        op = operation['op']
+        if 'path' not in operation:
+            raise InvalidPatchError('第%d个操作缺少path' % (number + 1))
+        source = None
+        if op in ('move', 'copy'):
+            if 'from' not in operation:
+                raise InvalidPatchError('第%d个操作缺少from' % (number + 1))
+            source = parse_pointer(operation['from'])
+        if op in ('add', 'replace', 'test') and 'value' not in operation:
+            raise InvalidPatchError('第%d个操作缺少value' % (number + 1))
+        parsed.append((op, parse_pointer(operation['path']), source, operation.get('value')))
+    return parsed
+
+
+def apply_patch(document, operations):
+    """
+    按顺序应用补丁（原地修改document），返回 (修改后的文档, [被修改的路径元组, ...])
+    替换整个文档（路径为''）时返回新文档；move的来源路径也计入被修改的路径。
+    add/replace的value直接放入文档（不复制），copy复制来源的值
+    """
+    touched = []
+    for op, path, source, value in parse_patch(operations):
+        if op == 'test':
+            if not _json_equal(_resolve(document, path), value):
+                raise JsonPatchError('路径 %s 的取值与test不相等' % _format(path))
+            continue
+        if op == 'add':
+            document = _add(document, path, value)
+        elif op == 'remove':
+            document, _ = _remove(document, path)
+        elif op == 'replace':
+            document = _replace(document, path, value)
+        elif op == 'move':
+            if path[:len(source)] == source and path != source:
+                raise JsonPatchError('不能把 %s 移动到其自身的下级' % _format(source))
+            document, moved = _remove(document, source)
+            document = _add(document, path, moved)
+            touched.append(source)
+        else:
+            document = _add(document, path, copy.deepcopy(_resolve(document, source)))
+        touched.append(path)
+    return document, touched
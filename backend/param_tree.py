@@ -0,0 +1,127 @@
+"""
+参数树的结构共享与差量编码
+模板的请求/响应参数树中大量子树完全相同（如各SOAP模板的header字段、各REST模板的headers块），
+SubtreePool 将相同的子树合并为同一个对象，内存占用只随不同子树的数量增长；
+diff_tree/merge_patch 以 JSON Merge Patch（RFC 7396）的形式表示模板相对于公共基础树的差量
+"""
+
+import threading
+from collections import Counter
+
+# 差量中表示删除基础树中该键的值（参数树的值不会是null）
+_DELETE = None
+
+
+def _scalar_key(value):
+    # 1、1.0和True相等且哈希相同，必须区分类型，否则会被合并为同一个值
+    return type(value).__name__, value
+
+
+class SubtreePool:
+    """
+    子树池：intern返回与传入树内容相同的共享树，相同内容的dict/list在内存中只保存一份
+    共享树被多处引用，调用方不得原地修改
+    """
+
+    def __init__(self):
+        self._nodes = {}
+        self._lock = threading.Lock()
+        self.interned = 0
+        self.shared = 0
+
+    def intern(self, tree):
+        with self._lock:
+            return self._intern(tree)[0]
+
+    def adopt(self, tree):
+        """
+        同intern，但传入树中尚未入池的子树直接作为共享树入池而不复制；
+        用于把已共享（不会再被修改）的树转入新的子树池，转入后原有引用仍指向池中的对象
+        """
+        with self._lock:
+            return self._intern(tree, adopt=True)[0]
+
+    def _intern(self, tree, adopt=False):
+        """返回 (共享树, 内容键)"""
+        if isinstance(tree, dict):
+            items = [(name, self._intern(child, adopt)) for name, child in tree.items()]
+            key = ('dict', tuple((name, child_key) for name, (_, child_key) in items))
+            reuse = adopt and all(child is tree[name] for name, (child, _) in items)
+            build = lambda: tree if reuse else {name: child for name, (child, _) in items}
+        elif isinstance(tree, list):
+            items = [self._intern(child, adopt) for child in tree]
+            key = ('list', tuple(child_key for _, child_key in items))
+            reuse = adopt and all(child is original for (child, _), original in zip(items, tree))
+            build = lambda: tree if reuse else [child for child, _ in items]
+        else:
+            return tree, _scalar_key(tree)
+
+        node = self._nodes.get(key)
+        if node is None:
+            node = self._nodes[key] = build()
+            self.interned += 1
+        else:
+            self.shared += 1
+        return node, key
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def stats(self):
+        return {
+            "nodes": len(self._nodes),
+            "interned": self.interned,
+            "shared": self.shared
+        }
+
+
+def merge_patch(base, patch):
+    """将差量应用到基础树上，返回新树；未修改的子树直接引用基础树中的对象"""
+    if not isinstance(patch, dict):
+        return patch
+    result = dict(base) if isinstance(base, dict) else {}
+    for name, value in patch.items():
+        if value is _DELETE:
+            result.pop(name, None)
+        else:
+            result[name] = merge_patch(result.get(name), value)
+    return result
+
+
+def diff_tree(base, target):
+    """返回将base变为target的差量（merge_patch(base, diff_tree(base, target)) == target），两者相同时返回{}"""
+    if not isinstance(base, dict) or not isinstance(target, dict):
+        return target
+    patch = {}
+    for name, value in target.items():
+        if name not in base:
+            patch[name] = value
+        elif base[name] is not value and base[name] != value:
+            patch[name] = diff_tree(base[name], value) if isinstance(value, dict) else value
+    for name in base:
+        if name not in target:
+            patch[name] = _DELETE
+    return patch
+
+
+def common_base(trees):
+    """
+    返回一组树的公共基础树：逐层保留至少一半的树中存在的键，取出现次数最多的值
+    基础树只用于减小差量，不要求与任何一棵树相同
+    """
+    trees = [tree for tree in trees if isinstance(tree, dict)]
+    if not trees:
+        return {}
+    names = Counter(name for tree in trees for name in tree)
+    base = {}
+    for name, count in names.items():
+        if count * 2 < len(trees):
+            continue
+        values = [tree[name] for tree in trees if name in tree]
+        if all(isinstance(value, dict) for value in values):
+            base[name] = common_base(values)
+        else:
+            scalars = Counter(_scalar_key(value) for value in values if not isinstance(value, (dict, list)))
+            if scalars:
+                base[name] = scalars.most_common(1)[0][0][1]
+    return base
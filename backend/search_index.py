@@ -0,0 +1,68 @@
+"""
+历史用例关键字检索分词
+中文按字符二元组(bigram)切分，ASCII按单词切分；索引侧和查询侧使用同一套切分规则，
+查询被拆解为词项约束，只需访问这些词项的倒排链，再对候选集做子串校验即可与
+`query.lower() in text.lower()` 的结果完全一致
+"""
+
+import re
+
+# 中日韩统一表意文字(含扩展A和兼容区)按二元组切分，ASCII字母数字按单词切分，其余字符不入索引
+_CJK_CLASS = '\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff'
+# 第1组为ASCII单词，第2组为中文片段
+_RUN_RE = re.compile('([0-9a-z]+)|([' + _CJK_CLASS + ']+)')
+_CJK_RE = re.compile('[' + _CJK_CLASS + ']')
+
+# 查询词项约束的匹配方式
+MATCH_EXACT = 'exact'    # 文档中存在与之相同的词项
+MATCH_PREFIX = 'prefix'  # 文档中存在以之开头的词项
+MATCH_SUFFIX = 'suffix'  # 文档中存在以之结尾的词项
+MATCH_INFIX = 'infix'    # 文档中存在包含它的词项
+
+
+def cjk_chars(text):
+    """返回文本中的全部中文字符"""
+    return _CJK_RE.findall(text)
+
+
+def iter_terms(text):
+    """按出现顺序逐个产出文本的词项（可重复，文本需已转小写）"""
+    for match in _RUN_RE.finditer(text):
+        run = match.group()
+        if match.lastindex == 2 and len(run) > 1:
+            for i in range(len(run) - 1):
+                yield run[i:i + 2]
+        else:
+            # ASCII单词，或长度为1的中文片段
+            yield run
+
+
+def index_terms(text):
+    """返回文本需要写入倒排索引的词项集合（文本需已转小写）"""
+    return set(iter_terms(text))
+
+
+def query_terms(query):
+    """
+    将查询拆解为词项约束列表 [(term, mode), ...]（查询需已转小写）
+    查询中间的完整片段必须与文档词项完全相同；触及查询开头/结尾的片段可能只是文档中
+    某个词项的后缀/前缀，同时触及两端时只能要求包含关系
+    """
+    constraints = []
+    for match in _RUN_RE.finditer(query):
+        run = match.group()
+        if match.lastindex == 2 and len(run) > 1:
+            constraints.extend((run[i:i + 2], MATCH_EXACT) for i in range(len(run) - 1))
+            continue
+        at_start = match.start() == 0
+        at_end = match.end() == len(query)
+        if at_start and at_end:
+            mode = MATCH_INFIX
+        elif at_start:
+            mode = MATCH_SUFFIX
+        elif at_end:
+            mode = MATCH_PREFIX
+        else:
+            mode = MATCH_EXACT
+        constraints.append((run, mode))
+    return constraints
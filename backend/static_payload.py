@@ -0,0 +1,107 @@
+"""
+预序列化的静态接口响应
+部署期间不变的配置数据在启动时序列化一次，同时保存gzip（及可用时的brotli）压缩版本；
+请求时按Accept-Encoding直接返回对应的字节串，并用强ETag支持If-None-Match条件请求返回304
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:  # requirements.txt中已包含Brotli；未安装时只提供gzip压缩
+    brotli = None
+
+# 浏览器缓存时间(秒)：数据只在重新部署时变化，过期后通过ETag重新验证
+DEFAULT_MAX_AGE = 86400
+
+# 小于该字节数的响应不压缩，压缩后反而可能变大
+MIN_COMPRESS_SIZE = 256
+
+
+def content_digest(data):
+    """返回数据内容的哈希（与字典键顺序无关），用作配置数据的版本号"""
+    canonical = json.dumps(data, ensure_ascii=False, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+
+class StaticPayload:
+    """
+    一份预先序列化的JSON响应
+    body为未压缩的UTF-8字节串，variants为 {编码: 压缩后的字节串}，压缩后不比原文小的编码不保存
+    每种编码使用不同的强ETag（同一内容的不同表示），条件请求时任一ETag匹配都返回304
+    """
+
+    def __init__(self, data, max_age=DEFAULT_MAX_AGE):
+        self.data = data
+        self.body = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self.digest = hashlib.sha256(self.body).hexdigest()[:32]
+        self.cache_control = 'public, max-age=%d' % max_age
+
+        self.variants = {}
+        if len(self.body) >= MIN_COMPRESS_SIZE:
+            compressed = {'gzip': gzip.compress(self.body, compresslevel=9, mtime=0)}
+            if brotli is not None:
+                compressed['br'] = brotli.compress(self.body, quality=11)
+            for encoding, payload in compressed.items():
+                if len(payload) < len(self.body):
+                    self.variants[encoding] = payload
+        self.etags = {None: self.digest}
+        self.etags.update((encoding, '%s-%s' % (self.digest, encoding)) for encoding in self.variants)
+
+    def _choose_encoding(self):
+        """按客户端Accept-Encoding的权重选择编码，同权重时优先brotli；都不接受时返回None（不压缩）"""
+        accepted = request.accept_encodings
+        best, best_quality = None, 0
+        for encoding in ('br', 'gzip'):
+            if encoding in self.variants:
+                quality = accepted[encoding]
+                if quality > best_quality:
+                    best, best_quality = encoding, quality
+        return best
+
+    def response(self):
+        """生成当前请求的响应：ETag匹配时返回不带内容的304，否则返回预先压缩好的字节串"""
+        encoding = self._choose_encoding()
+        headers = {
+            'ETag': '"%s"' % self.etags[encoding],
+            'Cache-Control': self.cache_control,
+            'Vary': 'Accept-Encoding'
+        }
+        if any(request.if_none_match.contains_weak(etag) for etag in self.etags.values()):
+            return Response(status=304, headers=headers)
+
+        if encoding is not None:
+            headers['Content-Encoding'] = encoding
+            body = self.variants[encoding]
+        else:
+            body = self.body
+        return Response(body, status=200, mimetype='application/json', headers=headers)
+
+
+class VersionedPayload:
+    """
+    内容随版本号变化的预序列化响应（如由模板目录生成的配置）
+    get传入当前版本号，与上次不同时调用build(version)重新生成数据并序列化，否则直接返回已有的StaticPayload
+    """
+
+    def __init__(self, build, max_age=DEFAULT_MAX_AGE):
+        self._build = build
+        self._max_age = max_age
+        self._lock = threading.Lock()
+        self._version = None
+        self._payload = None
+
+    def get(self, version):
+        payload = self._payload
+        if payload is None or self._version != version:
+            with self._lock:
+                if self._payload is None or self._version != version:
+                    self._payload = StaticPayload(self._build(version), max_age=self._max_age)
+                    self._version = version
+                payload = self._payload
+        return payload
@@ -0,0 +1,151 @@
+"""
+本地桩模型服务
+实现生成后端的上游批量接口和流式接口（见 generation_backend.py），按请求的模板文件名确定性地构造用例，
+可模拟每次调用的固定延迟（流式接口把延迟平均分摊到每个用例之前），
+用于在没有真实模型服务时离线测试 HttpGenerationBackend 的批量合并、连接复用和逐个产出
+
+用法:
+    python stub_model_server.py --port 8765 --latency 0.5
+    GENERATION_BACKEND_URL=http://127.0.0.1:8765/v1/generate python app.py
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def stub_cases(request, count=3):
+    """按请求构造count个结构完整的用例"""
+    template = request.get('templateFile') or 'template.xml'
+    api_version = request.get('apiVersion') or 'v1'
+    cases = []
+    for i in range(1, count + 1):
+        case_id = 'TC%03d' % i
+        cases.append({
+            "id": case_id,
+            "name": "%s 场景%d（%s）" % (template, i, api_version),
+            "preconditions": [{
+                "id": "p1", "name": "准备测试数据", "expanded": True,
+                "components": [{"id": "pc1", "type": "variable", "name": "设置变量 - 测试号码", "params": {"vars": "My_SubIdentity=138%08d" % i}}]
+            }],
+            "steps": [{
+                "id": "s1", "name": "调用接口", "expanded": True,
+                "components": [{"id": "c1", "type": "api", "name": "SOAP接口调用 - %s" % template, "params": {"rTpl": template, "url": "${Env.BMPAPP101.SoapUrl}"}}]
+            }],
+            "expectedResults": [{
+                "id": "e1", "name": "接口返回成功", "expanded": True,
+                "components": [{"id": "ec1", "type": "comment", "name": "注释 - 校验返回码", "params": {"content": "resultCode=0"}}]
+            }]
+        })
+    return cases
+
+
+class StubModelHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # 支持keep-alive
+
+    def do_POST(self):
+        server = self.server
+        length = int(self.headers.get('Content-Length', 0))
+        if 'application/x-ndjson' in self.headers.get('Accept', ''):
+            self._stream(self.rfile.read(length))
+            return
+        try:
+            requests = json.loads(self.rfile.read(length)).get('requests')
+            if not isinstance(requests, list):
+                raise ValueError('requests必须是数组')
+        except ValueError as e:
+            self._reply(400, {"error": str(e)})
+            return
+        with server.stats_lock:
+            server.calls += 1
+            server.requests += len(requests)
+            server.largest_batch = max(server.largest_batch, len(requests))
+        if server.latency:
+            time.sleep(server.latency)
+        results = []
+        for request in requests:
+            if not isinstance(request, dict):
+                results.append({"error": "请求必须是JSON对象"})
+            else:
+                results.append({"cases": stub_cases(request, server.cases_per_request)})
+        self._reply(200, {"results": results})
+
+    def _stream(self, body):
+        """流式接口：分块传输NDJSON，每生成一个用例写出一行"""
+        server = self.server
+        try:
+            request = json.loads(body).get('request')
+            if not isinstance(request, dict):
+                raise ValueError('request必须是JSON对象')
+        except ValueError as e:
+            self._reply(400, {"error": str(e)})
+            return
+        with server.stats_lock:
+            server.stream_calls += 1
+            server.requests += 1
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        cases = stub_cases(request, server.cases_per_request)
+        delay = server.latency / len(cases) if cases else 0
+        try:
+            for case in cases:
+                if delay:
+                    time.sleep(delay)
+                self._write_chunk({"case": case})
+            self._write_chunk({"done": True})
+            self.wfile.write(b'0\r\n\r\n')
+        except (BrokenPipeError, ConnectionResetError):
+            # 调用方提前关闭了连接，停止生成
+            self.close_connection = True
+
+    def _write_chunk(self, event):
+        line = json.dumps(event, ensure_ascii=False).encode('utf-8') + b'\n'
+        self.wfile.write(b'%x\r\n%s\r\n' % (len(line), line))
+        self.wfile.flush()
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def start_stub_server(host='127.0.0.1', port=0, latency=0.0, cases_per_request=3, quiet=True):
+    """在后台线程启动桩服务，返回server（server.server_address为实际地址，server.shutdown()停止）"""
+    server = ThreadingHTTPServer((host, port), StubModelHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.cases_per_request = cases_per_request
+    server.quiet = quiet
+    server.stats_lock = threading.Lock()
+    server.calls = 0
+    server.stream_calls = 0
+    server.requests = 0
+    server.largest_batch = 0
+    threading.Thread(target=server.serve_forever, name='stub-model-server', daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='用例生成桩模型服务')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.5, help='每次批量调用（或每次流式调用全部用例）的模拟延迟(秒)')
+    parser.add_argument('--cases', type=int, default=3, help='每个请求生成的用例数')
+    args = parser.parse_args()
+    stub = start_stub_server(args.host, args.port, args.latency, args.cases, quiet=False)
+    print('桩模型服务: http://%s:%d/v1/generate' % stub.server_address)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        stub.shutdown()
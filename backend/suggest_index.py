@@ -0,0 +1,120 @@
+"""
+搜索框输入联想索引
+候选项（用例名称、步骤名称、模板名称）的检索键按字典序排成有序数组，前缀查询通过二分定位到连续区间，
+再在区间内按使用频次取前几项；中文名称额外以拼音首字母作为检索键，支持"ydzd"联想出"月度账单..."
+"""
+
+import re
+from bisect import bisect_left
+
+import numpy as np
+
+# 候选项类型
+SUGGEST_CASE = 'case'
+SUGGEST_STEP = 'step'
+SUGGEST_TEMPLATE = 'template'
+
+# 每个候选项最多生成的检索键数（完整文本、拼音首字母和若干分段起点）
+MAX_KEYS_PER_ENTRY = 4
+
+# GB2312一级汉字按拼音排序，各声母首字的区位码(高字节*256+低字节)，用于不依赖拼音库推算首字母；
+# 二级汉字按部首排序，无法推算，忽略
+_GB2312_INITIALS = (
+    (45217, 'a'), (45253, 'b'), (45761, 'c'), (46318, 'd'), (46826, 'e'), (47010, 'f'),
+    (47297, 'g'), (47614, 'h'), (48119, 'j'), (49062, 'k'), (49324, 'l'), (49896, 'm'),
+    (50371, 'n'), (50614, 'o'), (50622, 'p'), (50906, 'q'), (51387, 'r'), (51446, 's'),
+    (52218, 't'), (52698, 'w'), (52980, 'x'), (53689, 'y'), (54481, 'z'), (55290, None)
+)
+_GB2312_BOUNDS = [code for code, _ in _GB2312_INITIALS]
+
+# 分段分隔符：名称中这些字符之后的位置也作为检索键的起点（如"SOAP接口调用 - 创建用户"中的"创建用户"）
+_SEGMENT_RE = re.compile(r'[\s\-_/\\:：()（）\[\]【】.]+')
+
+
+def pinyin_initial(char):
+    """返回汉字的拼音首字母（小写），无法推算时返回None"""
+    try:
+        encoded = char.encode('gb2312')
+    except UnicodeEncodeError:
+        return None
+    if len(encoded) != 2:
+        return None
+    code = encoded[0] * 256 + encoded[1]
+    index = bisect_left(_GB2312_BOUNDS, code + 1) - 1
+    if index < 0:
+        return None
+    return _GB2312_INITIALS[index][1]
+
+
+def pinyin_initials(text):
+    """
+    返回文本的拼音首字母串：汉字取首字母，ASCII字母数字原样保留（小写），其余字符忽略
+    文本中没有可推算首字母的汉字时返回None
+    """
+    letters = []
+    has_chinese = False
+    for char in text.lower():
+        if char.isascii():
+            if char.isalnum():
+                letters.append(char)
+            continue
+        initial = pinyin_initial(char)
+        if initial:
+            letters.append(initial)
+            has_chinese = True
+    return ''.join(letters) if has_chinese else None
+
+
+def suggestion_keys(text):
+    """返回候选文本的检索键（小写）：完整文本、拼音首字母、以及各分段起点开始的后缀"""
+    lowered = text.lower().strip()
+    keys = [lowered]
+    initials = pinyin_initials(lowered)
+    if initials:
+        keys.append(initials)
+    for match in _SEGMENT_RE.finditer(lowered):
+        if len(keys) >= MAX_KEYS_PER_ENTRY:
+            break
+        if 0 < match.end() < len(lowered):
+            keys.append(lowered[match.end():])
+    return list(dict.fromkeys(key for key in keys if key))
+
+
+class SuggestIndex:
+    """
+    只读的前缀联想索引，entries为 [(text, type, count), ...]，count为使用频次
+    排序规则：频次降序，其次文本较短者优先，最后按文本排序
+    """
+
+    def __init__(self, entries):
+        entries = list(entries)
+        # 预先算出每个候选项的全局名次，区间内取名次最小的若干项即为频次最高的候选
+        order = sorted(range(len(entries)), key=lambda i: (-entries[i][2], len(entries[i][0]), entries[i][0]))
+        self._entries = [entries[i] for i in order]
+
+        pairs = sorted(
+            (key, rank) for rank, (text, _, _) in enumerate(self._entries) for key in suggestion_keys(text)
+        )
+        self._keys = [key for key, _ in pairs]
+        self._ranks = np.fromiter((rank for _, rank in pairs), dtype=np.int32, count=len(pairs))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def suggest(self, prefix, limit=10):
+        """返回检索键以prefix开头的前limit个候选 [{"text", "type", "count"}, ...]"""
+        prefix = prefix.strip().lower()
+        if not prefix or limit <= 0:
+            return []
+        start = bisect_left(self._keys, prefix)
+        # 所有以prefix开头的键都小于prefix后接最大码位
+        end = bisect_left(self._keys, prefix + '\U0010ffff', start)
+        ranks = self._ranks[start:end]
+        # 同一候选项可能有多个检索键落在区间内，多取一些再去重
+        wanted = limit * MAX_KEYS_PER_ENTRY
+        if len(ranks) > wanted:
+            ranks = np.partition(ranks, wanted - 1)[:wanted]
+        return [
+            {"text": text, "type": entry_type, "count": count}
+            for text, entry_type, count in (self._entries[rank] for rank in np.unique(ranks)[:limit])
+        ]
@@ -0,0 +1,288 @@
+"""
+请求模板注册表
+扫描模板目录，启动时只记录文件元数据（路径、修改时间、大小），不读取文件内容；
+模板在首次被访问时才解析为 rReq/rRsp 参数树并缓存。访问时按间隔重新扫描目录，
+只有修改时间或大小变化的文件会被丢弃缓存、在下次访问时重新解析，新增和删除的模板无需重启即可生效
+
+模板文件格式：
+- XML（如 soap/CreateSubscriber.xml）: 根元素 <template label="创建用户">，子元素 <rReq>/<rRsp> 下的嵌套元素即参数树，
+  没有子元素的元素为叶子参数，文本为参数值，属性 type（默认string）、isDefault、validation、saveAs 为参数属性
+- JSON（如 rest/GetUser.json）: {"label": "...", "rReq": {...}, "rRsp": {...}}，叶子参数为带 type 字段的对象
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import xml.etree.ElementTree as ET
+
+from param_tree import SubtreePool, common_base, diff_tree
+
+logger = logging.getLogger(__name__)
+
+# 模板所在的一级子目录与组件类型的对应关系
+DEFAULT_DIR_TYPES = {
+    'soap': 'api',
+    'rest': 'restful'
+}
+
+# 两次扫描目录的最小间隔(秒)
+DEFAULT_RESCAN_INTERVAL = 2.0
+
+TEMPLATE_EXTENSIONS = ('.xml', '.json')
+
+# 叶子参数除 type/value 外的属性
+_LEAF_ATTRIBUTES = ('validation', 'isDefault', 'saveAs')
+
+
+def normalize_template_path(path):
+    """'@\\soap\\A.xml'、'soap/A.xml'、'@/soap/A.xml' 等写法都规范化为 'soap\\A.xml'"""
+    return path.strip().replace('/', '\\').lstrip('@').lstrip('\\')
+
+
+def _parse_number(text):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def _xml_tree(element):
+    """将XML元素转换为参数树：有子元素的为分支，否则为叶子参数"""
+    children = list(element)
+    if children:
+        return {child.tag: _xml_tree(child) for child in children}
+    param_type = element.get('type', 'string')
+    text = element.text or ''
+    leaf = {'type': param_type, 'value': _parse_number(text) if param_type == 'number' and text else text}
+    for name in _LEAF_ATTRIBUTES:
+        value = element.get(name)
+        if value is not None:
+            leaf[name] = value == 'true' if name == 'isDefault' else value
+    return leaf
+
+
+def _parse_xml(file_path):
+    root = ET.parse(file_path).getroot()
+    params = {}
+    for section in ('rReq', 'rRsp'):
+        element = root.find(section)
+        if element is not None:
+            params[section] = _xml_tree(element)
+    return root.get('label'), params
+
+
+def _parse_json(file_path):
+    with open(file_path, encoding='utf-8') as f:
+        document = json.load(f)
+    params = {section: document[section] for section in ('rReq', 'rRsp') if isinstance(document.get(section), dict)}
+    return document.get('label'), params
+
+
+_PARSERS = {
+    '.xml': _parse_xml,
+    '.json': _parse_json
+}
+
+
+class _TemplateEntry:
+    """一个模板文件：元数据在扫描时确定，label和参数在首次访问时解析"""
+
+    __slots__ = ('key', 'file_path', 'component_type', 'signature', 'parsed', 'label', 'params')
+
+    def __init__(self, key, file_path, component_type, signature):
+        self.key = key
+        self.file_path = file_path
+        self.component_type = component_type
+        self.signature = signature
+        self.parsed = False
+        self.label = None
+        self.params = None
+
+
+class TemplateRegistry:
+    """
+    模板目录的注册表，模板以 '@\\soap\\CreateSubscriber.xml' 形式的路径标识
+    generation 在模板增删改后递增，供依赖模板内容的缓存判断是否需要重建
+    解析出的参数树经子树池合并相同子树，各模板共享的部分在内存中只有一份；
+    子树池按generation重建，被删除或修改的模板的子树随旧池一起释放。其他配置数据通过pin放入子树池，在各generation间保留
+    """
+
+    def __init__(self, root, dir_types=None, rescan_interval=DEFAULT_RESCAN_INTERVAL, clock=time.monotonic, pool=None):
+        self.root = root
+        self.dir_types = dict(DEFAULT_DIR_TYPES if dir_types is None else dir_types)
+        self.rescan_interval = rescan_interval
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._entries = {}  # (组件类型, 规范化路径) -> _TemplateEntry
+        self._generation = 0
+        self._scanned_at = None
+        self.pool = pool if pool is not None else SubtreePool()
+        self._pinned = []  # 通过pin放入子树池的树，重建子树池时保留
+        self._deltas = (None, None)  # (generation, delta_params结果)
+        self.parses = 0
+        self.parse_errors = 0
+        self.reloads = 0
+        self.refresh(force=True)
+
+    def _scan(self):
+        """遍历模板目录，返回 {(组件类型, 规范化路径): (文件路径, 组件类型, (mtime_ns, size))}"""
+        found = {}
+        for directory, component_type in self.dir_types.items():
+            base = os.path.join(self.root, directory)
+            for dirpath, _, filenames in os.walk(base):
+                for filename in filenames:
+                    if not filename.lower().endswith(TEMPLATE_EXTENSIONS):
+                        continue
+                    file_path = os.path.join(dirpath, filename)
+                    try:
+                        stat = os.stat(file_path)
+                    except OSError:
+                        continue
+                    relative = os.path.relpath(file_path, self.root).replace(os.sep, '\\')
+                    found[(component_type, relative)] = (file_path, component_type, (stat.st_mtime_ns, stat.st_size))
+        return found
+
+    def refresh(self, force=False):
+        """距上次扫描超过间隔（或force）时重新扫描目录，有模板增删改时返回True"""
+        now = self._clock()
+        if not force and self._scanned_at is not None and now - self._scanned_at < self.rescan_interval:
+            return False
+        with self._lock:
+            if not force and self._scanned_at is not None and now - self._scanned_at < self.rescan_interval:
+                return False
+            found = self._scan()
+            changed = found.keys() != self._entries.keys()
+            entries = {}
+            for key, (file_path, component_type, signature) in found.items():
+                entry = self._entries.get(key)
+                if entry is None or entry.signature != signature:
+                    entry = _TemplateEntry('@\\' + key[1], file_path, component_type, signature)
+                    changed = True
+                entries[key] = entry
+            self._entries = entries
+            self._scanned_at = now
+            if changed:
+                self._generation += 1
+                if self._generation > 1:
+                    self.reloads += 1
+                    self._rebuild_pool()
+            return changed
+
+    def _rebuild_pool(self):
+        """用仍在使用的树（固定的树和未修改模板已解析的参数树）重建子树池，这些树原样转入新池，不复制"""
+        pool = SubtreePool()
+        for tree in self._pinned:
+            pool.adopt(tree)
+        for entry in self._entries.values():
+            if entry.parsed and entry.params:
+                entry.params = pool.adopt(entry.params)
+        self.pool = pool
+
+    def pin(self, tree):
+        """将模板以外的配置数据放入子树池（与模板参数共享相同的子树），返回共享树；模板目录变化后仍保留在池中"""
+        with self._lock:
+            tree = self.pool.intern(tree)
+            self._pinned.append(tree)
+            return tree
+
+    @property
+    def generation(self):
+        self.refresh()
+        return self._generation
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _load(self, entry):
+        """解析模板文件（只解析一次）；格式错误时记录日志，视为没有特定参数"""
+        if entry.parsed:
+            return entry
+        with self._lock:
+            if not entry.parsed:
+                parser = _PARSERS[os.path.splitext(entry.file_path)[1].lower()]
+                try:
+                    label, params = parser(entry.file_path)
+                except (OSError, ValueError, ET.ParseError) as e:
+                    logger.warning('模板解析失败 %s: %s', entry.file_path, e)
+                    self.parse_errors += 1
+                    label, params = None, {}
+                entry.label = label or os.path.splitext(os.path.basename(entry.file_path))[0]
+                entry.params = self.pool.intern(params) if params else None
+                entry.parsed = True
+                self.parses += 1
+        return entry
+
+    def _entry(self, component_type, path):
+        self.refresh()
+        return self._entries.get((component_type, normalize_template_path(path)))
+
+    def params(self, component_type, path):
+        """返回模板的 {"rReq": {...}, "rRsp": {...}}，模板不存在或没有特定参数时返回None"""
+        entry = self._entry(component_type, path)
+        return self._load(entry).params if entry else None
+
+    def templates(self, component_type=None):
+        """返回模板路径列表（按路径排序），可按组件类型过滤，不解析文件"""
+        self.refresh()
+        return sorted(
+            entry.key for entry in list(self._entries.values())
+            if component_type is None or entry.component_type == component_type
+        )
+
+    def options(self, component_type):
+        """返回组件的模板下拉选项 [{"value": 路径, "label": 名称}, ...]"""
+        self.refresh()
+        entries = sorted(
+            (entry for entry in list(self._entries.values()) if entry.component_type == component_type),
+            key=lambda entry: entry.key
+        )
+        return [{'value': entry.key, 'label': self._load(entry).label} for entry in entries]
+
+    def all_params(self):
+        """返回全部有特定参数的模板 {组件类型: {路径: 参数}}，会解析所有尚未解析的模板"""
+        self.refresh()
+        result = {component_type: {} for component_type in self.dir_types.values()}
+        for entry in sorted(list(self._entries.values()), key=lambda entry: entry.key):
+            params = self._load(entry).params
+            if params:
+                result[entry.component_type][entry.key] = params
+        return result
+
+    def delta_params(self):
+        """
+        返回差量形式的全部模板参数 {组件类型: {"base": 公共基础树, "deltas": {路径: 相对基础树的差量}}}
+        每种组件类型的基础树只出现一次，各模板只携带与基础树不同的部分；按generation缓存
+        """
+        generation = self.generation
+        cached_generation, cached = self._deltas
+        if cached_generation == generation:
+            return cached
+        result = {}
+        for component_type, templates in self.all_params().items():
+            base = self.pool.intern(common_base(templates.values()))
+            result[component_type] = {
+                "base": base,
+                "deltas": {path: diff_tree(base, params) for path, params in templates.items()}
+            }
+        self._deltas = (generation, result)
+        return result
+
+    def params_delta(self, component_type, path):
+        """返回模板参数相对于其组件类型基础树（见delta_params）的差量，模板不存在或没有特定参数时返回None"""
+        entry = self._entry(component_type, path)
+        if entry is None or self._load(entry).params is None:
+            return None
+        return self.delta_params()[entry.component_type]['deltas'].get(entry.key)
+
+    def stats(self):
+        return {
+            "templates": len(self._entries),
+            "parsed": sum(1 for entry in list(self._entries.values()) if entry.parsed),
+            "parses": self.parses,
+            "parseErrors": self.parse_errors,
+            "reloads": self.reloads,
+            "generation": self._generation,
+            "subtrees": self.pool.stats()
+        }
@@ -0,0 +1,28 @@
+"""
+测试公共配置：把backend目录加入模块搜索路径，应用的数据文件（案例库、索引、生成缓存、任务库）放在临时目录中
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# 必须在导入app之前设置：app在导入时按这些环境变量打开数据文件
+_DATA_DIR = tempfile.mkdtemp(prefix='backend-tests-')
+os.environ['CASE_DB_PATH'] = os.path.join(_DATA_DIR, 'cases.db')
+os.environ.pop('GENERATION_BACKEND_URL', None)
+
+
+def pytest_unconfigure(config):
+    shutil.rmtree(_DATA_DIR, ignore_errors=True)
+
+
+@pytest.fixture(scope='session')
+def client():
+    import app
+    return app.app.test_client()
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+from bm25_index import Bm25Index
+
+WEIGHTS = (3.0, 1.0)
+TERM_COUNT = 50
+
+
+def random_documents(random, count, start=0):
+    return {
+        doc: [random.randint(0, TERM_COUNT, size=random.randint(1, 8)).tolist(),
+              random.randint(0, TERM_COUNT, size=random.randint(0, 20)).tolist()]
+        for doc in range(start, start + count)
+    }
+
+
+def build(path, documents):
+    index = Bm25Index(str(path), WEIGHTS, capacity=8)
+    for doc, fields in documents.items():
+        index.set_document(doc, fields)
+    index.merge(1, TERM_COUNT)
+    return index
+
+
+QUERIES = [[[1]], [[2, 3]], [[4], [5, 6]], [[7], [8], [9]]]
+
+
+def assert_same_ranking(left, right, doc_count):
+    for groups in QUERIES:
+        left_scores, left_matched = left.score(groups, doc_count)
+        right_scores, right_matched = right.score(groups, doc_count)
+        size = max(left.size, right.size)
+        pad = lambda values: np.pad(values, (0, size - len(values)))
+        assert np.array_equal(pad(left_matched), pad(right_matched))
+        assert np.allclose(pad(left_scores), pad(right_scores), rtol=1e-5)
+
+
+@pytest.fixture
+def random():
+    return np.random.RandomState(7)
+
+
+def test_delta_merge_equals_fresh_build(tmp_path, random):
+    documents = random_documents(random, 40)
+    index = build(tmp_path / 'a', documents)
+    # 增量段：覆盖、删除和新增文档（新文档超出初始容量，触发字段长度文件扩容）
+    updates = random_documents(random, 10, start=35)
+    for doc, fields in updates.items():
+        index.set_document(doc, fields)
+    for doc in (0, 3):
+        index.remove_document(doc)
+    documents.update(updates)
+    del documents[0], documents[3]
+
+    index.merge(2, TERM_COUNT)
+    assert index.base_doc_count == len(documents) and index.delta_doc_count == 0
+    assert_same_ranking(index, build(tmp_path / 'b', documents), len(documents))
+
+
+def test_delta_matches_only_live_documents(tmp_path, random):
+    index = build(tmp_path / 'a', {0: [[1], [2]], 1: [[1], []]})
+    index.set_document(0, [[3], []])
+    index.set_document(2, [[1, 1], []])
+    index.set_document(2, [[1], [4]])
+    _, matched = index.score([[1]], 3)
+    assert np.flatnonzero(matched).tolist() == [1, 2]
+    _, matched = index.score([[2]], 3)
+    assert not matched.any()
+    _, matched = index.score([[4], [1]], 3)
+    assert np.flatnonzero(matched).tolist() == [2]
+
+
+def test_reopen_loads_merged_base(tmp_path, random):
+    documents = random_documents(random, 20)
+    index = build(tmp_path / 'a', documents)
+    reopened = Bm25Index(str(tmp_path / 'a'), WEIGHTS)
+    assert reopened.base_version == 1
+    assert_same_ranking(index, reopened, len(documents))
+
+
+def test_field_weight_ranks_title_match_higher(tmp_path):
+    index = build(tmp_path / 'a', {0: [[1], [2, 3]], 1: [[2], [1, 3]]})
+    scores, _ = index.score([[1]], 2)
+    assert scores[0] > scores[1] > 0
@@ -0,0 +1,60 @@
+import os
+import time
+
+from disk_cache import STALE_TMP_SECONDS, DiskLRUCache, content_key
+
+
+def test_content_key_ignores_key_order():
+    assert content_key({"a": 1, "b": [1, 2]}) == content_key({"b": [1, 2], "a": 1})
+    assert content_key({"a": 1}) != content_key({"a": 1.5})
+
+
+def test_put_get_and_reload(tmp_path):
+    cache = DiskLRUCache(str(tmp_path))
+    key = content_key({"q": 1})
+    assert cache.get(key) is None
+    cache.put(key, [{"id": "TC001"}])
+    assert cache.get(key) == [{"id": "TC001"}]
+    reloaded = DiskLRUCache(str(tmp_path))
+    assert len(reloaded) == 1
+    assert reloaded.get(key) == [{"id": "TC001"}]
+
+
+def test_evicts_least_recently_used(tmp_path):
+    value = 'x' * 100
+    cache = DiskLRUCache(str(tmp_path), max_bytes=250)
+    keys = [content_key(i) for i in range(3)]
+    cache.put(keys[0], value)
+    cache.put(keys[1], value)
+    assert cache.get(keys[0]) == value
+    cache.put(keys[2], value)
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == value and cache.get(keys[2]) == value
+    assert cache.stats()['evictions'] == 1
+    assert not os.path.exists(cache._path(keys[1]))
+
+
+def test_startup_removes_only_stale_tmp_files(tmp_path):
+    key = content_key('k')
+    directory = tmp_path / key[:2]
+    directory.mkdir()
+    stale = directory / (key + '.json.1.1.tmp')
+    fresh = directory / (key + '.json.2.2.tmp')
+    stale.write_text('partial')
+    fresh.write_text('partial')
+    old = time.time() - STALE_TMP_SECONDS - 10
+    os.utime(stale, (old, old))
+    cache = DiskLRUCache(str(tmp_path))
+    assert not stale.exists()
+    assert fresh.exists()
+    assert len(cache) == 0
+
+
+def test_corrupt_entry_is_a_miss(tmp_path):
+    cache = DiskLRUCache(str(tmp_path))
+    key = content_key('k')
+    cache.put(key, {"a": 1})
+    with open(cache._path(key), 'w') as f:
+        f.write('{broken')
+    assert cache.get(key) is None
+    assert len(cache) == 0
@@ -0,0 +1,72 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from duplicate_index import MAX_PAIRWISE_BUCKET, DuplicateIndex, case_shingles
+
+
+def make_case(templates, url='http://a', name='用例'):
+    return {
+        "name": name,
+        "steps": [{"components": [
+            {"type": "api", "name": "调用 %s" % template, "params": {"rTpl": template, "url": url}}
+            for template in templates
+        ]}]
+    }
+
+
+def bucket_pairs(keys):
+    """逐段按桶键分组：小桶全部两两组合，大桶只取与第一行及排序相邻的行组成的对"""
+    pairs = set()
+    for band in range(keys.shape[1]):
+        order = np.argsort(keys[:, band], kind='stable')
+        for _, group in itertools.groupby(order.tolist(), key=lambda row: keys[row, band]):
+            group = list(group)
+            if len(group) <= MAX_PAIRWISE_BUCKET:
+                pairs |= {(min(a, b), max(a, b)) for a, b in itertools.combinations(group, 2)}
+            else:
+                pairs |= {(min(group[0], row), max(group[0], row)) for row in group[1:]}
+                pairs |= {(min(a, b), max(a, b)) for a, b in zip(group, group[1:])}
+    return pairs
+
+
+@pytest.mark.parametrize('key_space', [3, 20, 400])
+def test_candidate_pairs_match_brute_force(key_space):
+    index = DuplicateIndex(num_perm=16, bands=4)
+    random = np.random.RandomState(key_space)
+    size = 300
+    index._band_keys = random.randint(0, key_space, size=(size, index.bands)).astype(np.uint64)
+    left, right = index._candidate_pairs(np.arange(size))
+    found = set(zip(left.tolist(), right.tolist()))
+    assert len(found) == len(left)
+    assert found == bucket_pairs(index._band_keys)
+
+
+def test_shingles_ignore_environment_params_and_names():
+    assert case_shingles(make_case(['a.xml', 'b.xml'])) == \
+        case_shingles(make_case(['a.xml', 'b.xml'], url='http://b', name='另一个'))
+    assert case_shingles(make_case(['a.xml', 'b.xml'])) != case_shingles(make_case(['b.xml', 'a.xml']))
+    assert case_shingles({"steps": []}) == set()
+
+
+def test_clusters_group_near_duplicates():
+    index = DuplicateIndex(threshold=0.6)
+    base = ['t%d.xml' % i for i in range(12)]
+    index.update_many([
+        (1, make_case(base), 'lib'),
+        (2, make_case(base, url='http://other'), 'lib'),
+        (3, make_case(base[:11] + ['changed.xml']), 'lib'),
+        (4, make_case(['x%d.xml' % i for i in range(12)]), 'lib'),
+        (5, make_case(base), 'other'),
+    ])
+    clusters = index.clusters()
+    assert [[seq for seq, _ in cluster] for cluster in clusters] == [[1, 2, 3, 5]]
+    assert clusters[0][0] == (1, 1.0)
+    assert [[seq for seq, _ in cluster] for cluster in index.clusters(library='lib')] == [[1, 2, 3]]
+    assert index.representatives()[5] == (1, 4)
+
+    index.remove(2)
+    assert [[seq for seq, _ in cluster] for cluster in index.clusters()] == [[1, 3, 5]]
+    index.update(3, {"steps": []})
+    assert len(index) == 3
@@ -0,0 +1,100 @@
+from datetime import datetime
+
+import pytest
+
+from expression_engine import (
+    CALL, LITERAL, MAX_NESTING_DEPTH, REFERENCE, EvaluationContext, ExpressionEngine, ExpressionError,
+    parse_expression
+)
+
+NOW = datetime(2025, 1, 31, 8, 30, 15)
+
+
+@pytest.fixture
+def engine():
+    return ExpressionEngine(cache_size=100)
+
+
+@pytest.fixture
+def context():
+    return EvaluationContext(
+        variables={"My_SubIdentity": "13800000001", "calling": {"Sub": {"SUB_ID": 42}}},
+        env={"BMPAPP101": {"SoapUrl": "http://soap"}, "AdminDB": "jdbc:admin"},
+        now=NOW
+    )
+
+
+def test_parse_nodes():
+    assert parse_expression("'yyyyMMdd'") == (LITERAL, 'yyyyMMdd')
+    assert parse_expression('Env.BMPAPP101.SoapUrl') == (REFERENCE, 'Env.BMPAPP101.SoapUrl')
+    node = parse_expression('G.modDay(G.now(), -1)')
+    assert node[0] == CALL and node[1] == 'G.modDay'
+    assert node[3][1] == (LITERAL, '-1')
+
+
+@pytest.mark.parametrize('source', [
+    '', 'G.now(', 'G.modDay(G.now() 1)', 'G.unknown()', 'G.now())', '(1)', 'a b', '@'
+])
+def test_syntax_errors(source):
+    with pytest.raises(ExpressionError):
+        parse_expression(source)
+
+
+def test_nesting_limit():
+    def nested(depth):
+        return 'G.dateFmt(' * depth + 'G.now()' + ", 'yyyyMMdd')" * depth
+
+    parse_expression(nested(MAX_NESTING_DEPTH - 1))
+    with pytest.raises(ExpressionError, match='嵌套'):
+        parse_expression(nested(MAX_NESTING_DEPTH + 1))
+    # 远超递归深度的输入也只是语法错误
+    with pytest.raises(ExpressionError):
+        parse_expression(nested(5000))
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('${G.now()}', '20250131083015'),
+    ('${G.today()}', '20250131'),
+    ('${G.modMonth(G.today(), 1)}', '20250228'),
+    ('${G.modDay(G.now(), -31)}', '20241231083015'),
+    ("${G.dateFmt(G.now(), 'yyyy-MM-dd')}", '2025-01-31'),
+    ('${G.getMonthTotalDay(20240201)}', '29'),
+    ('${G.getDateByWeek(1)}', '20250127'),
+    ('号码=${My_SubIdentity};url=${Env.BMPAPP101.SoapUrl}', '号码=13800000001;url=http://soap'),
+    ('${calling.Sub.SUB_ID}', '42'),
+    ('${Env.AdminDB}', 'jdbc:admin'),
+    ('no placeholders', 'no placeholders'),
+])
+def test_render(engine, context, text, expected):
+    issues = []
+    assert engine.render(text, context, issues) == expected
+    assert issues == []
+
+
+def test_unresolved_and_invalid_placeholders_kept(engine, context):
+    issues = []
+    text = '${Missing.Var}-${G.bogus()}-${G.modDay(abc, 1)}'
+    assert engine.render(text, context, issues, '/p') == text
+    assert [issue['code'] for issue in issues] == ['unresolved', 'error', 'unresolved']
+    assert all(issue['path'] == '/p' for issue in issues)
+
+
+def test_function_argument_error(engine, context):
+    issues = []
+    engine.render("${G.modDay('notatime', 1)}", context, issues)
+    assert issues[0]['code'] == 'error'
+
+
+def test_compile_is_cached_including_errors(engine):
+    first = engine.compile('a${G.bogus()}b')
+    assert engine.compile('a${G.bogus()}b') is first
+    assert first[1][1] is None and '未知函数' in first[1][2]
+
+
+def test_resolve_paths_and_references(engine, context):
+    issues = []
+    data = {"steps": [{"params": {"url": "${Env.BMPAPP101.SoapUrl}", "a/b": "${X}"}}], "n": 1}
+    resolved = engine.resolve(data, context, issues)
+    assert resolved == {"steps": [{"params": {"url": "http://soap", "a/b": "${X}"}}], "n": 1}
+    assert issues[0]['path'] == '/steps/0/params/a~1b'
+    assert engine.references('${G.modDay(Start_Time, 1)}${Env.AdminDB}') == ['Start_Time', 'Env.AdminDB']
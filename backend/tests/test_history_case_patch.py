@@ -0,0 +1,71 @@
+import pytest
+
+CASE_ID = 'HTC001'
+
+
+@pytest.fixture
+def version(client):
+    response = client.get('/api/history-cases/%s' % CASE_ID)
+    assert response.status_code == 200
+    return response.get_json()['version']
+
+
+def patch(client, operations, if_match=None, case_id=CASE_ID):
+    headers = {} if if_match is None else {'If-Match': if_match}
+    return client.patch('/api/history-cases/%s' % case_id, json=operations, headers=headers)
+
+
+def test_patch_applies_and_bumps_version(client, version):
+    response = patch(client, [{"op": "replace", "path": "/name", "value": "修改后的名称"}], '"%d"' % version)
+    assert response.status_code == 200
+    data = response.get_json()['data']
+    assert data['version'] == version + 1
+    assert response.headers['ETag'] == '"%d"' % (version + 1)
+    case = client.get('/api/history-cases/%s' % CASE_ID).get_json()['data']
+    assert case['name'] == '修改后的名称'
+
+
+def test_missing_if_match_is_428(client):
+    response = patch(client, [{"op": "replace", "path": "/name", "value": "x"}])
+    assert response.status_code == 428
+
+
+def test_stale_version_is_412(client, version):
+    response = patch(client, [{"op": "replace", "path": "/name", "value": "x"}], '"%d"' % (version - 1))
+    assert response.status_code == 412
+    assert response.get_json()['version'] == version
+    assert response.headers['ETag'] == '"%d"' % version
+
+
+def test_star_if_match_skips_version_check(client, version):
+    response = patch(client, [{"op": "test", "path": "/id", "value": CASE_ID}], '*')
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize('operations', [
+    [{"op": "test", "path": "/id", "value": "other"}],
+    [{"op": "remove", "path": "/no-such-field"}],
+    [{"op": "replace", "path": "/steps", "value": "not a list"}],
+    [{"op": "remove", "path": "/id"}],
+    [{"op": "replace", "path": "/id", "value": "HTC999"}],
+])
+def test_unappliable_or_malformed_result_is_422(client, version, operations):
+    response = patch(client, operations, '"%d"' % version)
+    assert response.status_code == 422
+    # 失败的补丁不修改用例
+    assert client.get('/api/history-cases/%s' % CASE_ID).get_json()['version'] == version
+
+
+@pytest.mark.parametrize('operations', [
+    {"op": "replace", "path": "/name", "value": "x"},
+    [{"op": "bogus", "path": "/name"}],
+    [{"op": "replace", "path": "name", "value": "x"}],
+])
+def test_invalid_patch_document_is_400(client, version, operations):
+    response = patch(client, operations, '"%d"' % version)
+    assert response.status_code == 400
+
+
+def test_unknown_case_is_404(client):
+    response = patch(client, [{"op": "replace", "path": "/name", "value": "x"}], '*', case_id='NO_SUCH_CASE')
+    assert response.status_code == 404
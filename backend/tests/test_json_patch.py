@@ -0,0 +1,112 @@
+import pytest
+
+from json_patch import InvalidPatchError, JsonPatchError, apply_patch, parse_pointer
+
+
+def patched(document, *operations):
+    return apply_patch(document, list(operations))[0]
+
+
+def test_pointer_unescapes_tilde_and_slash():
+    assert parse_pointer('') == ()
+    assert parse_pointer('/a~1b/c~0d/~01') == ('a/b', 'c~d', '~1')
+    with pytest.raises(InvalidPatchError):
+        parse_pointer('a/b')
+
+
+def test_add_replace_remove():
+    document = {"a": [1, 2], "b": {"c": 1}}
+    document = patched(document,
+                       {"op": "add", "path": "/a/1", "value": 9},
+                       {"op": "replace", "path": "/b/c", "value": 2},
+                       {"op": "remove", "path": "/a/0"},
+                       {"op": "add", "path": "/d", "value": None})
+    assert document == {"a": [9, 2], "b": {"c": 2}, "d": None}
+
+
+def test_dash_index_appends_only_for_add():
+    assert patched({"a": [1]}, {"op": "add", "path": "/a/-", "value": 2}) == {"a": [1, 2]}
+    assert patched({"a": [1]}, {"op": "add", "path": "/a/1", "value": 2}) == {"a": [1, 2]}
+    with pytest.raises(JsonPatchError):
+        patched({"a": [1]}, {"op": "replace", "path": "/a/-", "value": 2})
+    with pytest.raises(JsonPatchError):
+        patched({"a": [1]}, {"op": "remove", "path": "/a/-"})
+    with pytest.raises(JsonPatchError):
+        patched({"a": [1]}, {"op": "add", "path": "/a/2", "value": 2})
+
+
+@pytest.mark.parametrize('token', ['01', '00', '-1', '+1', '1.0', ' 1', ''])
+def test_invalid_array_index_rejected(token):
+    with pytest.raises(JsonPatchError):
+        patched({"a": [1, 2, 3]}, {"op": "replace", "path": "/a/" + token, "value": 0})
+
+
+def test_move_into_own_child_rejected():
+    with pytest.raises(JsonPatchError):
+        patched({"a": {"b": {}}}, {"op": "move", "from": "/a", "path": "/a/b/c"})
+    # 移动到自身和前缀相同的兄弟路径都是合法的
+    assert patched({"a": 1}, {"op": "move", "from": "/a", "path": "/a"}) == {"a": 1}
+    assert patched({"a": 1}, {"op": "move", "from": "/a", "path": "/ab"}) == {"ab": 1}
+
+
+def test_move_and_copy_report_touched_paths():
+    document, touched = apply_patch({"a": {"x": 1}, "b": []}, [
+        {"op": "copy", "from": "/a", "path": "/b/-"},
+        {"op": "move", "from": "/a/x", "path": "/c"}
+    ])
+    assert document == {"a": {}, "b": [{"x": 1}], "c": 1}
+    assert touched == [('b', '-'), ('a', 'x'), ('c',)]
+    # copy的值与来源相互独立
+    document["b"][0]["x"] = 2
+    assert document["c"] == 1
+
+
+@pytest.mark.parametrize('actual, expected, equal', [
+    (1, 1.0, True),
+    (1, True, False),
+    (0, False, False),
+    (True, True, True),
+    ("1", 1, False),
+    ({"a": [1, {"b": 2.0}]}, {"a": [1.0, {"b": 2}]}, True),
+    ([1, 2], [2, 1], False),
+    ({"a": 1}, {"a": 1, "b": None}, False),
+    (None, None, True),
+])
+def test_test_operation_compares_json_values(actual, expected, equal):
+    operation = {"op": "test", "path": "/v", "value": expected}
+    if equal:
+        patched({"v": actual}, operation)
+    else:
+        with pytest.raises(JsonPatchError):
+            patched({"v": actual}, operation)
+
+
+def test_whole_document_replace_and_remove():
+    assert patched({"a": 1}, {"op": "replace", "path": "", "value": [1]}) == [1]
+    assert patched({"a": 1}, {"op": "add", "path": "", "value": {"b": 2}}) == {"b": 2}
+    with pytest.raises(JsonPatchError):
+        patched({"a": 1}, {"op": "remove", "path": ""})
+
+
+def test_missing_paths_rejected():
+    with pytest.raises(JsonPatchError):
+        patched({"a": 1}, {"op": "remove", "path": "/b"})
+    with pytest.raises(JsonPatchError):
+        patched({"a": 1}, {"op": "replace", "path": "/b", "value": 1})
+    with pytest.raises(JsonPatchError):
+        patched({"a": 1}, {"op": "add", "path": "/b/c", "value": 1})
+    with pytest.raises(JsonPatchError):
+        patched({"a": 1}, {"op": "add", "path": "/a/b", "value": 1})
+
+
+@pytest.mark.parametrize('operations', [
+    {"op": "add", "path": "/a", "value": 1},
+    [{"op": "bogus", "path": "/a"}],
+    [{"op": "add", "path": "/a"}],
+    [{"op": "move", "path": "/a"}],
+    [{"op": "remove"}],
+    [{"op": "remove", "path": 1}],
+])
+def test_malformed_patch_rejected(operations):
+    with pytest.raises(InvalidPatchError):
+        apply_patch({"a": 1}, operations)
@@ -0,0 +1,51 @@
+import copy
+
+import pytest
+
+from param_tree import SubtreePool, common_base, diff_tree, merge_patch
+
+BASE = {"header": {"user": "admin", "lang": "zh"}, "body": {"id": "", "items": [1, 2]}, "timeout": "30"}
+
+
+@pytest.mark.parametrize('target', [
+    BASE,
+    {"header": {"user": "admin", "lang": "zh"}, "body": {"id": "1", "items": [1, 2]}, "timeout": "30"},
+    {"header": {"user": "admin"}, "body": {"id": "", "items": [2]}},
+    {"header": "flattened", "body": {"id": {"nested": True}}, "extra": [{}]},
+    {},
+])
+def test_merge_patch_of_diff_restores_target(target):
+    base = copy.deepcopy(BASE)
+    patch = diff_tree(base, target)
+    assert merge_patch(base, patch) == target
+    # 基础树不被修改
+    assert base == BASE
+
+
+def test_diff_of_equal_trees_is_empty():
+    assert diff_tree(BASE, copy.deepcopy(BASE)) == {}
+
+
+def test_merge_patch_shares_unchanged_subtrees():
+    merged = merge_patch(BASE, {"timeout": "60", "body": {"id": "1"}})
+    assert merged["header"] is BASE["header"]
+    assert merged["body"]["items"] is BASE["body"]["items"]
+    assert merged["body"] == {"id": "1", "items": [1, 2]}
+
+
+def test_merge_patch_null_deletes_key():
+    assert merge_patch({"a": 1, "b": 2}, {"a": None, "c": 3}) == {"b": 2, "c": 3}
+
+
+def test_common_base_keeps_majority_values():
+    trees = [{"a": "1", "h": {"x": "1"}}, {"a": "1", "h": {"x": "2"}}, {"a": "2", "h": {"x": "1", "y": "1"}}]
+    assert common_base(trees) == {"a": "1", "h": {"x": "1"}}
+
+
+def test_subtree_pool_shares_equal_subtrees_but_not_types():
+    pool = SubtreePool()
+    first = pool.intern({"h": {"v": 1}, "l": [1]})
+    second = pool.intern({"h": {"v": 1}, "l": [True]})
+    assert first["h"] is second["h"]
+    assert second["l"] == [True] and second["l"][0] is True
+    assert first["l"] is not second["l"]
@@ -0,0 +1,255 @@
+"""
+用例变量数据流分析
+按执行顺序（前置条件 → 测试步骤 → 预期结果，步骤和组件按先后）对用例做一次遍历，记录变量的定义和使用：
+- 定义: variable组件的 vars（"A=1;B=${A}"，按顺序逐个定义）、database组件的 vars（查询结果保存的字段名）、
+  rRsp参数树中叶子的 saveAs（组件未带rRsp时使用其模板的rRsp），phone组件分配的 calling/called/forward 号码
+- 使用: 任意参数（包括rReq/rRsp参数树中的取值）中 ${...} 占位符引用的变量，Env.* 和 G.* 为系统内置不计入
+
+报告的问题：undefined（使用的变量从未定义）、usedBeforeDefinition（变量在使用之后才定义）、
+unused（定义后没有被使用）、shadowed（变量被重复定义，覆盖了之前的定义），
+以及structure（用例、分组、步骤或组件的结构不正确，与用例校验的structure错误相同，该部分不参与分析）。
+每个组件参数只访问一次，占位符解析结果来自表达式引擎的缓存，分析耗时与用例大小成线性关系
+"""
+
+import fnmatch
+import re
+
+from case_validator import CASE_SECTIONS, CODE_STRUCTURE
+
+CODE_UNDEFINED = 'undefined'
+CODE_USED_BEFORE_DEFINITION = 'usedBeforeDefinition'
+CODE_UNUSED = 'unused'
+CODE_SHADOWED = 'shadowed'
+
+# 系统内置的引用根（环境配置和系统预置函数）
+BUILTIN_ROOTS = frozenset(['Env', 'G'])
+
+# phone组件各号码参数对应的变量（如 ${calling.Sub.SUB_ID}），由框架在分配号码时设置，不报告未使用
+PHONE_VARIABLES = {
+    'callingId': 'calling',
+    'calledId': 'called',
+    'forwardId': 'forward'
+}
+
+_VAR_SEPARATOR = re.compile(r'[;\n]')
+_FIELD_SEPARATOR = re.compile(r'[;,\n]')
+
+
+def _pointer(path):
+    """位置在分析过程中以元组记录，只在报告问题时格式化为JSON Pointer"""
+    return ''.join('/' + str(part).replace('~', '~0').replace('/', '~1') for part in path)
+
+
+def _structure_issue(path, message):
+    return {"code": CODE_STRUCTURE, "variable": None, "path": _pointer(path), "message": message}
+
+
+class _Definition:
+    __slots__ = ('name', 'path', 'implicit', 'used')
+
+    def __init__(self, name, path, implicit=False):
+        self.name = name
+        self.path = path
+        self.implicit = implicit
+        self.used = False
+
+
+class GlobalNames:
+    """调用方声明的外部变量（如案例库公共数据 Offer_*），支持通配符；这些变量不需要在用例中定义"""
+
+    def __init__(self, names=()):
+        names = sorted(set(names))
+        self.key = tuple(names)
+        self._exact = frozenset(name for name in names if not any(char in name for char in '*?['))
+        self._patterns = tuple(re.compile(fnmatch.translate(name)) for name in names if name not in self._exact)
+
+    def __contains__(self, name):
+        return name in self._exact or any(pattern.match(name) for pattern in self._patterns)
+
+
+class VariableAnalyzer:
+    """
+    变量数据流分析器
+    engine为表达式引擎（提取占位符中的引用），template_params(组件类型, 模板路径) 返回模板的 {"rReq", "rRsp"}
+    """
+
+    def __init__(self, engine, template_params=None):
+        self._engine = engine
+        self._template_params = template_params
+
+    def analyze(self, case, global_names=None):
+        """
+        分析单个用例，返回 {"id", "defined": [变量名, ...], "issues": [...]}
+        每个问题: { "code", "variable", "path": JSON Pointer位置, "message" }，
+        shadowed/usedBeforeDefinition 另带 "definedAt"（之前/之后的定义位置）
+        """
+        global_names = global_names or GlobalNames()
+        state = _CaseState(self._engine, global_names)
+        if not isinstance(case, dict):
+            return {"id": None, "defined": [], "issues": [_structure_issue((), '用例必须是JSON对象')]}
+        structure = []
+        for section in CASE_SECTIONS:
+            blocks = case.get(section) or []
+            if not isinstance(blocks, list):
+                structure.append(_structure_issue((section,), '%s必须是数组' % section))
+                continue
+            for block_index, block in enumerate(blocks):
+                components = block.get('components') if isinstance(block, dict) else None
+                if not isinstance(components, list):
+                    structure.append(_structure_issue((section, block_index), '步骤的components必须是数组'))
+                    continue
+                for component_index, component in enumerate(components):
+                    path = (section, block_index, 'components', component_index)
+                    if not isinstance(component, dict):
+                        structure.append(_structure_issue(path, '组件必须是JSON对象'))
+                    elif isinstance(component.get('params'), dict):
+                        self._component(state, component, path)
+                    elif component.get('params') is not None:
+                        structure.append(_structure_issue(path + ('params',), 'params必须是JSON对象'))
+        return {
+            "id": case.get('id'),
+            "defined": sorted({definition.name for definition in state.definitions}),
+            "issues": structure + state.finish()
+        }
+
+    def _component(self, state, component, path):
+        component_type = component.get('type')
+        params = component['params']
+        if component_type == 'variable':
+            for name, value in params.items():
+                if name == 'vars' and isinstance(value, str):
+                    for item in _VAR_SEPARATOR.split(value):
+                        name_part, _, value_part = item.partition('=')
+                        state.use_text(value_part, path + ('params', 'vars'))
+                        if name_part.strip():
+                            state.define(name_part.strip(), path + ('params', 'vars'))
+                else:
+                    state.use_value(value, path + ('params', name))
+            return
+
+        defines = []
+        for name, value in params.items():
+            if component_type == 'database' and name == 'vars':
+                if isinstance(value, str):
+                    defines.extend(
+                        (field.partition('=')[0].strip(), path + ('params', 'vars'), False)
+                        for field in _FIELD_SEPARATOR.split(value) if field.strip()
+                    )
+                continue
+            state.use_value(value, path + ('params', name))
+            if component_type == 'phone' and name in PHONE_VARIABLES and value:
+                defines.append((PHONE_VARIABLES[name], path + ('params', name), True))
+
+        response = params.get('rRsp')
+        response_path = path + ('params', 'rRsp')
+        if not isinstance(response, dict) and self._template_params and isinstance(params.get('rTpl'), str):
+            template = self._template_params(component_type, params['rTpl'])
+            response = template.get('rRsp') if template else None
+            response_path = path + ('params', 'rTpl')
+        if isinstance(response, dict):
+            for leaf_path, save_as in _save_as_fields(response, response_path):
+                defines.append((save_as, leaf_path, False))
+
+        for name, definition_path, implicit in defines:
+            state.define(name, definition_path, implicit)
+
+
+def _save_as_fields(tree, path):
+    """遍历rRsp参数树，产出 (叶子位置, saveAs变量名)"""
+    for key, node in tree.items():
+        if not isinstance(node, dict):
+            continue
+        node_path = path + (key,)
+        if 'type' in node and not isinstance(node.get('type'), dict):
+            save_as = node.get('saveAs')
+            if isinstance(save_as, str) and save_as.strip():
+                yield node_path + ('saveAs',), save_as.strip()
+        else:
+            yield from _save_as_fields(node, node_path)
+
+
+class _CaseState:
+    """单个用例的分析状态：当前有效的定义、全部定义和尚未找到定义的使用"""
+
+    def __init__(self, engine, global_names):
+        self._engine = engine
+        self._globals = global_names
+        self._current = {}  # 变量名 -> 当前有效的_Definition
+        self.definitions = []
+        self._pending = []  # (引用路径, 候选变量名, 位置)
+        self.issues = []
+
+    def define(self, name, path, implicit=False):
+        previous = self._current.get(name)
+        if previous is not None and not previous.implicit:
+            self.issues.append({
+                "code": CODE_SHADOWED,
+                "variable": name,
+                "path": _pointer(path),
+                "definedAt": _pointer(previous.path),
+                "message": '变量 %s 被重复定义，覆盖了之前的定义' % name
+            })
+        definition = _Definition(name, path, implicit)
+        self._current[name] = definition
+        self.definitions.append(definition)
+
+    def use_text(self, text, path):
+        if '${' not in text:
+            return
+        for reference in self._engine.references(text):
+            parts = reference.split('.')
+            if parts[0] in BUILTIN_ROOTS:
+                continue
+            # Offer_NewPlan.ID 既可能是带点的变量名，也可能是变量Offer_NewPlan的字段，按最长的已定义名称匹配
+            candidates = ['.'.join(parts[:length]) for length in range(len(parts), 0, -1)]
+            for candidate in candidates:
+                definition = self._current.get(candidate)
+                if definition is not None:
+                    definition.used = True
+                    break
+            else:
+                if reference not in self._globals and parts[0] not in self._globals:
+                    self._pending.append((reference, candidates, path))
+
+    def use_value(self, value, path):
+        if isinstance(value, str):
+            self.use_text(value, path)
+        elif isinstance(value, dict):
+            for key, item in value.items():
+                self.use_value(item, path + (key,))
+        elif isinstance(value, list):
+            for index, item in enumerate(value):
+                self.use_value(item, path + (index,))
+
+    def finish(self):
+        """遍历结束后区分从未定义和定义在使用之后的变量，并找出未使用的定义"""
+        first_definition = {}
+        for definition in self.definitions:
+            first_definition.setdefault(definition.name, definition)
+        for reference, candidates, path in self._pending:
+            later = next((first_definition[name] for name in candidates if name in first_definition), None)
+            if later is None:
+                self.issues.append({
+                    "code": CODE_UNDEFINED,
+                    "variable": reference,
+                    "path": _pointer(path),
+                    "message": '变量 %s 未定义' % reference
+                })
+            else:
+                later.used = True
+                self.issues.append({
+                    "code": CODE_USED_BEFORE_DEFINITION,
+                    "variable": reference,
+                    "path": _pointer(path),
+                    "definedAt": _pointer(later.path),
+                    "message": '变量 %s 在定义之前被使用' % reference
+                })
+        for definition in self.definitions:
+            if not definition.used and not definition.implicit:
+                self.issues.append({
+                    "code": CODE_UNUSED,
+                    "variable": definition.name,
+                    "path": _pointer(definition.path),
+                    "message": '变量 %s 定义后没有被使用' % definition.name
+                })
+        return self.issues
@@ -0,0 +1,206 @@
+"""
+历史用例语义检索向量索引
+用例文本通过本地哈希特征(hashing trick)映射为稠密向量，无需任何网络服务；
+所有向量存放在一个连续的NumPy矩阵中，查询为一次矩阵-向量乘法加argpartition取top-k
+"""
+
+import os
+import zlib
+
+import numpy as np
+
+from search_index import cjk_chars, iter_terms
+
+# 向量维度：100k用例 x 128维 float32 约50MB，单次矩阵-向量乘法受内存带宽限制，约数毫秒
+DEFAULT_DIM = 128
+
+# 用例各部分文本在向量中的权重
+FIELD_WEIGHTS = {
+    'name': 2.0,
+    'section': 1.0,     # 前置条件/步骤名称
+    'expected': 1.0,    # 预期结果名称
+    'component': 0.5    # 组件名称
+}
+
+
+def case_semantic_fields(case):
+    """提取用例参与语义向量计算的文本及权重 [(text, weight), ...]"""
+    fields = [(case.get('name', ''), FIELD_WEIGHTS['name'])]
+    for section_key in ('preconditions', 'steps', 'expectedResults'):
+        section_weight = FIELD_WEIGHTS['expected' if section_key == 'expectedResults' else 'section']
+        for section in case.get(section_key) or []:
+            fields.append((section.get('name', ''), section_weight))
+            for component in section.get('components') or []:
+                fields.append((component.get('name', ''), FIELD_WEIGHTS['component']))
+    return fields
+
+
+class HashingVectorizer:
+    """
+    哈希特征向量化器
+    特征为检索索引的词项（ASCII单词、中文二元组）加中文单字，
+    经crc32哈希到固定维度并带符号累加，最后做L2归一化，内积即余弦相似度
+    """
+
+    def __init__(self, dim=DEFAULT_DIM):
+        self.dim = dim
+
+    def _features(self, text):
+        lowered = (text or '').lower()
+        yield from iter_terms(lowered)
+        yield from cjk_chars(lowered)
+
+    def transform(self, fields):
+        """将 [(text, weight), ...] 转换为归一化的float32向量"""
+        dim = self.dim
+        positions, weights = [], []
+        for text, weight in fields:
+            for feature in self._features(text):
+                # 不能使用内置hash()：其结果随进程随机化，离线计算的向量将无法复用
+                hashed = zlib.crc32(feature.encode('utf-8'))
+                positions.append(hashed % dim)
+                weights.append(weight if hashed & 0x80000000 else -weight)
+        if not positions:
+            return np.zeros(dim, dtype=np.float32)
+        vector = np.bincount(positions, weights=weights, minlength=dim).astype(np.float32)
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+
+    def transform_query(self, text):
+        return self.transform([(text, 1.0)])
+
+
+class VectorIndex:
+    """
+    连续矩阵存储的向量索引，行号即文档键（由调用方分配，通常为用例的seq）
+    每行附带一个uint8标签用于查询时过滤（0表示空行）；删除的行清零，与任何查询的得分均为0，不会被返回
+    指定path时矩阵和标签以.npy文件内存映射的方式存放在磁盘上，重启后直接打开，
+    常驻内存只包含操作系统按需换入的页面
+    """
+
+    def __init__(self, dim=DEFAULT_DIM, path=None, capacity=1024):
+        self.dim = dim
+        self.path = path
+        self._matrix_path = path + '.npy' if path else None
+        self._tags_path = path + '.tags.npy' if path else None
+        self._file_id = None
+        if path and os.path.exists(self._matrix_path) and os.path.exists(self._tags_path):
+            self._open_files()
+        else:
+            self._matrix, self._tags = self._allocate(capacity)
+            self._size = 0
+            self._file_id = self._stat_file_id()
+
+    def _stat_file_id(self):
+        if not self.path:
+            return None
+        stat = os.stat(self._matrix_path)
+        return stat.st_ino, stat.st_size
+
+    def _open_files(self):
+        self._matrix = np.load(self._matrix_path, mmap_mode='r+')
+        self._tags = np.load(self._tags_path, mmap_mode='r+')
+        if self._matrix.shape[1] != self.dim:
+            raise ValueError('向量文件维度%d与配置维度%d不一致' % (self._matrix.shape[1], self.dim))
+        occupied = np.flatnonzero(self._tags)
+        self._size = int(occupied[-1]) + 1 if len(occupied) else 0
+        self._file_id = self._stat_file_id()
+
+    def _allocate(self, capacity, copy_from=None):
+        """分配指定容量的矩阵和标签数组；文件模式下先写临时文件再原子替换"""
+        if not self.path:
+            matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+            tags = np.zeros(capacity, dtype=np.uint8)
+            if copy_from is not None:
+                matrix[:self._size] = copy_from[0][:self._size]
+                tags[:self._size] = copy_from[1][:self._size]
+            return matrix, tags
+
+        arrays = []
+        for final_path, shape, dtype, source in (
+            (self._matrix_path, (capacity, self.dim), np.float32, copy_from and copy_from[0]),
+            (self._tags_path, (capacity,), np.uint8, copy_from and copy_from[1]),
+        ):
+            tmp_path = final_path + '.tmp'
+            array = np.lib.format.open_memmap(tmp_path, mode='w+', dtype=dtype, shape=shape)
+            if source is not None:
+                array[:self._size] = source[:self._size]
+            array.flush()
+            del array
+            os.replace(tmp_path, final_path)
+            arrays.append(np.load(final_path, mmap_mode='r+'))
+        return tuple(arrays)
+
+    def __len__(self):
+        return int(np.count_nonzero(self._tags[:self._size]))
+
+    def _ensure_row(self, row):
+        if row >= self._matrix.shape[0]:
+            capacity = self._matrix.shape[0]
+            while capacity <= row:
+                capacity *= 2
+            self._matrix, self._tags = self._allocate(capacity, copy_from=(self._matrix, self._tags))
+            self._file_id = self._stat_file_id()
+        if row >= self._size:
+            self._size = row + 1
+
+    def upsert(self, row, vector, tag=1):
+        """写入或覆盖一行向量"""
+        self._ensure_row(row)
+        self._matrix[row] = vector
+        self._tags[row] = tag
+
+    def remove(self, row):
+        """清空一行，不存在时忽略"""
+        if row < self._size:
+            self._matrix[row] = 0
+            self._tags[row] = 0
+
+    def clear(self):
+        """清空全部行（保留已分配的容量）"""
+        self._matrix[:self._size] = 0
+        self._tags[:self._size] = 0
+        self._size = 0
+
+    def flush(self):
+        """将内存映射的修改写回磁盘"""
+        if self.path:
+            self._matrix.flush()
+            self._tags.flush()
+
+    def reload_if_replaced(self):
+        """其他进程扩容替换了向量文件时重新映射；行数变化时同步可见范围"""
+        if not self.path:
+            return
+        if self._stat_file_id() != self._file_id:
+            self._open_files()
+        elif self._size < self._tags.shape[0] and self._tags[self._size]:
+            occupied = np.flatnonzero(self._tags)
+            self._size = int(occupied[-1]) + 1
+
+    def tag_rows(self, tag, size):
+        """返回长度为size的布尔数组，标记标签为tag的行（超出已分配容量的部分为False）"""
+        rows = np.zeros(size, dtype=bool)
+        count = min(size, self._size)
+        rows[:count] = self._tags[:count] == tag
+        return rows
+
+    def search(self, query_vector, k=20, tag=None):
+        """
+        返回与查询向量最相似的k行 [(row, score), ...]，按得分降序，只包含得分大于0的行
+        指定tag时只在该标签的行中检索
+        """
+        if self._size == 0 or k <= 0:
+            return []
+        scores = self._matrix[:self._size] @ query_vector
+        if tag is not None:
+            scores[self._tags[:self._size] != tag] = 0
+        if k < self._size:
+            top_rows = np.argpartition(scores, self._size - k)[self._size - k:]
+        else:
+            top_rows = np.arange(self._size)
+        # 得分相同的行按行号升序，保证排序稳定可分页
+        top_rows = top_rows[np.lexsort((top_rows, -scores[top_rows]))]
+        return [(int(row), float(scores[row])) for row in top_rows if scores[row] > 0]
@@ -30,7 +30,7 @@ async function fetchCaseLibraryOptions() {
   return await apiRequest('/case-library-options')
 }
 
-// 接口2: 搜索历史用例
+// 接口2: 搜索历史用例（只返回摘要，完整用例通过 fetchHistoryCaseDetail 按需获取）
 async function fetchSearchHistoryCases(caseLibrary, searchMethod, searchText) {
   console.log('[v0] 正在搜索历史用例...', { caseLibrary, searchMethod, searchText })
   return await apiRequest('/search-history-cases', {
@@ -38,11 +38,28 @@ async function fetchSearchHistoryCases(caseLibrary, searchMethod, searchText) {
     body: JSON.stringify({
       caseLibrary,
       searchMethod,
-      searchText
+      searchText,
+      view: 'summary',
+      pageSize: 50
     })
   })
 }
 
+// 接口2.1: 获取历史用例完整内容（按用例ID缓存）
+const historyCaseDetailCache = {}
+async function fetchHistoryCaseDetail(caseId) {
+  if (!historyCaseDetailCache[caseId]) {
+    console.log('[v0] 正在获取历史用例详情...', caseId)
+    historyCaseDetailCache[caseId] = await apiRequest(`/history-cases/${encodeURIComponent(caseId)}`)
+  }
+  return historyCaseDetailCache[caseId]
+}
+
+// 接口2.3: 搜索框输入联想
+async function fetchSearchSuggestions(prefix) {
+  return await apiRequest(`/search-suggest?q=${encodeURIComponent(prefix)}&limit=10`)
+}
+
 // 接口3: 获取预置步骤和组件
 async function fetchPresetData() {
   console.log('[v0] 正在获取预置步骤和组件数据...')
@@ -55,18 +72,68 @@ async function fetchParamSchemas() {
   return await apiRequest('/param-schemas')
 }
 
-// 接口5: 获取模板特定参数
+// 接口5: 获取模板特定参数（启动配置中已包含全部模板参数或已批量预取时直接使用，不再单独请求）
   async function fetchTemplateParams(componentType, templateName) {
+  if (bootstrapTemplateParams) {
+    return bootstrapTemplateParams[componentType]?.[templateName] || null
+  }
+  if (templateParamsCache[componentType] && templateName in templateParamsCache[componentType]) {
+    return templateParamsCache[componentType][templateName]
+  }
   // 移除前缀 @\ 并转换反斜杠为斜杠用于URL
   const cleanTemplate = templateName.replace(/^@\\/, '').replace(/\\/g, '/')
   console.log('[v0] 正在获取模板参数:', componentType, cleanTemplate)
   return await apiRequest(`/template-params/${componentType}/${cleanTemplate}`)
   }
 
-// 接口6: 生成测试用例
-async function fetchGenerateTestCases(templateFile, apiVersion, historyCases = []) {
+// 接口5.1: 批量获取模板特定参数，templates为 [{ componentType, rTpl }, ...]，结果与请求顺序一致
+async function fetchTemplateParamsBatch(templates) {
+  console.log('[v0] 正在批量获取模板参数:', templates.length)
+  return await apiRequest('/template-params/batch', {
+    method: 'POST',
+    body: JSON.stringify({ templates })
+  })
+}
+
+// 打开用例时一次批量预取其中全部组件模板的参数，之后切换组件模板时直接使用（启动配置已包含模板参数时不需要）
+const templateParamsCache = {} // { 组件类型: { 模板: 参数 | null } }
+async function prefetchCaseTemplateParams(testCase) {
+  if (bootstrapTemplateParams) return
+  const templates = []
+  const seen = new Set()
+  ;['preconditions', 'steps', 'expectedResults'].forEach((section) => {
+    ;(testCase[section] || []).forEach((block) => {
+      ;(block.components || []).forEach((component) => {
+        const rTpl = component.params?.rTpl
+        const key = `${component.type}\n${rTpl}`
+        if (!rTpl || seen.has(key) || (templateParamsCache[component.type] && rTpl in templateParamsCache[component.type])) return
+        seen.add(key)
+        templates.push({ componentType: component.type, rTpl })
+      })
+    })
+  })
+  if (templates.length === 0) return
+  try {
+    const results = await fetchTemplateParamsBatch(templates)
+    results.forEach(({ params }, index) => {
+      const { componentType, rTpl } = templates[index]
+      templateParamsCache[componentType] = templateParamsCache[componentType] || {}
+      templateParamsCache[componentType][rTpl] = params
+    })
+  } catch (error) {
+    console.warn('[v0] 批量获取模板参数失败，切换模板时再单独获取:', error)
+  }
+}
+
+// 生成任务轮询的最长等待时间(毫秒)：服务端单个任务超时时间（GENERATION_TIMEOUT，默认120秒）加上排队余量，
+// 超过后取消任务并报错，避免服务端异常时一直轮询
+const GENERATION_POLL_TIMEOUT_MS = (120 + 60) * 1000
+
+// 接口6.1/6.2: 生成测试用例
+// 提交后台生成任务后轮询任务状态，onProgress(done, total) 报告进度，任务成功时返回生成的用例
+async function fetchGenerateTestCases(templateFile, apiVersion, historyCases = [], onProgress = null) {
   console.log('[v0] 正在生成测试用例...', { templateFile, apiVersion, historyCases: historyCases.length })
-  return await apiRequest('/generate-test-cases', {
+  let job = await apiRequest('/generation-jobs', {
     method: 'POST',
     body: JSON.stringify({
       templateFile,
@@ -74,6 +141,69 @@ async function fetchGenerateTestCases(templateFile, apiVersion, historyCases = [
       historyCases
     })
   })
+  let interval = 500
+  const deadline = Date.now() + GENERATION_POLL_TIMEOUT_MS
+  while (job.status === 'queued' || job.status === 'running') {
+    if (Date.now() >= deadline) {
+      apiRequest(`/generation-jobs/${job.id}/cancel`, { method: 'POST' }).catch(() => {})
+      const error = new Error(`生成任务超过${GENERATION_POLL_TIMEOUT_MS / 1000}秒仍未完成，请稍后重试`)
+      error.timedOut = true
+      throw error
+    }
+    await new Promise((resolve) => setTimeout(resolve, interval))
+    interval = Math.min(interval * 1.5, 2000)
+    job = await apiRequest(`/generation-jobs/${job.id}`)
+    if (onProgress && job.progress.total > 0) {
+      onProgress(job.progress.done, job.progress.total)
+    }
+  }
+  if (job.status !== 'succeeded') {
+    throw new Error(job.error || '生成任务失败')
+  }
+  return job.result
+}
+
+// 接口6（流式）: 生成测试用例，每收到一个用例事件回调 onCase(case, index)，全部完成后返回用例列表
+async function streamGenerateTestCases(templateFile, apiVersion, historyCases = [], onCase = null) {
+  console.log('[v0] 正在流式生成测试用例...', { templateFile, apiVersion, historyCases: historyCases.length })
+  const response = await fetch(`${API_BASE_URL}/generate-test-cases?stream=ndjson`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ templateFile, apiVersion, historyCases })
+  })
+  if (!response.ok || !response.body) {
+    throw new Error(`流式生成请求失败: ${response.status}`)
+  }
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  const cases = []
+  let buffer = ''
+  let finished = false
+  const handleLine = (line) => {
+    if (!line.trim()) return
+    const event = JSON.parse(line)
+    if (event.type === 'case') {
+      cases.push(event.case)
+      if (onCase) onCase(event.case, event.index)
+    } else if (event.type === 'error') {
+      throw new Error(event.message || '生成失败')
+    } else if (event.type === 'done') {
+      finished = true
+    }
+  }
+  while (true) {
+    const { done, value } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+    const lines = buffer.split('\n')
+    buffer = lines.pop()
+    lines.forEach(handleLine)
+  }
+  handleLine(buffer + decoder.decode())
+  if (!finished) {
+    throw new Error('生成结果不完整')
+  }
+  return cases
 }
 
 // 接口7: 获取系统预置函数
@@ -82,6 +212,59 @@ async function fetchSystemFunctions() {
   return await apiRequest('/system-functions')
 }
 
+// 接口9: 获取页面启动所需的全部静态配置
+// 配置按版本号缓存在localStorage中，带上since请求；版本未变时后端只返回 { unchanged: true }
+const BOOTSTRAP_STORAGE_KEY = 'bootstrapConfig'
+async function fetchBootstrap() {
+  let cached = null
+  try {
+    cached = JSON.parse(localStorage.getItem(BOOTSTRAP_STORAGE_KEY))
+  } catch (error) {
+    cached = null
+  }
+  // 模板参数以"基础树 + 各模板差量"的形式传输，使用时再展开
+  const since = cached?.version ? `&since=${encodeURIComponent(cached.version)}` : ''
+  console.log('[v0] 正在获取启动配置...', since)
+  const config = await apiRequest(`/bootstrap?templateParams=delta${since}`)
+  if (config.unchanged && cached) {
+    return cached
+  }
+  try {
+    localStorage.setItem(BOOTSTRAP_STORAGE_KEY, JSON.stringify(config))
+  } catch (error) {
+    console.warn('[v0] 启动配置无法写入本地缓存:', error)
+  }
+  return config
+}
+
+// 将JSON Merge Patch形式的差量应用到基础树上（null表示删除该键）
+function applyMergePatch(base, patch) {
+  if (patch === null || typeof patch !== 'object' || Array.isArray(patch)) {
+    return patch
+  }
+  const result = base !== null && typeof base === 'object' && !Array.isArray(base) ? { ...base } : {}
+  Object.entries(patch).forEach(([key, value]) => {
+    if (value === null) {
+      delete result[key]
+    } else {
+      result[key] = applyMergePatch(result[key], value)
+    }
+  })
+  return result
+}
+
+// 将启动配置中差量形式的模板参数展开为 { 组件类型: { 模板: 参数 } }
+function expandTemplateParams(templateParamsDelta) {
+  const templateParams = {}
+  Object.entries(templateParamsDelta || {}).forEach(([componentType, { base, deltas }]) => {
+    templateParams[componentType] = {}
+    Object.entries(deltas || {}).forEach(([template, delta]) => {
+      templateParams[componentType][template] = applyMergePatch(base, delta)
+    })
+  })
+  return templateParams
+}
+
 // ============ 全局变量存储从后端获取的数据 ============
 let caseLibraryOptions = []
 let presetSteps = []
@@ -90,6 +273,7 @@ let componentDefaultParams = {} // 组件默认参数，从后端获取
 let currentSearchResults = [] // 存储当前搜索结果
 let paramSchemas = {} // 参数配置架构，从后端获取
 let systemPresetFunctions = {} // 系统预置函数，从后端获取（页面初始化时加载一次）
+let bootstrapTemplateParams = null // 模板特定参数 { 组件类型: { 模板: 参数 } }，随启动配置一起获取
 
 // 预置步骤和组件数据将从后端API获取，不再使用前端默认数据
 
@@ -317,27 +501,24 @@ function initElements() {
 async function loadBackendData() {
   console.log('[v0] 开始加载后端数据...')
   try {
-  // 加载预置步骤和组件数据
-  const presetData = await fetchPresetData()
+  // 一次请求获取预置步骤和组件、参数配置架构、系统预置函数、案例库选项和模板参数
+  const config = await fetchBootstrap()
+  const presetData = config.presetData || {}
   presetSteps = presetData.steps || []
   presetComponents = presetData.components || []
   componentDefaultParams = presetData.componentDefaultParams || {}
-  console.log('[v0] 预置数据加载成功:', {
+  paramSchemas = config.paramSchemas || {}
+  systemPresetFunctions = config.systemFunctions || {}
+  caseLibraryOptions = config.caseLibraryOptions || []
+  bootstrapTemplateParams = config.templateParamsDelta ? expandTemplateParams(config.templateParamsDelta) : (config.templateParams || null)
+  console.log('[v0] 启动配置加载成功:', {
+  version: config.version,
   steps: presetSteps.length,
   components: presetComponents.length,
-  componentParams: Object.keys(componentDefaultParams).length
+  componentParams: Object.keys(componentDefaultParams).length,
+  paramSchemas: Object.keys(paramSchemas).length,
+  systemFunctions: Object.keys(systemPresetFunctions).length
   })
-  
-  // 加载系统预置函数数据（页面初始化时加载一次，供所有用例编辑使用）
-  try {
-    systemPresetFunctions = await fetchSystemFunctions()
-    console.log('[v0] 系统预置函数加载成功:', Object.keys(systemPresetFunctions))
-  } catch (funcError) {
-    console.error('[v0] 加载系统预置函数失败:', funcError)
-    systemPresetFunctions = {}
-  }
-  
-  // 案例库选项会在用户打开筛选面板时按需加载
   } catch (error) {
   console.error('[v0] 加载后端数据失败:', error)
   showNotification('加载后端数据失败，请检查后端服务是否启动', 'error', 5000)
@@ -2106,12 +2287,12 @@ async function startGeneratingCases() {
   const progressFill = document.getElementById(progressFillId)
   const progressPercent = document.getElementById(progressPercentId)
 
-  // 模拟进度动画
-  for (let i = 0; i <= 80; i += 10) {
-    await new Promise((resolve) => setTimeout(resolve, 200))
+  // 按后台生成任务报告的进度更新进度条（完成前最多显示95%）
+  const updateProgress = (done, total) => {
+    const percent = Math.min(95, Math.round((done / total) * 100))
     if (progressFill && progressPercent) {
-      progressFill.style.width = i + "%"
-      progressPercent.textContent = i + "%"
+      progressFill.style.width = percent + "%"
+      progressPercent.textContent = percent + "%"
     }
   }
 
@@ -2121,7 +2302,20 @@ async function startGeneratingCases() {
     const caseFileName = elements.caseFileName?.textContent || 'template.xml'
     const apiVersion = apiVersionSelect?.value || 'v2.0'
     
-    const generatedCases = await fetchGenerateTestCases(caseFileName, apiVersion, selectedHistoryCases)
+    // 优先流式生成，每收到一个用例更新一次进度；浏览器不支持流式读取或请求失败时改用后台生成任务
+    let generatedCases
+    try {
+      generatedCases = await streamGenerateTestCases(caseFileName, apiVersion, selectedHistoryCases, (generatedCase, index) => {
+        const percent = Math.round(95 * (1 - Math.pow(0.5, index + 1)))
+        if (progressFill && progressPercent) {
+          progressFill.style.width = percent + "%"
+          progressPercent.textContent = `已生成 ${index + 1} 个用例`
+        }
+      })
+    } catch (streamError) {
+      console.warn('[v0] 流式生成失败，改用后台生成任务:', streamError)
+      generatedCases = await fetchGenerateTestCases(caseFileName, apiVersion, selectedHistoryCases, updateProgress)
+    }
     testCases = generatedCases
     
     // 生成进度
@@ -2133,7 +2327,7 @@ async function startGeneratingCases() {
     addTestCaseCard()
   } catch (error) {
     console.error('[v0] 生成测试用例失败:', error)
-    showNotification('生成测试用例失败，请检查后端服务是否启动', 'error', 5000)
+    showNotification(error.timedOut ? error.message : '生成测试用例失败，请检查后端服务是否启动', 'error', 5000)
     // 使用空数组作为备用
     testCases = []
   }
@@ -3014,9 +3208,37 @@ function handleSearchInput(e) {
     elements.filterPanel.classList.add("show")
   } else {
     elements.filterPanel.classList.remove("show")
+    scheduleSearchSuggestions(value.trim())
   }
 }
 
+// 输入联想：停顿150ms后请求，较早发出的请求晚返回时丢弃其结果
+let suggestTimer = null
+let suggestRequestId = 0
+
+function scheduleSearchSuggestions(prefix) {
+  clearTimeout(suggestTimer)
+  suggestTimer = setTimeout(async () => {
+    const requestId = ++suggestRequestId
+    let suggestions = []
+    if (prefix) {
+      try {
+        suggestions = await fetchSearchSuggestions(prefix)
+      } catch (error) {
+        console.error('[v0] 获取搜索联想失败:', error)
+      }
+    }
+    if (requestId !== suggestRequestId) return
+    const datalist = document.getElementById("historySearchSuggestions")
+    datalist.innerHTML = ""
+    suggestions.forEach((item) => {
+      const option = document.createElement("option")
+      option.value = item.text
+      datalist.appendChild(option)
+    })
+  }, 150)
+}
+
 async function renderFilterPanel() {
   // 如果案例库选项还未加载，从API获取
   if (caseLibraryOptions.length === 0) {
@@ -3177,11 +3399,10 @@ function renderSearchResults(results) {
     const viewBtn = el.querySelector(".search-result-view")
     const id = el.dataset.id
     
-    const toggleSelect = (e) => {
+    const toggleSelect = async (e) => {
       if (e.target === viewBtn) return
-      // 从当前搜索结果中查找，而不是从mock数据
-      const tc = currentSearchResults.find(t => t.id === id)
-      if (!tc) return
+      // 搜索结果只有摘要，勾选时再获取完整用例
+      if (!currentSearchResults.some(t => t.id === id)) return
       
       const existingIndex = tempSelectedCases.findIndex(s => s.id === id)
       if (existingIndex >= 0) {
@@ -3189,6 +3410,15 @@ function renderSearchResults(results) {
         el.classList.remove("selected")
         checkbox.checked = false
       } else {
+        let tc
+        try {
+          tc = await fetchHistoryCaseDetail(id)
+        } catch (error) {
+          showNotification("获取用例详情失败", "error", 2000)
+          checkbox.checked = false
+          return
+        }
+        if (tempSelectedCases.some(s => s.id === id)) return
         tempSelectedCases.push(JSON.parse(JSON.stringify(tc)))
         el.classList.add("selected")
         checkbox.checked = true
@@ -3199,6 +3429,7 @@ function renderSearchResults(results) {
           caseTemplate.name = tc.name + " (模板)"
           savedCaseTemplate = JSON.parse(JSON.stringify(caseTemplate))
           savedTemplateIndex = 0
+          prefetchCaseTemplateParams(tc)
         }
       }
       updateSelectedCasesPreview()
@@ -3270,10 +3501,18 @@ function updateSelectedCasesPreview() {
 }
 
 // 只读查看用例详情
-  function openHistoryCaseDetail(caseId) {
-  const tc = currentSearchResults.find(t => t.id === caseId) || tempSelectedCases.find(t => t.id === caseId)
-  if (!tc) return
+  async function openHistoryCaseDetail(caseId) {
+  let tc = tempSelectedCases.find(t => t.id === caseId)
+  if (!tc) {
+    try {
+      tc = await fetchHistoryCaseDetail(caseId)
+    } catch (error) {
+      showNotification("获取用例详情失败", "error", 2000)
+      return
+    }
+  }
   
+  prefetchCaseTemplateParams(tc)
   historyCasesForEdit = [JSON.parse(JSON.stringify(tc))]
   currentHistoryCaseIndex = 0
   
@@ -4985,16 +5224,8 @@ function onComponentSelected(comp) {
 
   // 启动应用
 async function startApp() {
+  // 参数配置架构随启动配置在loadBackendData中一起加载
   init()
-  
-  // 从后端获取参数配置架构
-  try {
-    paramSchemas = await fetchParamSchemas()
-    console.log('[v0] 参数配置架构已加载:', Object.keys(paramSchemas))
-  } catch (error) {
-    console.error('[v0] 获取参数配置架构失败:', error)
-    showNotification('获取参数配置架构失败，请检查后端服务', 'error', 3000)
-  }
 }
 
 startApp()